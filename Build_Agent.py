@@ -14,7 +14,12 @@ load_dotenv()
 
 from langchain_community.tools.tavily_search import TavilySearchResults
 
-search = TavilySearchResults(max_results=2)
+# cached_search adds a per-query-class TTL cache and coalesces identical
+# concurrent queries into one request; the tool looks the same to the LLM.
+
+from cached_search import cached_search
+
+search = cached_search(TavilySearchResults(max_results=2))
 search_result = search.invoke("What is the weather in Mumbai?")
 print(search_result)
 
@@ -98,9 +103,15 @@ for chunk in agent_executor.stream(
 # Let's give memory to our Agent
 # -----------------------------------------------
 
-from langgraph.checkpoint.memory import MemorySaver
+# SqliteCheckpointSaver is a drop-in MemorySaver that keeps threads on disk
+from sqlite_checkpointer import SqliteCheckpointSaver
+
+memory = SqliteCheckpointSaver("build_agent.sqlite")
 
-memory = MemorySaver()
+# The inputs below are fixed, so every run starts its demo threads afresh
+# instead of appending them to the threads stored by the previous run.
+for thread_id in ["abc123", "xyz123"]:
+    memory.delete_thread(thread_id)
 
 agent_executor = create_react_agent(tools=tools, model=model, checkpointer=memory)
 
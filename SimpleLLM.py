@@ -24,7 +24,14 @@ os.getenv("OPENAI_API_KEY")
 
 from langchain_openai import ChatOpenAI
 
-model = ChatOpenAI(model="gpt-4o-mini")
+# Repeated (language, text) pairs are answered from an exact-match cache
+# keyed on the rendered messages and the model parameters.
+
+from response_cache import ResponseCache
+
+response_cache = ResponseCache(maxsize=10_000, ttl=24 * 3600, path="translations_cache.sqlite")
+
+model = ChatOpenAI(model="gpt-4o-mini", cache=response_cache)
 
 
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -87,3 +94,7 @@ chain = prompt_template | model | parser
 # chain.invoke({"language" : "italian", "text" : "hi" })
 print(chain.invoke({"language" : "italian", "text" : "hi" }))
 
+# The same request again is served from the cache
+print(chain.invoke({"language" : "italian", "text" : "hi" }))
+print(response_cache.stats())
+
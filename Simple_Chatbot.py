@@ -61,7 +61,8 @@ print(response.response_metadata)
 # Message Persistence using LangGraph
 # -----------------------------------------------
 
-from langgraph.checkpoint.memory import MemorySaver
+# SqliteCheckpointSaver is a drop-in MemorySaver that keeps threads on disk
+from sqlite_checkpointer import SqliteCheckpointSaver
 from langgraph.graph import START, MessagesState, StateGraph
 
 # Define a graph
@@ -77,9 +78,14 @@ graph.add_node("model", call_model)
 graph.add_edge(START, "model")
 
 # Add Memory
-memory = MemorySaver()
+memory = SqliteCheckpointSaver("simple_chatbot.sqlite")
 app = graph.compile(checkpointer=memory)
 
+# The inputs below are fixed, so every run starts its demo threads afresh
+# instead of appending them to the threads stored by the previous run.
+for thread_id in ["abc123", "abc456"]:
+    memory.delete_thread(thread_id)
+
 
 # -----------------------------------------------
 # Create a config 
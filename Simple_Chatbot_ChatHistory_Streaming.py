@@ -35,20 +35,32 @@ prompt_template = ChatPromptTemplate.from_messages(
     ]
 )
 
+# CompiledChatPrompt renders the system message once instead of on every
+# turn and keeps the prompt prefix byte-identical for prompt caching.
+
+from compiled_prompt import CompiledChatPrompt
+
+compiled_prompt = CompiledChatPrompt(prompt_template)
+
 
 # -----------------------------------------------
 # Let's use trim_messsage to remove the content
 # of the message from end
 # -----------------------------------------------
 
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, trim_messages 
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+# IncrementalTrimmer gives the same result as
+# trim_messages(strategy="last", include_system=True, allow_partial=False, start_on="human")
+# but caches the token count of every message, so each turn only
+# tokenizes the messages it has not seen before.
+
+from incremental_trimmer import IncrementalTrimmer
 
-trimmer = trim_messages(
+trimmer = IncrementalTrimmer(
     max_tokens=65,
-    strategy="last",
     token_counter=model,
     include_system=True,
-    allow_partial=False,
     start_on="human"
 )
 
@@ -88,16 +100,30 @@ class State(TypedDict):
 # Message Persistence using LangGraph
 # -----------------------------------------------
 
-from langgraph.checkpoint.memory import MemorySaver
+# SqliteCheckpointSaver is a drop-in MemorySaver that keeps threads on disk
+from sqlite_checkpointer import SqliteCheckpointSaver
 from langgraph.graph import START, StateGraph
 
 # Define a graph
 graph = StateGraph(state_schema=State)
 
 # Function to call a Model
+# The history is kept short by BackgroundSummarizer (below), so old turns
+# are summarized rather than dropped. A trimmer stays as a hard bound on
+# what one call sends: it only cuts while a summary is still pending (or
+# if summarizing failed), and `bounded` never trims the summary itself.
+from summarizer import bounded
+
+prompt_trimmer = IncrementalTrimmer(
+    max_tokens=256,
+    token_counter=model,
+    include_system=False,
+    start_on="human"
+)
+
 def call_model(state: State):
-    trimmed_messages = trimmer.invoke(state["messages"])
-    prompt = prompt_template.invoke(
+    trimmed_messages = bounded(state["messages"], prompt_trimmer)
+    prompt = compiled_prompt.invoke(
         {"messages": trimmed_messages, "language": state["language"]}
         )
     response = model.invoke(prompt)
@@ -108,9 +134,27 @@ graph.add_edge(START, "model")
 graph.add_node("model", call_model)
 
 # Add Memory
-memory = MemorySaver()
+memory = SqliteCheckpointSaver("simple_chatbot_history.sqlite")
 app = graph.compile(checkpointer=memory)
 
+# The inputs below are fixed, so every run starts its demo threads afresh
+# instead of appending them to the threads stored by the previous run.
+for thread_id in ["abc456", "abc567", "abc678"]:
+    memory.delete_thread(thread_id)
+
+
+# -----------------------------------------------
+# Compact long conversations in the background
+# -----------------------------------------------
+
+# Once a thread is over 65 tokens, BackgroundSummarizer replaces its older
+# turns with a rolling summary message in a background thread; the last
+# 4 messages are kept as they are. Turns never wait for the summary.
+
+from summarizer import BackgroundSummarizer
+
+summarizer = BackgroundSummarizer(app, model, max_tokens=65, keep_last=4, as_node="model")
+
 
 # -----------------------------------------------
 # Let's try asking model my name
@@ -121,7 +165,12 @@ query = "What is my name?"
 language = "English"
 
 input_message = messages + [HumanMessage(content=query)]
-output = app.invoke({"messages": input_message, "language": language}, config=config)
+output = summarizer.invoke({"messages": input_message, "language": language}, config=config)
+output["messages"][-1].pretty_print()
+
+# The thread is now summarized in the background; the name survives it
+summarizer.wait()
+output = summarizer.invoke({"messages": [HumanMessage(content=query)], "language": language}, config=config)
 output["messages"][-1].pretty_print()
 
 
@@ -134,7 +183,7 @@ query = "What was the math problem I asked?"
 language = "English"
 
 input_message = messages + [HumanMessage(content=query)]
-output = app.invoke({"messages": input_message, "language": language}, config=config)
+output = summarizer.invoke({"messages": input_message, "language": language}, config=config)
 output["messages"][-1].pretty_print()
 
 
@@ -156,4 +205,4 @@ for chunk, metadata in app.stream(
     if isinstance(chunk, AIMessage):
         print(chunk.content, end="|")
 
-# -----------------------------------------------
\ No newline at end of file
+# -----------------------------------------------
\ No newline at end of file
@@ -35,11 +35,20 @@ prompt_template = ChatPromptTemplate.from_messages(
     ]
 )
 
+# CompiledChatPrompt renders the system message once instead of on every
+# turn and keeps the prompt prefix byte-identical, so provider-side prompt
+# caching can hit. Its output equals prompt_template.invoke(state).
+
+from compiled_prompt import CompiledChatPrompt
+
+compiled_prompt = CompiledChatPrompt(prompt_template)
+
 # -----------------------------------------------
 # Message Persistence using LangGraph
 # -----------------------------------------------
 
-from langgraph.checkpoint.memory import MemorySaver
+# SqliteCheckpointSaver is a drop-in MemorySaver that keeps threads on disk
+from sqlite_checkpointer import SqliteCheckpointSaver
 from langgraph.graph import START, MessagesState, StateGraph
 
 # Define a graph
@@ -47,7 +56,7 @@ graph = StateGraph(state_schema=MessagesState)
 
 # Function to call a Model
 def call_model(state: MessagesState):
-    prompt = prompt_template.invoke(state)
+    prompt = compiled_prompt.invoke(state)
     response = model.invoke(prompt)
     return {"messages": response}
 
@@ -56,9 +65,14 @@ graph.add_edge(START, "model")
 graph.add_node("model", call_model)
 
 # Add Memory
-memory = MemorySaver()
+memory = SqliteCheckpointSaver("simple_chatbot_prompt.sqlite")
 app = graph.compile(checkpointer=memory)
 
+# The inputs below are fixed, so every run starts its demo threads afresh
+# instead of appending them to the threads stored by the previous run.
+for thread_id in ["abc123", "abc456"]:
+    memory.delete_thread(thread_id)
+
 
 # -----------------------------------------------
 # Create a config 
@@ -98,6 +112,9 @@ prompt_template = ChatPromptTemplate.from_messages(
     ]
 )
 
+# The system message is rendered once per {language}
+compiled_prompt = CompiledChatPrompt(prompt_template)
+
 
 # -----------------------------------------------
 # Message Persistence using LangGraph
@@ -119,7 +136,7 @@ graph = StateGraph(state_schema=state)
 
 # Function to call a Model
 def call_model(state: state):
-    prompt = prompt_template.invoke(state)
+    prompt = compiled_prompt.invoke(state)
     response = model.invoke(prompt)
     return {"messages": [response]}
 
@@ -127,8 +144,7 @@ def call_model(state: state):
 graph.add_edge(START, "model")
 graph.add_node("model", call_model)
 
-# Add Memory
-memory = MemorySaver()
+# Add Memory: the same saver, so one connection writes the database file
 app = graph.compile(checkpointer=memory)
 
 
@@ -0,0 +1,404 @@
+# ************************************************
+# Multi-process serving for the ReAct agent of Build_Agent.py
+# ************************************************
+
+# One Python process runs the agent on one core. AgentDispatcher starts N
+# worker processes, each with its own `create_react_agent(...)` serving
+# many requests concurrently with `ainvoke`, and routes every request by
+# consistent hash of its thread_id (hash_ring.py), so a conversation
+# always goes to the worker that owns it.
+#
+#   dispatcher = AgentDispatcher(functools.partial(build_react_agent, "agent_workers.sqlite"), workers=4)
+#   output = dispatcher.invoke({"messages": [HumanMessage("Hi, I am Sushant")]}, thread_id="abc123")
+#   dispatcher.add_worker() / dispatcher.remove_worker(worker_id)
+#
+# The workers share one SqliteCheckpointSaver database (committing every
+# write), so a thread moved by a rebalance finds its whole history on its
+# new worker. Each thread has at most one request in flight; the next one
+# is sent when it finishes, to whichever worker owns the thread by then,
+# so turns never interleave, not even across a rebalance.
+#
+# A worker process that dies (crash, OOM kill) is noticed within
+# `poll_interval` seconds: its in-flight requests fail with RuntimeError,
+# it leaves the ring and a fresh worker takes its place. Workers that die
+# before their factory finished are respawned with exponential backoff;
+# after `max_startup_failures` in a row the dispatcher gives up, and
+# requests fail instead of waiting for a worker that cannot start.
+#
+#   python agent_workers.py --workers 4 --requests 2000 --threads 200 --fake
+
+import argparse
+import asyncio
+import functools
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional
+
+from hash_ring import HashRing
+
+# request_id of the message a worker sends once its agent is built.
+READY = "__ready__"
+
+
+# -----------------------------------------------
+# Agent factories (top level, so worker processes can import them)
+# -----------------------------------------------
+
+def build_react_agent(db_path: str, hedge: bool = False):
+    """The agent of Build_Agent.py: ChatGroq + cached Tavily search + SQLite memory.
+
+    With `hedge` slow Groq calls are hedged with gpt-4o-mini (hedged_router.py).
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    from langgraph.prebuilt import create_react_agent
+
+    from cached_search import cached_search
+    from model_provider import chat_groq
+    from sqlite_checkpointer import SqliteCheckpointSaver
+
+    search = cached_search(TavilySearchResults(max_results=2))
+    if hedge:
+        from hedged_router import default_router
+
+        model = default_router()
+    else:
+        model = chat_groq("llama-3.3-70b-versatile")
+    memory = SqliteCheckpointSaver(db_path, commit_every=1, timeout=30.0)
+    return create_react_agent(model, [search], checkpointer=memory)
+
+
+def build_fake_agent(db_path: str, model_latency: float = 0.0, tool_latency: float = 0.0):
+    """The same agent around FakeChatModel / FakeSearchTool, for benchmarks."""
+    from langgraph.prebuilt import create_react_agent
+
+    from fakes import FakeChatModel, FakeSearchTool
+    from sqlite_checkpointer import SqliteCheckpointSaver
+
+    memory = SqliteCheckpointSaver(db_path, commit_every=1, timeout=30.0)
+    return create_react_agent(
+        FakeChatModel(latency=model_latency), [FakeSearchTool(latency=tool_latency)], checkpointer=memory
+    )
+
+
+# -----------------------------------------------
+# Worker process
+# -----------------------------------------------
+
+def worker_main(worker_id: int, factory, requests, responses, concurrency: int) -> None:
+    """Serve (request_id, thread_id, inputs) from `requests` until None arrives."""
+    agent = factory()
+    responses.put((worker_id, READY, None, None))
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        inbox: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        def pump():
+            while True:
+                item = requests.get()
+                loop.call_soon_threadsafe(inbox.put_nowait, item)
+                if item is None:
+                    return
+
+        async def handle(request_id, thread_id, inputs):
+            async with semaphore:
+                try:
+                    output = await agent.ainvoke(inputs, {"configurable": {"thread_id": thread_id}})
+                    responses.put((worker_id, request_id, None, output))
+                except Exception as error:
+                    responses.put((worker_id, request_id, f"{type(error).__name__}: {error}", None))
+
+        threading.Thread(target=pump, daemon=True).start()
+        while (item := await inbox.get()) is not None:
+            task = asyncio.create_task(handle(*item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        # Drain: finish what this worker already accepted before exiting.
+        await asyncio.gather(*tasks)
+
+    asyncio.run(serve())
+    responses.put((worker_id, None, None, None))
+
+
+# -----------------------------------------------
+# Dispatcher
+# -----------------------------------------------
+
+class AgentDispatcher:
+    """Routes requests to worker processes by consistent hash of thread_id."""
+
+    def __init__(
+        self,
+        factory,
+        workers: int = os.cpu_count() or 1,
+        concurrency: int = 32,
+        poll_interval: float = 0.5,
+        max_startup_failures: int = 5,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.factory = factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_startup_failures = max_startup_failures
+        self.max_backoff = max_backoff
+        self.context = multiprocessing.get_context("spawn")
+        self.responses = self.context.Queue()
+        self.lock = threading.Lock()
+        self.ring = HashRing()
+        self.workers: dict = {}  # worker_id -> (process, request queue)
+        self.futures: dict = {}  # request_id -> (future, thread_id)
+        self.owners: dict = {}  # request_id -> worker_id it was sent to
+        # thread_id -> requests waiting for the one in flight
+        self.threads: dict = {}
+        self.worker_ids = itertools.count()
+        self.stopped: dict = {}  # worker_id -> Event set once it has drained
+        self.dead: set = set()  # worker_ids already reported as dead
+        self.ready: set = set()  # worker_ids whose agent was built
+        # Requests sent while no worker was in the ring, for the next one.
+        self.parked: deque = deque()
+        self.startup_failures = 0  # workers in a row that died while starting
+        self.failed: Optional[str] = None  # set once respawning gave up
+        self.closed = False
+        threading.Thread(target=self._collect, daemon=True).start()
+        threading.Thread(target=self._watch, daemon=True).start()
+        for _ in range(workers):
+            self.add_worker()
+
+    # -----------------------------------------------
+    # Membership
+    # -----------------------------------------------
+
+    def add_worker(self) -> int:
+        worker_id, process, requests = self._start_worker()
+        with self.lock:
+            self._register(worker_id, process, requests)
+        return worker_id
+
+    def _start_worker(self) -> tuple:
+        worker_id = next(self.worker_ids)
+        requests = self.context.Queue()
+        process = self.context.Process(
+            target=worker_main,
+            args=(worker_id, self.factory, requests, self.responses, self.concurrency),
+            daemon=True,
+        )
+        process.start()
+        return worker_id, process, requests
+
+    def _register(self, worker_id: int, process, requests) -> None:
+        self.workers[worker_id] = (process, requests)
+        self.stopped[worker_id] = threading.Event()
+        self.ring.add(worker_id)
+        parked, self.parked = self.parked, deque()
+        for request_id, thread_id, inputs in parked:
+            self._send(request_id, thread_id, inputs)
+
+    def remove_worker(self, worker_id: int, wait: bool = True) -> None:
+        """Take `worker_id` out of the ring; it finishes its requests, then exits."""
+        with self.lock:
+            if worker_id not in self.ring:
+                return
+            if len(self.ring) == 1:
+                raise ValueError("Cannot remove the last worker")
+            self.ring.remove(worker_id)
+            process, requests = self.workers[worker_id]
+            requests.put(None)
+        if wait:
+            self.stopped[worker_id].wait()
+            process.join()
+
+    def close(self) -> None:
+        self.closed = True
+        with self.lock:
+            worker_ids = list(self.ring.nodes)
+            for worker_id in worker_ids:
+                self.ring.remove(worker_id)
+                self.workers[worker_id][1].put(None)
+        for worker_id in worker_ids:
+            self.stopped[worker_id].wait()
+            self.workers[worker_id][0].join()
+
+    # -----------------------------------------------
+    # Requests
+    # -----------------------------------------------
+
+    def submit(self, inputs, thread_id: str) -> Future:
+        future = Future()
+        request_id = uuid.uuid4().hex
+        with self.lock:
+            if self.failed is not None and not self.ring:
+                raise RuntimeError(self.failed)
+            self.futures[request_id] = (future, thread_id)
+            if thread_id in self.threads:
+                self.threads[thread_id].append((request_id, inputs))
+            else:
+                self.threads[thread_id] = deque()
+                self._send(request_id, thread_id, inputs)
+        return future
+
+    def invoke(self, inputs, thread_id: str):
+        return self.submit(inputs, thread_id).result()
+
+    async def ainvoke(self, inputs, thread_id: str):
+        return await asyncio.wrap_future(self.submit(inputs, thread_id))
+
+    def _send(self, request_id: str, thread_id: str, inputs) -> None:
+        if not self.ring:
+            self.parked.append((request_id, thread_id, inputs))
+            return
+        worker_id = self.ring.get(thread_id)
+        self.owners[request_id] = worker_id
+        self.workers[worker_id][1].put((request_id, thread_id, inputs))
+
+    def _finish(self, request_id: str) -> Future:
+        """Forget a finished request and send its thread's next one (under the lock)."""
+        future, thread_id = self.futures.pop(request_id)
+        del self.owners[request_id]
+        waiting = self.threads[thread_id]
+        if waiting:
+            held_id, inputs = waiting.popleft()
+            self._send(held_id, thread_id, inputs)
+        else:
+            del self.threads[thread_id]
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            try:
+                worker_id, request_id, error, output = self.responses.get()
+            except (EOFError, OSError, queue.Empty):
+                return
+            if request_id == READY:
+                with self.lock:
+                    self.ready.add(worker_id)
+                    self.startup_failures = 0
+                continue
+            if request_id is None:
+                if error is None:
+                    self.stopped[worker_id].set()
+                else:
+                    self._worker_died(worker_id, error)
+                continue
+            with self.lock:
+                future = self._finish(request_id)
+            if error is None:
+                future.set_result(output)
+            else:
+                future.set_exception(RuntimeError(error))
+
+    # -----------------------------------------------
+    # Dead workers
+    # -----------------------------------------------
+
+    def _watch(self) -> None:
+        """Report workers that exited without draining."""
+        while not self.closed:
+            time.sleep(self.poll_interval)
+            with self.lock:
+                workers = list(self.workers.items())
+            for worker_id, (process, _) in workers:
+                # A drained worker exits with 0 after its last response.
+                if process.exitcode not in (None, 0) and worker_id not in self.dead:
+                    self.dead.add(worker_id)
+                    # Through the response queue, so the responses the worker
+                    # sent before dying are collected first.
+                    message = f"Worker {worker_id} exited with code {process.exitcode}"
+                    self.responses.put((worker_id, None, message, None))
+
+    def _worker_died(self, worker_id: int, error: str) -> None:
+        """Fail the worker's in-flight requests and replace it if it was in the ring."""
+        delay = 0.0
+        with self.lock:
+            respawn = worker_id in self.ring and not self.closed
+            if worker_id not in self.ready:
+                self.startup_failures += 1
+                if self.startup_failures >= self.max_startup_failures:
+                    self.failed = f"{error}; gave up after {self.startup_failures} workers failed to start"
+                    respawn = False
+                delay = min(self.max_backoff, 0.1 * 2 ** (self.startup_failures - 1))
+            self.ring.remove(worker_id)
+            lost = [request_id for request_id, owner in self.owners.items() if owner == worker_id]
+            failures = [(self._finish(request_id), error) for request_id in lost]
+            if self.failed is not None and not self.ring:
+                failures += [(future, self.failed) for future in self._drop_parked()]
+        for future, message in failures:
+            future.set_exception(RuntimeError(message))
+        self.stopped[worker_id].set()
+        if respawn:
+            timer = threading.Timer(delay, self._respawn)
+            timer.daemon = True
+            timer.start()
+
+    def _respawn(self) -> None:
+        if self.closed:
+            return
+        replacement = self._start_worker()
+        with self.lock:
+            self._register(*replacement)
+
+    def _drop_parked(self) -> list:
+        """Forget the parked requests and the turns queued behind them (under the lock)."""
+        futures = []
+        for request_id, thread_id, _ in self.parked:
+            futures.append(self.futures.pop(request_id)[0])
+            for held_id, _ in self.threads.pop(thread_id, ()):
+                futures.append(self.futures.pop(held_id)[0])
+        self.parked.clear()
+        return futures
+
+
+# -----------------------------------------------
+# Throughput benchmark
+# -----------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=100, help="distinct thread_ids")
+    parser.add_argument("--db", default="agent_workers.sqlite")
+    parser.add_argument("--fake", action="store_true", help="FakeChatModel instead of ChatGroq")
+    parser.add_argument("--hedge", action="store_true", help="hedge slow Groq calls with OpenAI")
+    parser.add_argument("--model-latency", type=float, default=0.0)
+    parser.add_argument("--tool-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.fake:
+        factory = functools.partial(build_fake_agent, args.db, args.model_latency, args.tool_latency)
+    else:
+        factory = functools.partial(build_react_agent, args.db, args.hedge)
+
+    from langchain_core.messages import HumanMessage
+
+    dispatcher = AgentDispatcher(factory, workers=args.workers)
+    # Warm up every worker before timing.
+    for thread_id in range(args.workers * 4):
+        dispatcher.invoke({"messages": [HumanMessage("Hi!")]}, f"warmup-{thread_id}")
+    started = time.perf_counter()
+    futures = [
+        dispatcher.submit(
+            {"messages": [HumanMessage(f"What is the weather in city {i}?")]}, f"thread-{i % args.threads}"
+        )
+        for i in range(args.requests)
+    ]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - started
+    print(f"{args.workers} workers: {args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    dispatcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# ************************************************
+# Async serving mode for the LangGraph Support ChatBot
+# ************************************************
+
+# One asyncio process serves many concurrent conversations. The chatbot
+# node awaits `ainvoke`, the graph is driven through `astream`, and a
+# semaphore caps how many LLM calls are in flight at once.
+#
+#   python async_chatbot_server.py --port 8765 --max-inflight 32 --tools
+#
+# Every TCP connection is one session (its own thread_id); every line
+# sent is a user message and every reply line is "Assistant: ...".
+#
+# LangChain / LangGraph are only imported once a graph is built, so the
+# module itself imports in a few milliseconds. The graph wiring lives in
+# graph_registry.py.
+
+import argparse
+import asyncio
+import uuid
+
+
+# -----------------------------------------------
+# The graph, with async nodes and a cap on in-flight LLM calls
+# -----------------------------------------------
+
+def build_async_graph(tools: bool = False, db: str | None = None, max_inflight: int = 32):
+    """The shared support chatbot graph for `astream` / `ainvoke`.
+
+    The chatbot node awaits `llm.ainvoke` behind a semaphore of
+    `max_inflight`; with `tools` a ToolNode runs the tool calls with
+    `ainvoke` behind `route_tools`. The graph comes from
+    `graph_registry.get_graph`, so it is built and compiled once per
+    process and shares the registry's llm, search tool and bound tools.
+    """
+    from graph_registry import GraphOptions, get_graph
+
+    checkpointer = f"sqlite:{db}" if db else "memory"
+    return get_graph(GraphOptions(tools=tools, checkpointer=checkpointer, max_inflight=max_inflight))
+
+
+# -----------------------------------------------
+# Let's stream the graph updates asynchronously
+# -----------------------------------------------
+
+async def astream_graph_updates(graph, user_input: str, thread_id: str):
+    """Yield the content of every message the graph produces for one turn."""
+    config = {"configurable": {"thread_id": thread_id}}
+    async for event in graph.astream(
+        {"messages": [{"role": "user", "content": user_input}]}, config
+    ):
+        for value in event.values():
+            yield value["messages"][-1].content
+
+
+# -----------------------------------------------
+# Let's serve many sessions from one process
+# -----------------------------------------------
+
+class ChatSessionServer:
+    """A line-based TCP server where each connection is one conversation."""
+
+    def __init__(self, graph, host: str = "127.0.0.1", port: int = 8765) -> None:
+        self.graph = graph
+        self.host = host
+        self.port = port
+        self.active_sessions = 0
+
+    async def handle_session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        thread_id = uuid.uuid4().hex
+        self.active_sessions += 1
+        try:
+            while line := await reader.readline():
+                user_input = line.decode().strip()
+                if not user_input:
+                    continue
+                if user_input.lower() in ["quit", "exit", "q"]:
+                    writer.write(b"Goodbye!\n")
+                    break
+                async for content in astream_graph_updates(self.graph, user_input, thread_id):
+                    writer.write(f"Assistant: {content}\n".encode())
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.active_sessions -= 1
+            writer.close()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_session, self.host, self.port)
+        print(f"Serving chat sessions on {self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-inflight", type=int, default=32)
+    parser.add_argument("--tools", action="store_true", help="enable Tavily search")
+    parser.add_argument("--db", help="SQLite file for durable checkpoints (default: in memory)")
+    parser.add_argument("--trace", help="append every turn to this JSONL file (see trace_replay.py)")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from model_provider import aprewarm
+
+    # With --tools every session shares the registry's search tool: one
+    # dispatcher, so concurrent searches share a capped set of connections
+    # instead of bursting into 429s.
+    graph = build_async_graph(args.tools, args.db, args.max_inflight)
+    if args.trace:
+        from trace_replay import TraceRecorder, record
+
+        graph = record(graph, TraceRecorder(args.trace, graph_name="tools" if args.tools else "basic"))
+
+    async def run():
+        await aprewarm()
+        await ChatSessionServer(graph, args.host, args.port).serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 from langchain_openai import ChatOpenAI
-from langchain import hub
 from langchain.agents import create_react_agent, AgentExecutor, tool
 from datetime import datetime
 
+# The ReAct prompt is vendored under prompts/ instead of pulled from the
+# hub on every start; refresh it with `python prompt_registry.py pull hwchase17/react`
+from prompt_registry import load_prompt
+
 # -----------------------------------------------
 # Loading the Environment Variables
 
@@ -33,7 +36,7 @@ llm = ChatOpenAI(model="gpt-4o-mini")
 # query = "What is the current date and time?"
 query = "What is the current time in Auckland considering you are in India? Just show the time not date."
 
-prompt_template = hub.pull("hwchase17/react")
+prompt_template = load_prompt("hwchase17/react")
 
 # -----------------------------------------------
 # Tools and Agent Execution
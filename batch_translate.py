@@ -0,0 +1,193 @@
+# ************************************************
+# Batch translation job over JSONL / CSV files
+# ************************************************
+
+# Runs the `prompt_template | model | parser` chain from SimpleLLM.py over
+# a whole file of {"id", "language", "text"} records:
+#
+#   python batch_translate.py catalogue.jsonl translations.jsonl --concurrency 16 --rpm 500
+#
+# Records are streamed from the input, translated with bounded concurrency
+# and a requests-per-minute budget, and appended to the output as they
+# complete. The output file doubles as the progress checkpoint: when the
+# job is restarted, ids already in the output are skipped. Failed records
+# go to <output>.errors.jsonl and are retried on the next run.
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from typing import Iterator, Optional
+
+
+# -----------------------------------------------
+# Reading records
+# -----------------------------------------------
+
+def read_records(path: str, default_language: Optional[str] = None) -> Iterator[dict]:
+    """Yield records from a JSONL or CSV file, one at a time."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for index, row in enumerate(rows):
+            row.setdefault("id", str(index))
+            row["id"] = str(row["id"])
+            if default_language and not row.get("language"):
+                row["language"] = default_language
+            yield row
+
+
+def completed_ids(path: str) -> set:
+    """Ids already present in the output file of a previous run."""
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(str(json.loads(line)["id"]))
+                except (ValueError, KeyError):
+                    # A line cut short by a crash; that record is redone.
+                    continue
+            if f.tell() and not line.endswith("\n"):
+                # Make sure new results do not get glued onto that line.
+                with open(path, "a", encoding="utf-8") as output:
+                    output.write("\n")
+    return done
+
+
+# -----------------------------------------------
+# Requests-per-minute budget
+# -----------------------------------------------
+
+class RateLimiter:
+    """Token bucket allowing `rpm` requests per minute with bursts up to `burst`."""
+
+    def __init__(self, rpm: float, burst: Optional[int] = None) -> None:
+        self.rate = rpm / 60.0
+        self.capacity = burst or max(1, int(self.rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# -----------------------------------------------
+# The translation chain
+# -----------------------------------------------
+
+def build_chain(model=None):
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    if model is None:
+        from model_provider import chat_openai
+
+        model = chat_openai("gpt-4o-mini")
+
+    system_template = "Translate the following into {language}:"
+    prompt_template = ChatPromptTemplate.from_messages(
+        [("system", system_template), ("user", "{text}")]
+    )
+    return prompt_template | model | StrOutputParser()
+
+
+# -----------------------------------------------
+# The batch job
+# -----------------------------------------------
+
+async def translate_file(
+    chain,
+    input_path: str,
+    output_path: str,
+    concurrency: int = 16,
+    rpm: Optional[float] = None,
+    default_language: Optional[str] = None,
+) -> dict:
+    """Translate every record of `input_path` not yet in `output_path`."""
+    done = completed_ids(output_path)
+    limiter = RateLimiter(rpm) if rpm else None
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    stats = {"skipped": 0, "translated": 0, "failed": 0}
+    started = time.monotonic()
+
+    with open(output_path, "a", encoding="utf-8") as output, open(
+        output_path + ".errors.jsonl", "a", encoding="utf-8"
+    ) as errors:
+
+        async def worker():
+            while (record := await queue.get()) is not None:
+                if limiter:
+                    await limiter.acquire()
+                try:
+                    translation = await chain.ainvoke(
+                        {"language": record["language"], "text": record["text"]}
+                    )
+                except Exception as error:
+                    stats["failed"] += 1
+                    errors.write(json.dumps({"id": record["id"], "error": repr(error)}) + "\n")
+                    errors.flush()
+                    continue
+                stats["translated"] += 1
+                output.write(json.dumps({**record, "translation": translation}, ensure_ascii=False) + "\n")
+                output.flush()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for record in read_records(input_path, default_language):
+            if record["id"] in done:
+                stats["skipped"] += 1
+                continue
+            await queue.put(record)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    stats["seconds"] = round(time.monotonic() - started, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="JSONL or CSV file with id, language and text")
+    parser.add_argument("output", help="JSONL file the translations are appended to")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rpm", type=float, default=None, help="requests-per-minute budget")
+    parser.add_argument("--language", default=None, help="language for records without one")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from model_provider import PoolConfig, chat_openai
+
+    # One keep-alive connection per concurrent request.
+    pool = PoolConfig(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    stats = asyncio.run(
+        translate_file(
+            build_chain(chat_openai("gpt-4o-mini", pool=pool)),
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            rpm=args.rpm,
+            default_language=args.language,
+        )
+    )
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# ************************************************
+# Micro-batched Tavily search across concurrent sessions
+# ************************************************
+
+# Under load many threads reach their `tools` node within the same few
+# milliseconds, and each TavilySearchResults call opens its own request.
+# The provider then rejects the burst with 429s. SearchDispatcher sits
+# between all sessions of a process and the search API:
+#
+#   dispatcher = SearchDispatcher(window=0.005, max_connections=4, rps=10)
+#   search = cached_search(BatchedSearchTool(dispatcher=dispatcher))
+#
+# - queries are collected for `window` seconds (or `max_batch` queries);
+# - identical queries (after normalize_query) become one upstream request,
+#   also when the same query is already in flight;
+# - a batch is sent over at most `max_connections` keep-alive connections,
+#   paced by an optional `rps` budget, and retried on 429 (honouring
+#   Retry-After);
+# - each result is fanned back out to every caller waiting on it.
+#
+# Tavily has no multi-query endpoint, so a batch goes out as its distinct
+# queries over the capped pool. Set TAVILY_API_BASE (or `base_url`) to
+# point the dispatcher at a local stand-in:
+#
+#   python benchmark_batched_search.py --sessions 64 --capacity 4
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Literal, Optional, Union
+
+import httpx
+from langchain_core.tools import BaseTool, ToolException
+from pydantic import BaseModel, Field
+
+from cached_search import normalize_query
+
+TAVILY_API_BASE = "https://api.tavily.com"
+
+_CLOSE = object()
+
+
+class SearchDispatcher:
+    """Collects search queries from all sessions and sends them over a capped pool."""
+
+    def __init__(
+        self,
+        max_results: int = 2,
+        window: float = 0.005,
+        max_batch: int = 32,
+        max_connections: int = 4,
+        rps: Optional[float] = None,
+        retries: int = 3,
+        backoff: float = 0.5,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+    ) -> None:
+        self.max_results = max_results
+        self.window = window
+        self.max_batch = max_batch
+        self.rps = rps
+        self.retries = retries
+        self.backoff = backoff
+        self.base_url = (base_url or os.getenv("TAVILY_API_BASE") or TAVILY_API_BASE).rstrip("/")
+        self.api_key = api_key or os.getenv("TAVILY_API_KEY", "")
+        self.client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="search")
+        self.queue: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.inflight: dict[str, list[Future]] = {}
+        self.next_slot = time.monotonic()
+        self.stats = {"queries": 0, "upstream": 0, "deduped": 0, "batches": 0, "rate_limited": 0, "errors": 0}
+        self.closed = False
+        self.thread = threading.Thread(target=self._collect, name="search-batcher", daemon=True)
+        self.thread.start()
+
+    # -----------------------------------------------
+    # Callers
+    # -----------------------------------------------
+
+    def submit(self, query: str) -> Future:
+        """A Future with the cleaned results of `query`."""
+        future: Future = Future()
+        key = normalize_query(query)
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("SearchDispatcher is closed")
+            self.stats["queries"] += 1
+            waiting = self.inflight.get(key)
+            if waiting is not None:
+                self.stats["deduped"] += 1
+                waiting.append(future)
+                return future
+            self.inflight[key] = [future]
+        self.queue.put((key, query))
+        return future
+
+    def search(self, query: str) -> list:
+        return self.submit(query).result()
+
+    async def asearch(self, query: str) -> list:
+        return await asyncio.wrap_future(self.submit(query))
+
+    def close(self) -> None:
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.queue.put(_CLOSE)
+        self.thread.join()
+        self.executor.shutdown(wait=True)
+        self.client.close()
+
+    # -----------------------------------------------
+    # Batching
+    # -----------------------------------------------
+
+    def _collect(self) -> None:
+        """Group queued queries into windows and hand each batch to the pool."""
+        while True:
+            item = self.queue.get()
+            if item is _CLOSE:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _CLOSE:
+                    self._dispatch(batch)
+                    return
+                batch.append(item)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list) -> None:
+        with self.lock:
+            self.stats["batches"] += 1
+        for key, query in batch:
+            self.executor.submit(self._fetch, key, query)
+
+    def _fetch(self, key: str, query: str) -> None:
+        try:
+            result, error = self._request(query), None
+        except BaseException as exc:
+            result, error = None, exc
+        with self.lock:
+            futures = self.inflight.pop(key, [])
+            if error is not None:
+                self.stats["errors"] += 1
+        for future in futures:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    # -----------------------------------------------
+    # Upstream requests
+    # -----------------------------------------------
+
+    def _throttle(self) -> None:
+        """Space requests 1/rps apart across all connections."""
+        if not self.rps:
+            return
+        with self.lock:
+            slot = max(self.next_slot, time.monotonic())
+            self.next_slot = slot + 1 / self.rps
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _request(self, query: str) -> list:
+        payload = {"api_key": self.api_key, "query": query, "max_results": self.max_results}
+        for attempt in range(self.retries + 1):
+            self._throttle()
+            with self.lock:
+                self.stats["upstream"] += 1
+            response = self.client.post(f"{self.base_url}/search", json=payload)
+            if response.status_code == 429 and attempt < self.retries:
+                with self.lock:
+                    self.stats["rate_limited"] += 1
+                retry_after = response.headers.get("Retry-After")
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = self.backoff * 2 ** attempt
+                time.sleep(delay)
+                continue
+            response.raise_for_status()
+            return [
+                {"title": hit.get("title"), "url": hit["url"], "content": hit["content"], "score": hit.get("score")}
+                for hit in response.json()["results"]
+            ]
+
+
+# -----------------------------------------------
+# Tool
+# -----------------------------------------------
+
+class SearchInput(BaseModel):
+    query: str = Field(description="search query to look up")
+
+
+class BatchedSearchTool(BaseTool):
+    """TavilySearchResults, with its requests sent through a shared SearchDispatcher."""
+
+    name: str = "tavily_search_results_json"
+    description: str = (
+        "A search engine optimized for comprehensive, accurate, and trusted results. "
+        "Useful for when you need to answer questions about current events. "
+        "Input should be a search query."
+    )
+    args_schema: type[BaseModel] = SearchInput
+    response_format: Literal["content_and_artifact"] = "content_and_artifact"
+
+    dispatcher: Any
+    # Failed requests raise ToolException, which comes back as the tool
+    # output (an error ToolMessage for tool calls) like TavilySearchResults;
+    # with False it propagates to the caller instead.
+    handle_tool_error: Optional[Union[bool, str, Callable[[ToolException], str]]] = True
+
+    def _run(self, query: str, run_manager=None) -> tuple:
+        try:
+            results = self.dispatcher.search(query)
+        except Exception as error:
+            raise ToolException(repr(error)) from error
+        return results, {"query": query, "results": results}
+
+    async def _arun(self, query: str, run_manager=None) -> tuple:
+        try:
+            results = await self.dispatcher.asearch(query)
+        except Exception as error:
+            raise ToolException(repr(error)) from error
+        return results, {"query": query, "results": results}
+
+
+def batched_search(max_results: int = 2, **kwargs) -> BatchedSearchTool:
+    """A BatchedSearchTool with its own SearchDispatcher; share it across sessions."""
+    return BatchedSearchTool(dispatcher=SearchDispatcher(max_results=max_results, **kwargs))
@@ -0,0 +1,160 @@
+# ************************************************
+# Benchmark: per-session Tavily calls vs the batched search dispatcher
+# ************************************************
+
+# Starts a local stand-in for the Tavily API (POST /search) that answers
+# after `--latency-ms` and rejects requests beyond `--capacity` concurrent
+# ones with 429, as a rate-limited provider does. Then `--sessions`
+# threads each run `--searches` searches, drawn from `--distinct` queries
+# so popular ones repeat:
+#
+#   per session   TavilySearchResults(max_results=2), one request per call
+#   dispatcher    BatchedSearchTool over one SearchDispatcher
+#
+# and reports wall time, successful searches per second, upstream
+# requests and 429 rejections.
+#
+#   python benchmark_batched_search.py --sessions 64 --capacity 4
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batched_search import batched_search
+
+
+# -----------------------------------------------
+# Stand-in search server
+# -----------------------------------------------
+
+class SearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, body: dict, headers: dict | None = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            admitted = server.active < server.capacity
+            if admitted:
+                server.active += 1
+            else:
+                server.rejected += 1
+        if not admitted:
+            self._send(429, {"detail": "rate limit exceeded"}, {"Retry-After": str(server.retry_after)})
+            return
+        try:
+            time.sleep(server.latency_seconds)
+            results = [
+                {
+                    "title": f"Result {n} for {body['query']}",
+                    "url": f"https://example.com/{n}",
+                    "content": f"Stand-in content {n} about {body['query']}.",
+                    "score": 1.0 - n / 10,
+                }
+                for n in range(body.get("max_results", 5))
+            ]
+            self._send(200, {"query": body["query"], "results": results})
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_search_server(capacity: int, latency_ms: float, retry_after: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SearchHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.capacity = capacity
+    server.active = 0
+    server.requests = 0
+    server.rejected = 0
+    server.latency_seconds = latency_ms / 1000
+    server.retry_after = retry_after
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# -----------------------------------------------
+# Scenarios
+# -----------------------------------------------
+
+def run_sessions(tool, queries: list, sessions: int) -> tuple[float, int]:
+    """Runs `queries` from `sessions` threads; returns (seconds, successful searches)."""
+
+    def call(query: str) -> bool:
+        return isinstance(tool.invoke({"query": query}), list)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        ok = sum(executor.map(call, queries))
+    return time.perf_counter() - started, ok
+
+
+def report(name: str, seconds: float, ok: int, total: int, server: ThreadingHTTPServer):
+    print(
+        f"{name:<12} {seconds:>8.2f} {ok:>6}/{total:<6} {ok / seconds:>10.1f} "
+        f"{server.requests:>10} {server.rejected:>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=64, help="concurrent conversations")
+    parser.add_argument("--searches", type=int, default=4, help="searches per session")
+    parser.add_argument("--distinct", type=int, default=40, help="distinct queries in the mix")
+    parser.add_argument("--capacity", type=int, default=4, help="concurrent requests the provider accepts")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After sent with a 429")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    from langchain_community.utilities import tavily_search
+
+    rng = random.Random(0)
+    pool = [f"weather in city {n}" for n in range(args.distinct)]
+    queries = [rng.choice(pool) for _ in range(args.sessions * args.searches)]
+    print(f"{'':<12} {'seconds':>8} {'ok/total':>13} {'searches/s':>10} {'upstream':>10} {'429s':>8}")
+
+    server = start_search_server(args.capacity, args.latency_ms, args.retry_after)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    tavily_search.TAVILY_API_URL = base_url
+    naive = TavilySearchResults(max_results=2, tavily_api_key="stand-in")
+    seconds, ok = run_sessions(naive, queries, args.sessions)
+    report("per session", seconds, ok, len(queries), server)
+
+    server.requests = server.rejected = 0
+    tool = batched_search(
+        max_results=2,
+        window=args.window_ms / 1000,
+        max_connections=args.capacity,
+        base_url=base_url,
+        api_key="stand-in",
+    )
+    seconds, ok = run_sessions(tool, queries, args.sessions)
+    report("dispatcher", seconds, ok, len(queries), server)
+    print(tool.dispatcher.stats)
+    tool.dispatcher.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# ************************************************
+# Offline benchmark suite for the graphs in this repo
+# ************************************************
+
+# Builds every graph of the repo around FakeChatModel and FakeSearchTool
+# (both with configurable latency) and reports
+#   - per-turn latency percentiles,
+#   - throughput at several concurrency levels,
+#   - memory growth per conversation thread.
+#
+# With the default zero latencies the numbers are pure orchestration
+# overhead (graph execution, checkpointing, tool routing), which is what
+# we want to catch regressions in.
+#
+#   python benchmark_graphs.py --concurrency 1,8,32 --turns 4
+#   python benchmark_graphs.py --graphs react_agent --model-latency 0.2 --json bench.json
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+import uuid
+from typing import Annotated, Sequence
+
+from typing_extensions import TypedDict
+
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import create_react_agent
+from langgraph.types import Command
+
+from fakes import FakeChatModel, FakeSearchTool
+from graph_registry import build_support_graph, human_assistance
+from incremental_trimmer import IncrementalTrimmer
+from instrumentation import GraphMetrics, attach
+
+
+class HistoryState(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+    language: str
+
+
+# -----------------------------------------------
+# The graphs, wired the same way as the scripts
+# (the support bots come from graph_registry)
+# -----------------------------------------------
+
+def build_basic(model, search):
+    """support_basic_chatbot_langgraph.py"""
+    return build_support_graph(model)
+
+
+def build_tools(model, search):
+    """support_chatbot_langgraph_with_tools.py"""
+    return build_support_graph(model, [search], tool_node="basic")
+
+
+def build_tools_speculative(model, search):
+    """support_chatbot_langgraph_with_tools.py, tools dispatched while streaming"""
+    return build_support_graph(model, [search], tool_node="speculative")
+
+
+def build_memory(model, search):
+    """support_chatbot_langgraph_with_memory.py"""
+    return build_support_graph(model, [search], checkpointer=MemorySaver())
+
+
+def build_human_in_loop(model, search):
+    """support_chatbot_langgraph_with_human_in_loop.py"""
+    return build_support_graph(
+        model, [search, human_assistance], checkpointer=MemorySaver(), single_tool_call=True
+    )
+
+
+def build_trimmed_history(model, search):
+    """Simple_Chatbot_ChatHistory_Streaming.py"""
+    prompt_template = ChatPromptTemplate.from_messages(
+        [("system", "You are a helpful assistant."), MessagesPlaceholder(variable_name="messages")]
+    )
+    trimmer = IncrementalTrimmer(max_tokens=65, token_counter=model)
+
+    def call_model(state: HistoryState):
+        trimmed_messages = trimmer.invoke(state["messages"])
+        prompt = prompt_template.invoke({"messages": trimmed_messages, "language": state["language"]})
+        return {"messages": [model.invoke(prompt)]}
+
+    graph_builder = StateGraph(state_schema=HistoryState)
+    graph_builder.add_edge(START, "model")
+    graph_builder.add_node("model", call_model)
+    return graph_builder.compile(checkpointer=MemorySaver())
+
+
+def build_react_agent(model, search):
+    """Build_Agent.py"""
+    return create_react_agent(model, [search], checkpointer=MemorySaver())
+
+
+GRAPHS = {
+    "basic": build_basic,
+    "tools": build_tools,
+    "tools_speculative": build_tools_speculative,
+    "memory": build_memory,
+    "human_in_loop": build_human_in_loop,
+    "trimmed_history": build_trimmed_history,
+    "react_agent": build_react_agent,
+}
+
+USER_TURNS = [
+    "Hi! My name is Sushant.",
+    "What's the weather in Pune?",
+    "I need some expert guidance for building an AI agent. Could you request assistance for me?",
+    "Remember my name?",
+]
+
+
+# -----------------------------------------------
+# Running conversations
+# -----------------------------------------------
+
+async def run_turn(name: str, graph, thread_id: str, text: str) -> float:
+    config = {"configurable": {"thread_id": thread_id}}
+    inputs = {"messages": [HumanMessage(content=text)]}
+    if name == "trimmed_history":
+        inputs["language"] = "English"
+    started = time.perf_counter()
+    await graph.ainvoke(inputs, config)
+    if name == "human_in_loop" and (await graph.aget_state(config)).next:
+        await graph.ainvoke(Command(resume={"data": "We, the experts are here to help!"}), config)
+    return time.perf_counter() - started
+
+
+async def run_conversations(name: str, graph, conversations: int, turns: int) -> tuple[list, float]:
+    """Run `conversations` threads concurrently; return turn latencies and wall time."""
+    latencies = []
+
+    async def conversation():
+        thread_id = uuid.uuid4().hex
+        for turn in range(turns):
+            latencies.append(await run_turn(name, graph, thread_id, USER_TURNS[turn % len(USER_TURNS)]))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation() for _ in range(conversations)))
+    return latencies, time.perf_counter() - started
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def benchmark_graph(name: str, args) -> dict:
+    model = FakeChatModel(latency=args.model_latency)
+    search = FakeSearchTool(latency=args.tool_latency)
+    graph = GRAPHS[name](model, search)
+    if args.metrics:
+        metrics = GraphMetrics()
+        graph = attach(graph, metrics)
+    await run_conversations(name, graph, 1, len(USER_TURNS))  # warm-up
+
+    report = {"graph": name, "levels": []}
+    for concurrency in args.concurrency:
+        latencies, wall = await run_conversations(name, graph, concurrency, args.turns)
+        report["levels"].append(
+            {
+                "concurrency": concurrency,
+                "turns": len(latencies),
+                "turns_per_s": len(latencies) / wall,
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "mean_ms": statistics.fmean(latencies) * 1000,
+            }
+        )
+
+    # Fresh graph (and checkpointer) so only the measured threads are counted.
+    graph = GRAPHS[name](model, search)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await run_conversations(name, graph, args.memory_threads, args.turns)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    report["bytes_per_thread"] = (after - before) / args.memory_threads
+    if args.metrics:
+        report["metrics"] = json.loads(metrics.to_json())
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{report['graph']}  (memory growth: {report['bytes_per_thread'] / 1024:.1f} KiB/thread)")
+    print(f"  {'conc':>5} {'turns':>6} {'turns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for level in report["levels"]:
+        print(
+            f"  {level['concurrency']:>5} {level['turns']:>6} {level['turns_per_s']:>9.1f} "
+            f"{level['p50_ms']:>8.2f} {level['p95_ms']:>8.2f} {level['p99_ms']:>8.2f}"
+        )
+    for histogram in report.get("metrics", {}).get("histograms", []):
+        label = ",".join(f"{k}={v}" for k, v in histogram["labels"].items())
+        print(
+            f"  {histogram['name']}{{{label}}}: count={histogram['count']} "
+            f"p50={histogram['p50'] * 1000:.2f}ms p95={histogram['p95'] * 1000:.2f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--graphs", default=",".join(GRAPHS), help="comma-separated graph names")
+    parser.add_argument("--model-latency", type=float, default=0.0)
+    parser.add_argument("--tool-latency", type=float, default=0.0)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--turns", type=int, default=4, help="turns per conversation")
+    parser.add_argument("--memory-threads", type=int, default=100)
+    parser.add_argument("--json", help="also write the reports to this file")
+    parser.add_argument("--metrics", action="store_true", help="add per-node timings to the reports")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+
+    reports = []
+    for name in args.graphs.split(","):
+        report = asyncio.run(benchmark_graph(name, args))
+        print_report(report)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# ************************************************
+# Benchmark: per-model HTTP clients vs a shared, pre-warmed pool
+# ************************************************
+
+# Starts a local OpenAI-compatible stub (POST /v1/chat/completions) that
+# sleeps `--handshake-ms` on every new connection to stand in for the
+# TCP + TLS handshake, then sends bursts of chat completions from
+# `--workers` threads:
+#
+#   own clients   every worker builds ChatOpenAI with its own httpx client
+#   shared pool   every worker gets chat_openai() after prewarm()
+#
+# and reports first-request latency, p50/p95 and connections opened.
+#
+#   python benchmark_http_pool.py --workers 16 --bursts 5 --handshake-ms 50
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+import model_provider
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {"index": 0, "message": {"role": "assistant", "content": "Hello from the stub!"}, "finish_reason": "stop"}
+    ],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 4, "total_tokens": 9},
+}
+
+
+# -----------------------------------------------
+# OpenAI-compatible stub server
+# -----------------------------------------------
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake_seconds)
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency_seconds)
+        if self.path.endswith("/chat/completions"):
+            self._send(200, COMPLETION)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_GET(self):
+        self._send(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(handshake_ms: float, latency_ms: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.handshake_seconds = handshake_ms / 1000
+    server.latency_seconds = latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# -----------------------------------------------
+# Scenarios
+# -----------------------------------------------
+
+def run_bursts(make_model, workers: int, bursts: int, pause: float) -> tuple[list, list]:
+    """Each worker sends one request per burst; returns (first, all) latencies in ms."""
+    models = [make_model() for _ in range(workers)]
+    first, latencies = [], []
+
+    def call(index: int, burst: int):
+        started = time.perf_counter()
+        models[index].invoke("Hi!")
+        elapsed = (time.perf_counter() - started) * 1000
+        latencies.append(elapsed)
+        if burst == 0:
+            first.append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for burst in range(bursts):
+            list(executor.map(call, range(workers), [burst] * workers))
+            time.sleep(pause)
+    return first, latencies
+
+
+def report(name: str, first: list, latencies: list, connections: int):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"{name:<14} {statistics.mean(first):>10.1f} {statistics.median(latencies):>8.1f} "
+        f"{p95:>8.1f} {connections:>12}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--pause", type=float, default=0.2, help="seconds between bursts")
+    parser.add_argument("--handshake-ms", type=float, default=50.0, help="simulated TCP+TLS setup per connection")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub response time")
+    args = parser.parse_args()
+
+    from langchain_openai import ChatOpenAI
+
+    server = start_stub(args.handshake_ms, args.latency_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    print(f"{'':<14} {'first ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'connections':>12}")
+
+    def own_client():
+        return ChatOpenAI(model="gpt-4o-mini", base_url=base_url, api_key="stub", http_client=httpx.Client())
+
+    first, latencies = run_bursts(own_client, args.workers, args.bursts, args.pause)
+    report("own clients", first, latencies, server.connections)
+
+    server.connections = 0
+    pool = model_provider.PoolConfig(max_keepalive_connections=args.workers)
+    model_provider.prewarm([base_url], connections=args.workers, pool=pool)
+
+    def shared_pool():
+        return model_provider.chat_openai("gpt-4o-mini", pool=pool, base_url=base_url, api_key="stub")
+
+    first, latencies = run_bursts(shared_pool, args.workers, args.bursts, args.pause)
+    report("shared pool", first, latencies, server.connections)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# ************************************************
+# Benchmark: module import time (cold start budget)
+# ************************************************
+
+# Imports each module in a fresh interpreter with `python -X importtime`
+# and reports its cumulative import time plus the slowest imports it
+# pulls in. Exits with status 1 when a module is over the budget, so it
+# can guard worker cold start in CI.
+#
+#   python benchmark_import_time.py --budget-ms 2000
+#   python benchmark_import_time.py langchain_openai langgraph.graph --top 5
+
+import argparse
+import subprocess
+import sys
+
+MODULES = [
+    "langchain_core.messages",
+    "langgraph.graph",
+    "langgraph.prebuilt",
+    "langchain_openai",
+    "langchain_groq",
+    "langchain_community.tools.tavily_search",
+    "IPython.display",
+    "startup",
+    "tool_node",
+    "cached_search",
+    "batched_search",
+    "prompt_registry",
+    "sqlite_checkpointer",
+    "incremental_trimmer",
+    "response_cache",
+    "instrumentation",
+    "async_chatbot_server",
+]
+
+
+def import_times(code: str) -> list[tuple[int, int, str, bool]]:
+    """Return (self_us, cumulative_us, name, top_level) for every import `code` triggers."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two extra spaces per level.
+        rows.append((int(self_us), int(cumulative_us), name.strip(), not name.startswith("  ")))
+    return rows
+
+
+def module_import_ms(module: str, baseline: set) -> tuple[float, list]:
+    """Wall time of `import module`, leaving out what the interpreter imports anyway."""
+    rows = [row for row in import_times(f"import {module}") if row[2] not in baseline]
+    total_ms = sum(cumulative for _, cumulative, _, top_level in rows if top_level) / 1000
+    return total_ms, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--budget-ms", type=float, default=2000.0)
+    parser.add_argument("--top", type=int, default=3, help="slowest imports to list per module")
+    args = parser.parse_args()
+
+    baseline = {name for _, _, name, _ in import_times("pass")}
+    over_budget = []
+    print(f"{'module':<42} {'import ms':>10}")
+    for module in args.modules:
+        try:
+            total_ms, rows = module_import_ms(module, baseline)
+        except RuntimeError as error:
+            print(f"{module:<42} {'error':>10}  {error}")
+            continue
+        flag = "  OVER BUDGET" if total_ms > args.budget_ms else ""
+        print(f"{module:<42} {total_ms:>10.1f}{flag}")
+        for self_us, _, name, _ in sorted(rows, reverse=True)[: args.top]:
+            print(f"    {name:<38} {self_us / 1000:>10.1f} (self)")
+        if flag:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"\nOver the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# ************************************************
+# Benchmark: sequential vs concurrent BasicToolNode
+# ************************************************
+
+# Runs a turn with several tool calls against a fake search tool
+# with a fixed delay and compares the wall time of both modes.
+#
+#   python benchmark_tool_node.py --calls 3 --delay 0.5
+
+import argparse
+import time
+
+from langchain_core.messages import AIMessage
+
+from fakes import FakeSearchTool
+from tool_node import BasicToolNode
+
+
+def make_turn(calls: int) -> dict:
+    tool_calls = [
+        {"name": "tavily_search_results_json", "args": {"query": f"weather in city {i}"}, "id": f"call_{i}"}
+        for i in range(calls)
+    ]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+def time_node(node: BasicToolNode, turn: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = node(turn)
+        best = min(best, time.perf_counter() - started)
+    ids = [message.tool_call_id for message in result["messages"]]
+    assert ids == [call["id"] for call in turn["messages"][-1].tool_calls], "order changed"
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    search = FakeSearchTool(latency=args.delay)
+    turn = make_turn(args.calls)
+
+    sequential = time_node(BasicToolNode(tools=[search]), turn, args.repeat)
+    concurrent = time_node(
+        BasicToolNode(tools=[search], max_workers=args.workers, timeout=args.delay * 4),
+        turn,
+        args.repeat,
+    )
+
+    print(f"tool calls per turn : {args.calls} x {args.delay:.3f}s")
+    print(f"sequential          : {sequential:.3f}s")
+    print(f"concurrent          : {concurrent:.3f}s")
+    print(f"speedup             : {sequential / concurrent:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# ************************************************
+# TTL cache and request coalescing for search tools
+# ************************************************
+
+# Wraps TavilySearchResults (or any single-query search tool) so that
+#   - results are cached under a normalized query key,
+#   - each query class gets its own TTL (weather/news go stale quickly),
+#   - identical concurrent queries share one in-flight request.
+#
+# Tavily tools report a failed request as a string (e.g. "ConnectError(...)")
+# instead of raising; such results are returned but never cached, so one
+# transient outage does not answer that query with an error for a whole TTL.
+#
+#   search = cached_search(TavilySearchResults(max_results=2))
+#
+# The wrapper keeps the wrapped tool's name and args schema, so ToolNode,
+# BasicToolNode and bind_tools use it transparently.
+
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Optional
+
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+# (pattern, ttl in seconds); the first matching pattern wins.
+DEFAULT_TTL_RULES = [
+    (r"\b(weather|temperature|forecast|rain)\b", 10 * 60),
+    (r"\b(news|today|latest|live|score|stock|price)\b", 5 * 60),
+]
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?!.").strip().lower()
+
+
+class _Flight:
+    """One in-flight upstream request that other callers can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class _LeaderCancelled(Exception):
+    """The async caller running a query was cancelled; its waiters search again."""
+
+
+class CachedSearchTool(BaseTool):
+    """A search tool that caches and coalesces the calls of the tool it wraps."""
+
+    tool: BaseTool
+    default_ttl: float = 60 * 60
+    ttl_rules: list = DEFAULT_TTL_RULES
+    maxsize: int = 10_000
+
+    _cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _flights: dict = PrivateAttr(default_factory=dict)
+    _async_flights: dict = PrivateAttr(default_factory=dict)
+    _stats: dict = PrivateAttr(default_factory=lambda: {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0})
+
+    def ttl_for(self, key: str) -> float:
+        for pattern, ttl in self.ttl_rules:
+            if re.search(pattern, key):
+                return ttl
+        return self.default_ttl
+
+    @property
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+    # -----------------------------------------------
+    # Cache
+    # -----------------------------------------------
+
+    def _cached(self, key: str):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if time.monotonic() > expires_at:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, result) -> None:
+        # Search results are a list (or a dict); a string is an error message.
+        if not isinstance(result, (list, dict)):
+            self._stats["errors"] += 1
+            return
+        self._cache[key] = (time.monotonic() + self.ttl_for(key), result)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    # -----------------------------------------------
+    # Single-flight sync and async calls
+    # -----------------------------------------------
+
+    def _run(self, query: str, run_manager=None, **kwargs) -> Any:
+        key = normalize_query(query)
+        with self._lock:
+            if (entry := self._cached(key)) is not None:
+                self._stats["hits"] += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self.tool.invoke({"query": query})
+            with self._lock:
+                self._store(key, flight.result)
+            return flight.result
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    # Async flights are concurrent.futures.Futures, so callers on other
+    # event loops (the tool is shared across loops) can wait on them too.
+
+    async def _arun(self, query: str, run_manager=None, **kwargs) -> Any:
+        key = normalize_query(query)
+        with self._lock:
+            if (entry := self._cached(key)) is not None:
+                self._stats["hits"] += 1
+                return entry[1]
+            future = self._async_flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._async_flights[key] = Future()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            try:
+                # shield: a cancelled waiter must not cancel the shared flight.
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderCancelled:
+                return await self._arun(query, run_manager, **kwargs)
+
+        try:
+            result = await self.tool.ainvoke({"query": query})
+        except asyncio.CancelledError:
+            # E.g. the SSE client of the leader disconnected: the other
+            # callers still want the result, so one of them takes over.
+            self._land(key, future, error=_LeaderCancelled())
+            raise
+        except Exception as error:
+            self._land(key, future, error=error)
+            raise
+        self._land(key, future, result=result)
+        return result
+
+    def _land(self, key: str, future: Future, result=None, error: Optional[BaseException] = None) -> None:
+        """End an async flight; it leaves the table before waiters wake up."""
+        with self._lock:
+            if error is None:
+                self._store(key, result)
+            self._async_flights.pop(key, None)
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+
+def cached_search(tool: BaseTool, **kwargs) -> CachedSearchTool:
+    """Wrap `tool` in a CachedSearchTool that looks the same to the LLM."""
+    return CachedSearchTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        tool=tool,
+        **kwargs,
+    )
@@ -0,0 +1,143 @@
+# ************************************************
+# Precompiled chat prompt templates
+# ************************************************
+
+# `prompt_template.invoke(state)` validates its input and re-renders every
+# message of the ChatPromptTemplate on every turn, although the system
+# message never changes (or only with `{language}`). CompiledChatPrompt
+# does that work once:
+#
+#   prompt = CompiledChatPrompt(prompt_template)
+#   model.invoke(prompt.invoke(state))
+#
+# - messages without variables are rendered once at compile time;
+# - messages with variables are rendered once per tuple of their values
+#   (an LRU of `cache_size` entries);
+# - MessagesPlaceholder content is spliced in as the same message objects.
+#
+# The output equals ChatPromptTemplate.invoke. Because the rendered
+# prefix messages are reused object for object, the prompt prefix is
+# byte-stable across turns, which is what provider-side prompt caching
+# (e.g. OpenAI's automatic prefix caching) needs to hit.
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from langchain_core.messages import BaseMessage, convert_to_messages
+from langchain_core.prompt_values import ChatPromptValue
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+
+class CompiledChatPrompt:
+    """A ChatPromptTemplate with its static parts rendered ahead of time."""
+
+    def __init__(self, template: ChatPromptTemplate, cache_size: int = 1024) -> None:
+        self.template = template
+        self.partial_variables = dict(template.partial_variables)
+        self.cache_size = cache_size
+        self.cache: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        # Each part is ("static", [messages]), ("template", message_template)
+        # or ("placeholder", MessagesPlaceholder).
+        self.parts: list = []
+        for message in template.messages:
+            if isinstance(message, BaseMessage):
+                self.parts.append(("static", [message]))
+            elif isinstance(message, MessagesPlaceholder):
+                self.parts.append(("placeholder", message))
+            elif not message.input_variables:
+                self.parts.append(("static", message.format_messages()))
+            else:
+                self.parts.append(("template", message))
+
+    # -----------------------------------------------
+    # Rendering
+    # -----------------------------------------------
+
+    def _merge(self, variables: dict) -> dict:
+        """Partial variables (callables resolved per call) under `variables`."""
+        if not self.partial_variables:
+            return variables
+        partials = {name: value() if callable(value) else value for name, value in self.partial_variables.items()}
+        return {**partials, **variables}
+
+    def _render(self, message_template, variables: dict) -> list[BaseMessage]:
+        names = message_template.input_variables
+        try:
+            values = tuple(variables[name] for name in names)
+        except KeyError as error:
+            raise KeyError(
+                f"Input to CompiledChatPrompt is missing variable {error.args[0]!r}. "
+                f"Expected: {names}. Received: {list(variables)}"
+            ) from None
+        key = (id(message_template), values)
+        try:
+            with self.lock:
+                if key in self.cache:
+                    self.cache.move_to_end(key)
+                    return self.cache[key]
+        except TypeError:
+            # Unhashable values (e.g. a list) are rendered every time.
+            return message_template.format_messages(**dict(zip(names, values)))
+        rendered = message_template.format_messages(**dict(zip(names, values)))
+        with self.lock:
+            # Another thread may have rendered it meanwhile: keep the first,
+            # so every caller gets the same message objects.
+            rendered = self.cache.setdefault(key, rendered)
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return rendered
+
+    def _placeholder(self, placeholder: MessagesPlaceholder, variables: dict) -> list:
+        value = variables.get(placeholder.variable_name)
+        if value is None:
+            if placeholder.optional:
+                return []
+            raise KeyError(
+                f"Input to CompiledChatPrompt is missing variable {placeholder.variable_name!r}."
+            )
+        if not all(isinstance(message, BaseMessage) for message in value):
+            value = convert_to_messages(value)
+        if placeholder.n_messages:
+            value = value[-placeholder.n_messages:]
+        return value
+
+    def format_messages(self, variables: dict) -> list[BaseMessage]:
+        variables = self._merge(variables)
+        messages: list = []
+        for kind, part in self.parts:
+            if kind == "static":
+                messages.extend(part)
+            elif kind == "template":
+                messages.extend(self._render(part, variables))
+            else:
+                messages.extend(self._placeholder(part, variables))
+        return messages
+
+    def invoke(self, input: dict, config=None) -> ChatPromptValue:
+        # model_construct: the messages are already validated message objects.
+        return ChatPromptValue.model_construct(messages=self.format_messages(input))
+
+    __call__ = invoke
+
+    # -----------------------------------------------
+    # Prompt-cache friendliness
+    # -----------------------------------------------
+
+    def prefix(self, input: dict) -> list[BaseMessage]:
+        """The messages before the first MessagesPlaceholder."""
+        input = self._merge(input)
+        prefix: list = []
+        for kind, part in self.parts:
+            if kind == "placeholder":
+                break
+            prefix.extend(part if kind == "static" else self._render(part, input))
+        return prefix
+
+    def prefix_hash(self, input: dict) -> str:
+        """sha256 of the serialized prefix; equal hashes mean an identical prompt prefix."""
+        payload = [(message.type, message.content, message.name) for message in self.prefix(input)]
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
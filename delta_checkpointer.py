@@ -0,0 +1,202 @@
+# ************************************************
+# Delta-encoded checkpoints for add_messages state
+# ************************************************
+
+# With `Annotated[list, add_messages]` every superstep checkpoints the
+# whole messages list, so a 200-turn thread stores ~200 near-identical
+# copies of its history. DeltaCheckpointSaver wraps any checkpointer and
+# stores only the messages appended since the parent checkpoint, plus a
+# full snapshot every `snapshot_every` checkpoints:
+#
+#   memory = DeltaCheckpointSaver(MemorySaver())
+#   graph = graph_builder.compile(checkpointer=memory)
+#
+# Reads rebuild the full list from the nearest snapshot plus the deltas
+# after it; recently rebuilt lists are kept in an LRU so the hot path
+# (load the latest checkpoint, append, save) never walks the chain.
+# When messages are replaced or removed (same id / RemoveMessage) the
+# parent is no longer a prefix and a full snapshot is stored instead; the
+# same happens when the parent checkpoint is gone (pruned or deleted).
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, CheckpointTuple
+
+DELTA_KEY = "__messages_delta__"
+
+
+class DeltaCheckpointSaver(BaseCheckpointSaver):
+    """Stores the `channel` list of each checkpoint as a delta on its parent."""
+
+    def __init__(
+        self,
+        saver: BaseCheckpointSaver,
+        channel: str = "messages",
+        snapshot_every: int = 50,
+        cache_size: int = 1024,
+    ) -> None:
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.channel = channel
+        self.snapshot_every = snapshot_every
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        # (thread_id, checkpoint_ns, checkpoint_id) -> (messages, depth)
+        self.cache: OrderedDict = OrderedDict()
+
+    # -----------------------------------------------
+    # Cache of rebuilt message lists
+    # -----------------------------------------------
+
+    def _cached(self, key: tuple) -> Optional[tuple]:
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        return None
+
+    def _forget_thread(self, thread_id: str) -> None:
+        with self.lock:
+            for key in [key for key in self.cache if key[0] == thread_id]:
+                del self.cache[key]
+
+    def _remember(self, key: tuple, messages: list, depth: int) -> None:
+        with self.lock:
+            self.cache[key] = (messages, depth)
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    @staticmethod
+    def _key(config: dict) -> tuple:
+        configurable = config["configurable"]
+        return (
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", ""),
+            configurable.get("checkpoint_id"),
+        )
+
+    # -----------------------------------------------
+    # Rebuilding full state from snapshot + deltas
+    # -----------------------------------------------
+
+    def _messages_at(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[tuple]:
+        """Return (messages, depth) of a stored checkpoint, None if it is gone."""
+        key = (thread_id, checkpoint_ns, checkpoint_id)
+        if (cached := self._cached(key)) is not None:
+            return cached
+        config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+        checkpoint_tuple = self.saver.get_tuple(config)
+        if checkpoint_tuple is None:
+            return None
+        value = checkpoint_tuple.checkpoint["channel_values"].get(self.channel, [])
+        messages, depth = self._expand(thread_id, checkpoint_ns, value)
+        self._remember(key, messages, depth)
+        return messages, depth
+
+    def _expand(self, thread_id: str, checkpoint_ns: str, value: Any) -> tuple:
+        if isinstance(value, dict) and DELTA_KEY in value:
+            parent = self._messages_at(thread_id, checkpoint_ns, value[DELTA_KEY])
+            if parent is None:
+                raise LookupError(
+                    f"Checkpoint {value[DELTA_KEY]!r} of thread {thread_id!r} is missing, "
+                    f"so the {self.channel!r} delta stored on top of it cannot be rebuilt"
+                )
+            base, depth = parent
+            return base + value["appended"], depth + 1
+        return value, 0
+
+    def _rebuild(self, checkpoint_tuple: Optional[CheckpointTuple]) -> Optional[CheckpointTuple]:
+        if checkpoint_tuple is None:
+            return None
+        channel_values = checkpoint_tuple.checkpoint["channel_values"]
+        value = channel_values.get(self.channel)
+        if not (isinstance(value, dict) and DELTA_KEY in value):
+            return checkpoint_tuple
+        thread_id, checkpoint_ns, checkpoint_id = self._key(checkpoint_tuple.config)
+        messages, depth = self._expand(thread_id, checkpoint_ns, value)
+        self._remember((thread_id, checkpoint_ns, checkpoint_id), messages, depth)
+        checkpoint = {
+            **checkpoint_tuple.checkpoint,
+            "channel_values": {**channel_values, self.channel: list(messages)},
+        }
+        return checkpoint_tuple._replace(checkpoint=checkpoint)
+
+    # -----------------------------------------------
+    # Encoding a new checkpoint as a delta
+    # -----------------------------------------------
+
+    def _encode(self, config: dict, checkpoint: dict) -> dict:
+        messages = checkpoint["channel_values"].get(self.channel)
+        thread_id, checkpoint_ns, parent_id = self._key(config)
+        key = (thread_id, checkpoint_ns, checkpoint["id"])
+        if not isinstance(messages, list):
+            return checkpoint
+        depth = 0
+        value = messages
+        # A parent that is gone (pruned, thread deleted) starts a new snapshot.
+        if parent_id is not None and (found := self._messages_at(thread_id, checkpoint_ns, parent_id)):
+            parent, parent_depth = found
+            is_prefix = len(parent) <= len(messages) and all(
+                old is new or old == new for old, new in zip(parent, messages)
+            )
+            if is_prefix and parent_depth + 1 < self.snapshot_every:
+                depth = parent_depth + 1
+                value = {DELTA_KEY: parent_id, "appended": messages[len(parent):]}
+        self._remember(key, list(messages), depth)
+        return {**checkpoint, "channel_values": {**checkpoint["channel_values"], self.channel: value}}
+
+    # -----------------------------------------------
+    # BaseCheckpointSaver API
+    # -----------------------------------------------
+
+    def get_tuple(self, config):
+        return self._rebuild(self.saver.get_tuple(config))
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        for checkpoint_tuple in self.saver.list(config, filter=filter, before=before, limit=limit):
+            yield self._rebuild(checkpoint_tuple)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return self.saver.put(config, self._encode(config, checkpoint), metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path: str = ""):
+        return self.saver.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.saver.delete_thread(thread_id)
+        self._forget_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    # Rebuilding walks the chain with the sync API, so the async methods
+    # run the sync ones in a worker thread.
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = ""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
@@ -0,0 +1,176 @@
+# ************************************************
+# Fake chat model and tools for offline runs and benchmarks
+# ************************************************
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, Field
+
+
+# -----------------------------------------------
+# A stand-in for TavilySearchResults with a fixed delay
+# -----------------------------------------------
+
+class SearchInput(BaseModel):
+    query: str = Field(description="search query to look up")
+
+
+class FakeSearchTool(BaseTool):
+    """Returns canned search results after sleeping for `latency` seconds."""
+
+    name: str = "tavily_search_results_json"
+    description: str = (
+        "A search engine optimized for comprehensive, accurate, and trusted results. "
+        "Input should be a search query."
+    )
+    args_schema: type[BaseModel] = SearchInput
+    latency: float = 0.0
+    max_results: int = 2
+
+    def _results(self, query: str) -> list:
+        return [
+            {"url": f"https://example.com/{i}", "content": f"Result {i} for {query}"}
+            for i in range(self.max_results)
+        ]
+
+    def _run(self, query: str, run_manager=None) -> list:
+        time.sleep(self.latency)
+        return self._results(query)
+
+    async def _arun(self, query: str, run_manager=None) -> list:
+        await asyncio.sleep(self.latency)
+        return self._results(query)
+
+
+# -----------------------------------------------
+# A deterministic chat model with a fixed latency
+# -----------------------------------------------
+
+SEARCH_WORDS = ("weather", "search", "news", "latest", "who", "what")
+
+
+class FakeChatModel(BaseChatModel):
+    """A deterministic stand-in for ChatOpenAI / ChatGroq.
+
+    Sleeps `latency` seconds per call (`token_latency` per streamed chunk).
+    When tools are bound it asks for `human_assistance` if the user asks
+    for assistance, for the search tool if the user asks a question, and
+    answers from the tool result once a ToolMessage comes back.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    model_name: str = "fake-chat-model"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools: list, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def get_num_tokens_from_messages(self, messages: list, tools=None) -> int:
+        return 3 + sum(4 + len(str(message.content).split()) for message in messages)
+
+    def _reply(self, messages: list[BaseMessage], tools: Optional[list]) -> AIMessage:
+        last = messages[-1]
+        text = str(last.content)
+        tool_names = [tool["function"]["name"] for tool in tools or []]
+        tool_calls = []
+        if isinstance(last, ToolMessage):
+            content = f"Here is what I found: {text[:200]}"
+        elif "human_assistance" in tool_names and "assist" in text.lower():
+            content = ""
+            tool_calls = [{"name": "human_assistance", "args": {"query": text}}]
+        elif (search := next((n for n in tool_names if n != "human_assistance"), None)) and any(
+            word in text.lower() for word in SEARCH_WORDS
+        ):
+            # "weather in Pune and news about Mumbai" asks for two searches.
+            content = ""
+            tool_calls = [{"name": search, "args": {"query": part.strip()}} for part in text.split(" and ")]
+        else:
+            content = f"You said: {text}"
+        for tool_call in tool_calls:
+            tool_call["id"] = f"call_{uuid.uuid4().hex[:12]}"
+        prompt_tokens = self.get_num_tokens_from_messages(messages)
+        completion_tokens = max(1, len(content.split()))
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            response_metadata={
+                "model_name": self.model_name,
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    # Without streaming the whole reply arrives after the same total time.
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs) -> ChatResult:
+        message = self._reply(messages, tools)
+        time.sleep(self.latency + self.token_latency * len(list(self._chunks(message))))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=None, **kwargs) -> ChatResult:
+        message = self._reply(messages, tools)
+        await asyncio.sleep(self.latency + self.token_latency * len(list(self._chunks(message))))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, message: AIMessage):
+        words = message.content.split(" ") if message.content else []
+        for i, word in enumerate(words):
+            yield AIMessageChunk(content=word if i == 0 else " " + word)
+        # Tool call arguments arrive in small pieces, like OpenAI streams them.
+        for i, tc in enumerate(message.tool_calls):
+            args = json.dumps(tc["args"])
+            pieces = [args[start:start + 8] for start in range(0, len(args), 8)]
+            for j, piece in enumerate(pieces):
+                yield AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": tc["name"] if j == 0 else None,
+                            "args": piece,
+                            "id": tc["id"] if j == 0 else None,
+                            "index": i,
+                        }
+                    ],
+                )
+        yield AIMessageChunk(
+            content="",
+            response_metadata=message.response_metadata,
+            usage_metadata=message.usage_metadata,
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        time.sleep(self.latency)
+        for chunk in self._chunks(self._reply(messages, tools)):
+            time.sleep(self.token_latency)
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._reply(messages, tools)):
+            await asyncio.sleep(self.token_latency)
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
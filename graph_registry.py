@@ -0,0 +1,280 @@
+# ************************************************
+# Shared compiled-graph registry for the Support ChatBot
+# ************************************************
+
+# support_chatbot_langgraph_with_tools.py, _with_memory.py and
+# _with_human_in_loop.py all wire the same chatbot / tools / route_tools
+# graph by hand. This module builds that graph from declarative options
+# and keeps one compiled graph per configuration, so web workers pay the
+# build and compile cost once and share one bound `llm_with_tools`.
+#
+#   graph = get_graph(GraphOptions(human_assistance=True))
+#   graph.invoke({"messages": [...]}, {"configurable": {"thread_id": "123"}})
+#
+# Compiled graphs keep no per-request state, so one instance can serve
+# any number of threads and requests concurrently.
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Annotated, Optional
+
+from typing_extensions import TypedDict
+
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langgraph.types import interrupt
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+@tool
+def human_assistance(query: str) -> str:
+    """
+    Request assistance from a Human.
+    """
+    human_response = interrupt({"query": query})
+    return human_response["data"]
+
+
+@dataclass(frozen=True)
+class GraphOptions:
+    """Declarative description of a support chatbot graph.
+
+    checkpointer: None, "memory" or "sqlite:<path>". Every graph gets its
+        own checkpointer, so a thread_id used on two graphs never resumes
+        the other graph's state; a SQLite file backs one configuration only.
+    tool_node: "prebuilt" (LangGraph ToolNode), "basic" (BasicToolNode) or
+        "speculative" (tool calls start while the model is still streaming).
+        The basic and speculative nodes condense tool results with the
+        shared ToolOutputCondenser (see `shared_condenser().report()`);
+        the prebuilt ToolNode passes them through unchanged.
+    max_inflight: cap on concurrent async LLM calls for this graph.
+    """
+
+    tools: bool = True
+    human_assistance: bool = False
+    checkpointer: Optional[str] = "memory"
+    tool_node: str = "prebuilt"
+    max_inflight: Optional[int] = None
+
+
+# -----------------------------------------------
+# Building a graph
+# -----------------------------------------------
+
+def route_tools(state: State):
+    """
+    Use in the conditional_edge to route to the ToolNode if the last message
+    has tool calls. Otherwise, route to the end.
+    """
+    if isinstance(state, list):
+        ai_message = state[-1]
+    elif messages := state.get("messages", []):
+        ai_message = messages[-1]
+    else:
+        raise ValueError(f"No messages found in input state to tool_edge: {state}")
+    if hasattr(ai_message, "tool_calls") and len(ai_message.tool_calls) > 0:
+        return "tools"
+    return END
+
+
+def make_chatbot(llm, single_tool_call: bool = False, max_inflight: Optional[int] = None):
+    """The 'chatbot' node, with a sync and an async (`ainvoke`) path."""
+    # asyncio primitives bind to the first loop that waits on them, and a
+    # cached graph may be driven from several loops: one semaphore per loop.
+    semaphores = weakref.WeakKeyDictionary()
+    semaphores_lock = threading.Lock()
+
+    def loop_semaphore() -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with semaphores_lock:
+            if loop not in semaphores:
+                semaphores[loop] = asyncio.Semaphore(max_inflight)
+            return semaphores[loop]
+
+    def check(message):
+        # When tools can interrupt, parallel tool calls would be repeated on resume.
+        if single_tool_call:
+            assert len(message.tool_calls) <= 1
+        return {"messages": [message]}
+
+    def chatbot(state: State):
+        return check(llm.invoke(state["messages"]))
+
+    async def achatbot(state: State):
+        if not max_inflight:
+            return check(await llm.ainvoke(state["messages"]))
+        async with loop_semaphore():
+            return check(await llm.ainvoke(state["messages"]))
+
+    return RunnableLambda(chatbot, afunc=achatbot, name="chatbot")
+
+
+def build_support_graph(
+    llm,
+    tools: Optional[list] = None,
+    checkpointer=None,
+    tool_node: str = "prebuilt",
+    single_tool_call: bool = False,
+    max_inflight: Optional[int] = None,
+    llm_with_tools=None,
+    condenser=None,
+):
+    """Wire and compile the support chatbot graph (uncached)."""
+    graph_builder = StateGraph(state_schema=State)
+
+    if tools:
+        if llm_with_tools is None:
+            llm_with_tools = llm.bind_tools(tools)
+        if tool_node == "speculative":
+            from speculative_tools import SpeculativeDispatcher, SpeculativeToolNode, make_speculative_chatbot
+
+            # human_assistance calls interrupt(), so it only runs in the tools node.
+            dispatcher = SpeculativeDispatcher([t for t in tools if t is not human_assistance])
+            graph_builder.add_node(
+                "chatbot", make_speculative_chatbot(llm_with_tools, dispatcher, single_tool_call, max_inflight)
+            )
+            graph_builder.add_node(
+                "tools", SpeculativeToolNode(tools, dispatcher, max_workers=4, timeout=30, condenser=condenser)
+            )
+        else:
+            graph_builder.add_node("chatbot", make_chatbot(llm_with_tools, single_tool_call, max_inflight))
+            if tool_node == "basic":
+                from tool_node import BasicToolNode
+
+                graph_builder.add_node(
+                    "tools", BasicToolNode(tools=tools, max_workers=4, timeout=30, condenser=condenser)
+                )
+            else:
+                from langgraph.prebuilt import ToolNode
+
+                graph_builder.add_node("tools", ToolNode(tools=tools))
+        graph_builder.add_conditional_edges("chatbot", route_tools, {"tools": "tools", END: END})
+        graph_builder.add_edge("tools", "chatbot")
+    else:
+        graph_builder.add_node("chatbot", make_chatbot(llm, max_inflight=max_inflight))
+        graph_builder.add_edge("chatbot", END)
+
+    graph_builder.add_edge(START, "chatbot")
+    return graph_builder.compile(checkpointer=checkpointer)
+
+
+# -----------------------------------------------
+# Shared resources and the compiled-graph cache
+# -----------------------------------------------
+
+_lock = threading.RLock()
+_shared: dict = {}
+_graphs: dict = {}
+
+
+def _shared_resource(key, factory):
+    with _lock:
+        if key not in _shared:
+            _shared[key] = factory()
+        return _shared[key]
+
+
+def shared_llm():
+    def factory():
+        from model_provider import chat_openai
+
+        return chat_openai("gpt-4o-mini")
+
+    return _shared_resource("llm", factory)
+
+
+def shared_search():
+    def factory():
+        from batched_search import batched_search
+        from cached_search import cached_search
+
+        return cached_search(batched_search(max_results=2))
+
+    return _shared_resource("search", factory)
+
+
+def shared_condenser():
+    def factory():
+        from tool_condenser import ToolOutputCondenser
+
+        return ToolOutputCondenser(budgets={"tavily_search_results_json": 400})
+
+    return _shared_resource("condenser", factory)
+
+
+def graph_checkpointer(options: GraphOptions, key=None):
+    """The checkpointer of the graph cached under `key` (default: `options`).
+
+    Threads of different graphs must not mix: "memory" is one MemorySaver
+    per graph, and "sqlite:<path>" refuses a second configuration.
+    """
+    spec = options.checkpointer
+    if spec is None:
+        return None
+    if spec == "memory":
+        from langgraph.checkpoint.memory import MemorySaver
+
+        return _shared_resource(("checkpointer", key or options), MemorySaver)
+    if spec.startswith("sqlite:"):
+        from sqlite_checkpointer import SqliteCheckpointSaver
+
+        with _lock:
+            owner = _shared.setdefault(("checkpointer-owner", spec), options)
+        if owner != options:
+            raise ValueError(
+                f"{spec!r} already holds the threads of {owner}; use another file for {options}"
+            )
+        return _shared_resource(("checkpointer", spec), lambda: SqliteCheckpointSaver(spec[len("sqlite:"):]))
+    raise ValueError(f"Unknown checkpointer: {spec!r}")
+
+
+def get_graph(options: GraphOptions = GraphOptions(), llm=None, search=None):
+    """Return the compiled graph for `options`, building it at most once.
+
+    `llm` and `search` default to process-wide shared instances; graphs
+    using the same llm and tool set also share one bound llm_with_tools.
+    """
+    llm = llm or shared_llm()
+    key = (options, id(llm), id(search))
+    with _lock:
+        if key in _graphs:
+            return _graphs[key][-1]
+
+        tools = []
+        if options.tools:
+            search = search or shared_search()
+            tools.append(search)
+        if options.human_assistance:
+            tools.append(human_assistance)
+        llm_with_tools = None
+        if tools:
+            bound_key = ("llm_with_tools", id(llm), tuple(id(t) for t in tools))
+            llm_with_tools = _shared_resource(bound_key, lambda: llm.bind_tools(tools))
+
+        graph = build_support_graph(
+            llm,
+            tools,
+            checkpointer=graph_checkpointer(options, key),
+            tool_node=options.tool_node,
+            single_tool_call=options.human_assistance,
+            max_inflight=options.max_inflight,
+            llm_with_tools=llm_with_tools,
+            condenser=shared_condenser() if tools else None,
+        )
+        # Keep llm and search alive so their ids stay unique for the key.
+        _graphs[key] = (llm, search, graph)
+        return graph
+
+
+def clear():
+    """Drop every cached graph and shared resource (mainly for tests)."""
+    with _lock:
+        _graphs.clear()
+        _shared.clear()
@@ -0,0 +1,64 @@
+# ************************************************
+# Consistent hashing of thread_ids onto workers
+# ************************************************
+
+# Every node gets `replicas` points on a 64-bit ring; a key belongs to the
+# first point clockwise from its own hash. Adding or removing a node only
+# moves the keys next to that node's points (about 1/N of them), so most
+# threads stay where their state already is.
+#
+#   ring = HashRing(["worker-0", "worker-1"])
+#   ring.get("thread-123")  -> "worker-1"
+
+import bisect
+import hashlib
+from typing import Hashable, Iterable
+
+
+def stable_hash(key: str) -> int:
+    """A 64-bit hash that is the same in every process (unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """A consistent-hash ring with virtual nodes."""
+
+    def __init__(self, nodes: Iterable[Hashable] = (), replicas: int = 100) -> None:
+        self.replicas = replicas
+        self.points: list[int] = []
+        self.owners: dict[int, Hashable] = {}
+        self.nodes: set = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: Hashable) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for replica in range(self.replicas):
+            point = stable_hash(f"{node}#{replica}")
+            self.owners[point] = node
+            bisect.insort(self.points, point)
+
+    def remove(self, node: Hashable) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for replica in range(self.replicas):
+            point = stable_hash(f"{node}#{replica}")
+            if self.owners.get(point) == node:
+                del self.owners[point]
+                del self.points[bisect.bisect_left(self.points, point)]
+
+    def get(self, key: str) -> Hashable:
+        """The node owning `key`."""
+        if not self.points:
+            raise LookupError("HashRing has no nodes")
+        index = bisect.bisect(self.points, stable_hash(key)) % len(self.points)
+        return self.owners[self.points[index]]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node: Hashable) -> bool:
+        return node in self.nodes
@@ -0,0 +1,226 @@
+# ************************************************
+# Hedged requests across chat model providers
+# ************************************************
+
+# A single slow upstream call sets the p99 of a turn. HedgedChatModel
+# wraps several chat models (e.g. Groq llama-3.3-70b and OpenAI
+# gpt-4o-mini) and behaves like one:
+#
+#   model = HedgedChatModel(models=[chat_groq(), chat_openai()])
+#   agent = create_react_agent(model, tools, checkpointer=memory)
+#
+# Every call goes to the provider with the lowest recent median latency.
+# If it has not answered after its own live p95, the same request is sent
+# to the next provider; the first answer wins and the other call is
+# cancelled. A primary that fails is retried on the next provider right
+# away. Hedges are capped at `hedge_budget` of the calls, so spend grows
+# by at most that fraction (about 5% at p95), not 2x.
+#
+# Hedging runs on the async path (`ainvoke`), where the losing call is
+# really cancelled; sync `invoke` hedges on threads, and a losing sync
+# call runs to completion in the background.
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from pydantic import ConfigDict, PrivateAttr
+
+
+class LatencyTracker:
+    """Sliding windows of call latencies per provider, plus hedge counters."""
+
+    def __init__(self, providers: int, window: int = 200) -> None:
+        self.lock = threading.Lock()
+        self.samples = [deque(maxlen=window) for _ in range(providers)]
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def record(self, provider: int, seconds: float) -> None:
+        with self.lock:
+            self.samples[provider].append(seconds)
+
+    def quantile(self, provider: int, q: float) -> Optional[float]:
+        with self.lock:
+            samples = sorted(self.samples[provider])
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def order(self, min_samples: int) -> list[int]:
+        """Providers, fastest median first; ones without enough samples keep their place."""
+        medians = []
+        for provider, samples in enumerate(self.samples):
+            median = self.quantile(provider, 0.5) if len(samples) >= min_samples else None
+            medians.append((median if median is not None else float("inf"), provider))
+        if all(median == float("inf") for median, _ in medians):
+            return list(range(len(self.samples)))
+        return [provider for _, provider in sorted(medians)]
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "p50": [self.quantile(p, 0.5) for p in range(len(self.samples))],
+            "p95": [self.quantile(p, 0.95) for p in range(len(self.samples))],
+        }
+
+
+class HedgedChatModel(BaseChatModel):
+    """Sends each call to the fastest provider and hedges it past that provider's p95."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    models: list[Runnable]
+    hedge_quantile: float = 0.95
+    default_hedge_after: float = 2.0
+    min_samples: int = 20
+    hedge_budget: float = 0.1
+    window: int = 200
+
+    _tracker: LatencyTracker = PrivateAttr()
+    _executor: ThreadPoolExecutor = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._tracker = LatencyTracker(len(self.models), self.window)
+        self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedged-model")
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-router"
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "HedgedChatModel":
+        """Bind `tools` on every provider; the copy shares latency stats with this model."""
+        bound = [model.bind_tools(tools, **kwargs) for model in self.models]
+        return self.model_copy(update={"models": bound})
+
+    def stats(self) -> dict:
+        return self._tracker.stats()
+
+    # -----------------------------------------------
+    # Deciding when to hedge
+    # -----------------------------------------------
+
+    def _plan(self) -> tuple[int, Optional[int], Optional[float]]:
+        """(primary, fallback provider or None, seconds to wait before hedging).
+
+        The fallback always takes over when the primary fails; the budget
+        only decides whether a slow primary is hedged (None: never).
+        """
+        tracker = self._tracker
+        order = tracker.order(self.min_samples)
+        primary = order[0]
+        secondary = order[1] if len(order) > 1 else None
+        hedge_after = self.default_hedge_after
+        if len(tracker.samples[primary]) >= self.min_samples:
+            hedge_after = tracker.quantile(primary, self.hedge_quantile)
+        with tracker.lock:
+            tracker.calls += 1
+            if tracker.hedges >= self.hedge_budget * tracker.calls:
+                hedge_after = None
+        return primary, secondary, hedge_after
+
+    def _count(self, field: str) -> None:
+        with self._tracker.lock:
+            setattr(self._tracker, field, getattr(self._tracker, field) + 1)
+
+    @staticmethod
+    def _result(message, provider: int, hedged: bool) -> ChatResult:
+        message.response_metadata = {**message.response_metadata, "hedge": {"provider": provider, "hedged": hedged}}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # -----------------------------------------------
+    # Async path: the loser is cancelled
+    # -----------------------------------------------
+
+    async def _acall(self, provider: int, messages, stop, kwargs: dict):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        message = await self.models[provider].ainvoke(messages, stop=stop, **kwargs)
+        self._tracker.record(provider, loop.time() - started)
+        return message
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        primary, secondary, hedge_after = self._plan()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = asyncio.ensure_future(self._acall(primary, messages, stop, kwargs))
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if secondary is None or (done and first.exception() is None):
+            return self._result(await first, primary, False)
+
+        hedged = not done
+        self._count("hedges" if hedged else "failovers")
+        second = asyncio.ensure_future(self._acall(secondary, messages, stop, kwargs))
+        pending = {first, second} - done
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second and hedged:
+                            self._count("hedge_wins")
+                            # The primary was at least this slow; remember it.
+                            self._tracker.record(primary, loop.time() - started)
+                        return self._result(task.result(), primary if task is first else secondary, True)
+            # Both failed: raise the primary's error.
+            return self._result(await first, primary, True)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # -----------------------------------------------
+    # Sync path: hedging on threads
+    # -----------------------------------------------
+
+    def _call(self, provider: int, messages, stop, kwargs: dict):
+        started = time.perf_counter()
+        message = self.models[provider].invoke(messages, stop=stop, **kwargs)
+        self._tracker.record(provider, time.perf_counter() - started)
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        primary, secondary, hedge_after = self._plan()
+
+        def submit(provider: int):
+            return self._executor.submit(
+                contextvars.copy_context().run, self._call, provider, messages, stop, kwargs
+            )
+
+        first = submit(primary)
+        done, _ = wait([first], timeout=hedge_after)
+        if secondary is None or (done and first.exception() is None):
+            return self._result(first.result(), primary, False)
+
+        hedged = not done
+        self._count("hedges" if hedged else "failovers")
+        second = submit(secondary)
+        pending = {first, second} - done
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second and hedged:
+                        self._count("hedge_wins")
+                    for other in pending:
+                        other.cancel()
+                    return self._result(future.result(), primary if future is first else secondary, True)
+        return self._result(first.result(), primary, True)
+
+
+def default_router(**kwargs: Any) -> HedgedChatModel:
+    """Groq llama-3.3-70b hedged with OpenAI gpt-4o-mini, on shared connection pools."""
+    from model_provider import chat_groq, chat_openai
+
+    return HedgedChatModel(models=[chat_groq("llama-3.3-70b-versatile"), chat_openai("gpt-4o-mini")], **kwargs)
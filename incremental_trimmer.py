@@ -0,0 +1,125 @@
+# ************************************************
+# Incremental trim_messages for long chat histories
+# ************************************************
+
+# trim_messages(token_counter=model) re-tokenizes the whole history on
+# every turn. IncrementalTrimmer caches the token count of every message
+# (keyed by message id and a hash of its content) and walks the history
+# backwards with a running suffix sum, stopping as soon as the budget is
+# spent. Each turn only tokenizes messages it has not seen before.
+#
+# The result is the same as
+#   trim_messages(max_tokens=..., strategy="last", token_counter=...,
+#                 include_system=True, allow_partial=False, start_on="human")
+
+from collections import OrderedDict
+from typing import Callable, Sequence
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+
+class IncrementalTrimmer:
+    """Keep the last messages that fit in `max_tokens`, caching token counts.
+
+    `token_counter` is a chat model or a function counting the tokens of a
+    list of messages, as for trim_messages. The counter must be additive
+    per message plus a fixed per-list overhead (true for ChatOpenAI).
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        token_counter,
+        include_system: bool = True,
+        start_on="human",
+        cache_size: int = 100_000,
+    ) -> None:
+        if hasattr(token_counter, "get_num_tokens_from_messages"):
+            token_counter = token_counter.get_num_tokens_from_messages
+        self.max_tokens = max_tokens
+        self.count_tokens: Callable[[list[BaseMessage]], int] = token_counter
+        self.include_system = include_system
+        self.start_on = start_on
+        self.cache_size = cache_size
+        self.cache: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        try:
+            self.list_overhead = token_counter([])
+        except Exception:
+            self.list_overhead = 0
+
+    # -----------------------------------------------
+    # Cached per-message token counts
+    # -----------------------------------------------
+
+    @staticmethod
+    def _key(message: BaseMessage) -> tuple:
+        fingerprint = hash(
+            (
+                message.type,
+                repr(message.content),
+                message.name,
+                repr(getattr(message, "tool_calls", None)),
+                getattr(message, "tool_call_id", None),
+            )
+        )
+        return (message.id, fingerprint)
+
+    def message_tokens(self, message: BaseMessage) -> int:
+        key = self._key(message)
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        self.misses += 1
+        tokens = self.count_tokens([message]) - self.list_overhead
+        self.cache[key] = tokens
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return tokens
+
+    def _is_start(self, message: BaseMessage) -> bool:
+        if self.start_on is None:
+            return True
+        types = self.start_on if isinstance(self.start_on, (list, tuple)) else [self.start_on]
+        for type_ in types:
+            if isinstance(type_, str) and message.type == type_:
+                return True
+            if isinstance(type_, type) and isinstance(message, type_):
+                return True
+        return False
+
+    # -----------------------------------------------
+    # Trimming
+    # -----------------------------------------------
+
+    def invoke(self, messages: Sequence[BaseMessage], config=None) -> list[BaseMessage]:
+        messages = list(messages)
+        if not messages:
+            return []
+
+        system_message = None
+        budget = self.max_tokens
+        if self.include_system and isinstance(messages[0], SystemMessage):
+            system_message = messages[0]
+            messages = messages[1:]
+            system_tokens = self.list_overhead + self.message_tokens(system_message)
+            budget = max(0, self.max_tokens - system_tokens)
+
+        # Running suffix sum from the newest message backwards.
+        suffix_tokens = self.list_overhead
+        start = len(messages)
+        while start > 0:
+            suffix_tokens += self.message_tokens(messages[start - 1])
+            if suffix_tokens > budget:
+                break
+            start -= 1
+
+        while start < len(messages) and not self._is_start(messages[start]):
+            start += 1
+
+        kept = messages[start:]
+        return [system_message, *kept] if system_message else kept
+
+    __call__ = invoke
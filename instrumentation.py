@@ -0,0 +1,369 @@
+# ************************************************
+# Per-node latency and token instrumentation for compiled graphs
+# ************************************************
+
+# Tells whether a slow turn was spent in the `chatbot` node, the `tools`
+# node or checkpointing. Records
+#   - wall time per graph node and per tool call,
+#   - time to first token and prompt/completion tokens per LLM call,
+#   - time per checkpointer operation,
+# into histograms, with per-thread totals keyed by thread_id.
+#
+#   metrics = GraphMetrics()
+#   graph = attach(graph, metrics)
+#   ...
+#   print(metrics.to_prometheus())   # or metrics.to_json()
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableBinding
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+# From 25us: checkpointer operations often take well under a millisecond.
+DEFAULT_BUCKETS = (
+    0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+# -----------------------------------------------
+# Histograms
+# -----------------------------------------------
+
+class Histogram:
+    """A Prometheus-style histogram with cumulative buckets."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class GraphMetrics:
+    """Histograms and counters fed by GraphInstrumentation."""
+
+    HELP = {
+        "langgraph_node_seconds": "Wall time per graph node",
+        "langgraph_tool_seconds": "Wall time per tool call",
+        "langgraph_llm_seconds": "Wall time per LLM call",
+        "langgraph_llm_ttft_seconds": "Time to first token per streamed LLM call",
+        "langgraph_checkpoint_seconds": "Time per checkpointer operation",
+        "langgraph_stream_ttft_seconds": "Time from request to first token sent to an HTTP client",
+    }
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, max_threads: int = 10_000) -> None:
+        self.buckets = buckets
+        self.max_threads = max_threads
+        self.lock = threading.Lock()
+        self.histograms: dict = {}
+        self.tokens: dict = defaultdict(int)
+        self.threads: OrderedDict = OrderedDict()
+
+    def observe(self, name: str, labels: dict, seconds: float, thread_id: Optional[str] = None) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(self.buckets)
+            self.histograms[key].observe(seconds)
+            if thread_id is not None:
+                label = next(iter(labels.values()), name)
+                self._thread(thread_id)[f"{name}:{label}"] += seconds
+
+    def add_tokens(self, model: str, prompt: int, completion: int, thread_id: Optional[str] = None) -> None:
+        with self.lock:
+            self.tokens[(model, "prompt")] += prompt
+            self.tokens[(model, "completion")] += completion
+            if thread_id is not None:
+                stats = self._thread(thread_id)
+                stats["prompt_tokens"] += prompt
+                stats["completion_tokens"] += completion
+
+    def _thread(self, thread_id: str) -> dict:
+        if thread_id not in self.threads:
+            self.threads[thread_id] = defaultdict(float)
+            if len(self.threads) > self.max_threads:
+                self.threads.popitem(last=False)
+        self.threads.move_to_end(thread_id)
+        return self.threads[thread_id]
+
+    def thread_stats(self, thread_id: str) -> dict:
+        with self.lock:
+            return dict(self.threads.get(thread_id, {}))
+
+    # -----------------------------------------------
+    # Exporters
+    # -----------------------------------------------
+
+    def to_json(self) -> str:
+        with self.lock:
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "p50": histogram.quantile(0.50),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99),
+                }
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+            tokens = [
+                {"model": model, "kind": kind, "tokens": count}
+                for (model, kind), count in sorted(self.tokens.items())
+            ]
+        return json.dumps({"histograms": histograms, "tokens": tokens}, indent=2)
+
+    def to_prometheus(self) -> str:
+        def render(labels: tuple, **extra) -> str:
+            pairs = [*labels, *extra.items()]
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+        lines = []
+        with self.lock:
+            seen = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {self.HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip([*histogram.buckets, "+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{render(labels, le=bound)} {cumulative}")
+                lines.append(f"{name}_sum{render(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{render(labels)} {histogram.count}")
+            if self.tokens:
+                lines.append("# HELP langgraph_llm_tokens_total Tokens reported by the model")
+                lines.append("# TYPE langgraph_llm_tokens_total counter")
+                for (model, kind), count in sorted(self.tokens.items()):
+                    lines.append(f'langgraph_llm_tokens_total{{model="{model}",kind="{kind}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# -----------------------------------------------
+# Callback handler timing nodes, tools and LLM calls
+# -----------------------------------------------
+
+class GraphInstrumentation(BaseCallbackHandler):
+    """Feeds GraphMetrics from the callbacks a compiled graph emits."""
+
+    run_inline = True
+
+    def __init__(self, metrics: GraphMetrics) -> None:
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.runs: dict = {}
+        # Chain runs in progress, and those among them that are graph runs.
+        self.chains: set = set()
+        self.graph_runs: set = set()
+
+    def _start(self, run_id, kind: str, label: str, metadata: Optional[dict]) -> None:
+        thread_id = (metadata or {}).get("thread_id")
+        with self.lock:
+            self.runs[run_id] = (kind, label, thread_id, time.perf_counter())
+
+    def _end(self, run_id) -> Optional[tuple]:
+        with self.lock:
+            run = self.runs.pop(run_id, None)
+        if run is None:
+            return None
+        kind, label, thread_id, started = run
+        return kind, label, thread_id, time.perf_counter() - started
+
+    def on_chain_start(
+        self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs: Any
+    ) -> None:
+        # The first chain this handler sees is the graph run. Its parent
+        # is None, or a run of a caller (a RunnableLambda, a parent graph,
+        # a traced function) that does not report to this handler.
+        with self.lock:
+            is_graph = parent_run_id is None or parent_run_id not in self.chains
+            self.chains.add(run_id)
+            if is_graph:
+                self.graph_runs.add(run_id)
+                return
+            is_node = parent_run_id in self.graph_runs
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run (a child of the graph run), not the
+        # runnables nested inside it, even when one shares the node's name.
+        if is_node and node is not None and not node.startswith("__"):
+            self._start(run_id, "node", node, metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any) -> None:
+        with self.lock:
+            self.chains.discard(run_id)
+            self.graph_runs.discard(run_id)
+        if run := self._end(run_id):
+            _, node, thread_id, seconds = run
+            self.metrics.observe("langgraph_node_seconds", {"node": node}, seconds, thread_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs: Any) -> None:
+        # Interrupts surface as errors; the node's time still counts.
+        self.on_chain_end(None, run_id=run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs: Any) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(run_id, "tool", name, metadata)
+
+    def on_tool_end(self, output, *, run_id, **kwargs: Any) -> None:
+        if run := self._end(run_id):
+            _, name, thread_id, seconds = run
+            self.metrics.observe("langgraph_tool_seconds", {"tool": name}, seconds, thread_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self.on_tool_end(None, run_id=run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs: Any) -> None:
+        model = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "llm"
+        self._start(run_id, "llm", model, metadata)
+        with self.lock:
+            self.runs[(run_id, "ttft")] = True
+
+    def on_llm_new_token(self, token: str, *, run_id, **kwargs: Any) -> None:
+        with self.lock:
+            first = self.runs.pop((run_id, "ttft"), False)
+            run = self.runs.get(run_id)
+        if first and run is not None:
+            _, model, thread_id, started = run
+            self.metrics.observe(
+                "langgraph_llm_ttft_seconds", {"model": model}, time.perf_counter() - started, thread_id
+            )
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+        with self.lock:
+            self.runs.pop((run_id, "ttft"), None)
+        run = self._end(run_id)
+        if run is None:
+            return
+        _, model, thread_id, seconds = run
+        self.metrics.observe("langgraph_llm_seconds", {"model": model}, seconds, thread_id)
+        prompt = completion = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+                if usage:
+                    prompt += usage.get("prompt_tokens", 0)
+                    completion += usage.get("completion_tokens", 0)
+                elif usage_metadata := getattr(message, "usage_metadata", None):
+                    # Providers (and streamed replies) that only fill usage_metadata.
+                    prompt += usage_metadata.get("input_tokens", 0)
+                    completion += usage_metadata.get("output_tokens", 0)
+        self.metrics.add_tokens(model, prompt, completion, thread_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+        with self.lock:
+            self.runs.pop((run_id, "ttft"), None)
+        self._end(run_id)
+
+
+# -----------------------------------------------
+# Checkpointer wrapper timing every operation
+# -----------------------------------------------
+
+class InstrumentedCheckpointSaver(BaseCheckpointSaver):
+    """Delegates to `saver` and records the time of every operation."""
+
+    def __init__(self, saver: BaseCheckpointSaver, metrics: GraphMetrics) -> None:
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.metrics = metrics
+
+    def _timed(self, op: str, config, started: float) -> None:
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        self.metrics.observe(
+            "langgraph_checkpoint_seconds", {"op": op}, time.perf_counter() - started, thread_id
+        )
+
+    def get_tuple(self, config):
+        started = time.perf_counter()
+        try:
+            return self.saver.get_tuple(config)
+        finally:
+            self._timed("get", config, started)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        started = time.perf_counter()
+        try:
+            return self.saver.put(config, checkpoint, metadata, new_versions)
+        finally:
+            self._timed("put", config, started)
+
+    def put_writes(self, config, writes, task_id, task_path: str = ""):
+        started = time.perf_counter()
+        try:
+            return self.saver.put_writes(config, writes, task_id, task_path)
+        finally:
+            self._timed("put_writes", config, started)
+
+    async def aget_tuple(self, config):
+        started = time.perf_counter()
+        try:
+            return await self.saver.aget_tuple(config)
+        finally:
+            self._timed("get", config, started)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        async for checkpoint_tuple in self.saver.alist(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        started = time.perf_counter()
+        try:
+            return await self.saver.aput(config, checkpoint, metadata, new_versions)
+        finally:
+            self._timed("put", config, started)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = ""):
+        started = time.perf_counter()
+        try:
+            return await self.saver.aput_writes(config, writes, task_id, task_path)
+        finally:
+            self._timed("put_writes", config, started)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+
+def attach(graph, metrics: GraphMetrics):
+    """Return `graph` instrumented to feed `metrics`.
+
+    The callback handler is bound with a RunnableBinding, which merges it
+    with the caller's callbacks (a graph's own config would be replaced by
+    them when it runs under a parent). The graph's checkpointer (if any) is
+    wrapped on a copy so checkpointing time is recorded too.
+    """
+    instrumented = graph
+    if isinstance(graph.checkpointer, BaseCheckpointSaver):
+        instrumented = graph.copy({"checkpointer": InstrumentedCheckpointSaver(graph.checkpointer, metrics)})
+    return RunnableBinding(bound=instrumented, config={"callbacks": [GraphInstrumentation(metrics)]})
@@ -0,0 +1,326 @@
+# ************************************************
+# Pending-interrupt index and resume worker pool
+# ************************************************
+
+# In support_chatbot_langgraph_with_human_in_loop.py `human_assistance`
+# calls `interrupt()` and the thread waits until someone sends
+# `Command(resume=...)`, but finding the paused threads means already
+# knowing their thread_ids. This module keeps an index of them:
+#
+#   index = PendingInterruptIndex("pending_interrupts.sqlite")
+#   memory = InterruptIndexingSaver(SqliteCheckpointSaver(...), index)
+#   graph = graph_builder.compile(checkpointer=memory)
+#
+#   index.list()                      # oldest first
+#   pending = index.claim("agent-7")  # oldest unclaimed thread
+#   pool = ResumeWorkerPool(graph, index, concurrency=32)
+#   await pool.resume(pending.thread_id, {"data": "..."})
+#
+# The saver wrapper adds a thread when an interrupt is written and drops
+# it when the thread checkpoints again, so the index is maintained as a
+# side effect of running the graph: list, claim and resume cost at most
+# O(log n) per thread and never scan checkpoints.
+
+import asyncio
+import sqlite3
+import threading
+import time
+import weakref
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.constants import INTERRUPT
+
+
+@dataclass(frozen=True)
+class PendingInterrupt:
+    thread_id: str
+    payload: Any
+    created_at: float
+    claimed_by: Optional[str] = None
+    claimed_at: Optional[float] = None
+
+
+class PendingInterruptIndex:
+    """thread_id -> PendingInterrupt, ordered by created_at.
+
+    Kept in memory; with `path` every change is also written to SQLite
+    and the index is reloaded from there on start.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.lock = threading.RLock()
+        self.serde = JsonPlusSerializer()
+        # Insertion order is created_at order; unclaimed is the claim queue,
+        # (created_at, thread_id) kept sorted.
+        self.pending: OrderedDict = OrderedDict()
+        self.unclaimed: list = []
+        # Threads a ResumeWorkerPool is resuming right now.
+        self.resuming: set = set()
+        self.conn = None
+        if path is not None:
+            self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pending_interrupts (
+                    thread_id TEXT PRIMARY KEY,
+                    type TEXT,
+                    payload BLOB,
+                    created_at REAL,
+                    claimed_by TEXT,
+                    claimed_at REAL
+                )
+                """
+            )
+            self._load()
+
+    def _load(self) -> None:
+        rows = self.conn.execute(
+            "SELECT thread_id, type, payload, created_at, claimed_by, claimed_at "
+            "FROM pending_interrupts ORDER BY created_at"
+        )
+        for thread_id, type_, payload, created_at, claimed_by, claimed_at in rows:
+            entry = PendingInterrupt(
+                thread_id, self.serde.loads_typed((type_, payload)), created_at, claimed_by, claimed_at
+            )
+            self.pending[thread_id] = entry
+            if claimed_by is None:
+                self.unclaimed.append((created_at, thread_id))
+        self.unclaimed.sort()
+
+    def _store(self, entry: PendingInterrupt) -> None:
+        self.pending[entry.thread_id] = entry
+        if self.conn is not None:
+            type_, payload = self.serde.dumps_typed(entry.payload)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pending_interrupts VALUES (?, ?, ?, ?, ?, ?)",
+                (entry.thread_id, type_, payload, entry.created_at, entry.claimed_by, entry.claimed_at),
+            )
+
+    def _dequeue(self, entry: PendingInterrupt) -> None:
+        if entry.claimed_by is None:
+            del self.unclaimed[bisect_left(self.unclaimed, (entry.created_at, entry.thread_id))]
+
+    # -----------------------------------------------
+    # Maintained by InterruptIndexingSaver
+    # -----------------------------------------------
+
+    def add(self, thread_id: str, payload: Any) -> None:
+        """Record that `thread_id` is waiting on an interrupt with `payload`."""
+        with self.lock:
+            previous = self.pending.pop(thread_id, None)
+            if previous is not None:
+                self._dequeue(previous)
+            # A thread that interrupts again while resuming stays with its agent.
+            if previous is not None and previous.claimed_by is not None:
+                entry = replace(previous, payload=payload)
+            else:
+                entry = PendingInterrupt(thread_id, payload, time.time())
+                insort(self.unclaimed, (entry.created_at, thread_id))
+            self._store(entry)
+
+    def discard(self, thread_id: str) -> None:
+        """Forget `thread_id` (it was resumed or moved on)."""
+        with self.lock:
+            entry = self.pending.pop(thread_id, None)
+            if entry is None:
+                return
+            self._dequeue(entry)
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM pending_interrupts WHERE thread_id = ?", (thread_id,))
+
+    # -----------------------------------------------
+    # API for human agents
+    # -----------------------------------------------
+
+    def get(self, thread_id: str) -> Optional[PendingInterrupt]:
+        with self.lock:
+            return self.pending.get(thread_id)
+
+    def list(self, limit: int = 50, unclaimed_only: bool = False) -> list:
+        """The oldest `limit` pending interrupts."""
+        with self.lock:
+            if unclaimed_only:
+                return [self.pending[thread_id] for _, thread_id in self.unclaimed[:limit]]
+            return [entry for entry, _ in zip(self.pending.values(), range(limit))]
+
+    def claim(self, agent: str, thread_id: Optional[str] = None) -> Optional[PendingInterrupt]:
+        """Claim `thread_id`, or the oldest unclaimed interrupt, for `agent`.
+
+        Returns None when there is nothing (left) to claim.
+        """
+        with self.lock:
+            if thread_id is None:
+                if not self.unclaimed:
+                    return None
+                thread_id = self.unclaimed[0][1]
+            entry = self.pending.get(thread_id)
+            if entry is None or entry.claimed_by is not None:
+                return None
+            self._dequeue(entry)
+            entry = replace(entry, claimed_by=agent, claimed_at=time.time())
+            self._store(entry)
+            return entry
+
+    def release(self, thread_id: str) -> None:
+        """Put a claimed interrupt back in the queue, keeping its place."""
+        with self.lock:
+            entry = self.pending.get(thread_id)
+            if entry is None or entry.claimed_by is None:
+                return
+            self._store(replace(entry, claimed_by=None, claimed_at=None))
+            insort(self.unclaimed, (entry.created_at, thread_id))
+
+    def start_resume(self, thread_id: str) -> None:
+        """Mark `thread_id` as being resumed.
+
+        Raises KeyError if it has no pending interrupt and RuntimeError if
+        it is already being resumed.
+        """
+        with self.lock:
+            if thread_id not in self.pending:
+                raise KeyError(f"No pending interrupt for thread {thread_id!r}")
+            if thread_id in self.resuming:
+                raise RuntimeError(f"Thread {thread_id!r} is already being resumed")
+            self.resuming.add(thread_id)
+
+    def end_resume(self, thread_id: str) -> None:
+        with self.lock:
+            self.resuming.discard(thread_id)
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+
+# -----------------------------------------------
+# Checkpointer wrapper keeping the index up to date
+# -----------------------------------------------
+
+class InterruptIndexingSaver(BaseCheckpointSaver):
+    """Delegates to `saver` and records interrupts of root graphs in `index`."""
+
+    def __init__(self, saver: BaseCheckpointSaver, index: PendingInterruptIndex) -> None:
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.index = index
+
+    @staticmethod
+    def _root_thread(config) -> Optional[str]:
+        configurable = config["configurable"]
+        if configurable.get("checkpoint_ns", ""):
+            return None
+        return configurable["thread_id"]
+
+    def _track_put(self, config) -> None:
+        # A new checkpoint means the thread got past its interrupt.
+        if (thread_id := self._root_thread(config)) is not None:
+            self.index.discard(thread_id)
+
+    def _track_writes(self, config, writes) -> None:
+        if (thread_id := self._root_thread(config)) is None:
+            return
+        for channel, value in writes:
+            if channel == INTERRUPT:
+                interrupts = value if isinstance(value, (list, tuple)) else [value]
+                payloads = [getattr(item, "value", item) for item in interrupts]
+                self.index.add(thread_id, payloads[0] if len(payloads) == 1 else payloads)
+
+    def get_tuple(self, config):
+        return self.saver.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = self.saver.put(config, checkpoint, metadata, new_versions)
+        self._track_put(config)
+        return next_config
+
+    def put_writes(self, config, writes, task_id, task_path: str = ""):
+        self.saver.put_writes(config, writes, task_id, task_path)
+        self._track_writes(config, writes)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.saver.delete_thread(thread_id)
+        self.index.discard(thread_id)
+
+    async def aget_tuple(self, config):
+        return await self.saver.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        async for checkpoint_tuple in self.saver.alist(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        next_config = await self.saver.aput(config, checkpoint, metadata, new_versions)
+        self._track_put(config)
+        return next_config
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = ""):
+        await self.saver.aput_writes(config, writes, task_id, task_path)
+        self._track_writes(config, writes)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.saver.adelete_thread(thread_id)
+        self.index.discard(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+
+# -----------------------------------------------
+# Resuming many threads concurrently
+# -----------------------------------------------
+
+class ResumeWorkerPool:
+    """Resumes interrupted threads with `Command(resume=...)`, `concurrency` at a time."""
+
+    def __init__(self, graph, index: PendingInterruptIndex, concurrency: int = 16) -> None:
+        self.graph = graph
+        self.index = index
+        self.concurrency = concurrency
+        # An asyncio.Semaphore belongs to one event loop; keep one per loop.
+        self.semaphores = weakref.WeakKeyDictionary()
+        self.semaphores_lock = threading.Lock()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self.semaphores_lock:
+            if loop not in self.semaphores:
+                self.semaphores[loop] = asyncio.Semaphore(self.concurrency)
+            return self.semaphores[loop]
+
+    async def resume(self, thread_id: str, value: Any):
+        """Resume one thread and return the graph's output for the turn.
+
+        If the thread interrupts again it is back in the index when this
+        returns; if resuming fails it is released for another agent. A
+        second resume of a thread that is still resuming raises
+        RuntimeError instead of answering the interrupt twice.
+        """
+        from langgraph.types import Command
+
+        self.index.start_resume(thread_id)
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            async with self._semaphore():
+                try:
+                    return await self.graph.ainvoke(Command(resume=value), config)
+                except Exception:
+                    self.index.release(thread_id)
+                    raise
+        finally:
+            self.index.end_resume(thread_id)
+
+    async def resume_many(self, resumes: dict) -> dict:
+        """Resume every thread in {thread_id: value}; failures are returned, not raised."""
+        results = await asyncio.gather(
+            *(self.resume(thread_id, value) for thread_id, value in resumes.items()),
+            return_exceptions=True,
+        )
+        return dict(zip(resumes, results))
@@ -0,0 +1,143 @@
+# ************************************************
+# Chat models backed by shared keep-alive connection pools
+# ************************************************
+
+# Every ChatOpenAI / ChatGroq normally builds its own HTTP client, so each
+# worker pays a TCP + TLS handshake on its first request and bursts open
+# and close connections. The models handed out here share one httpx
+# client (sync and async) per pool configuration:
+#
+#   llm = chat_openai("gpt-4o-mini")
+#   model = chat_groq("llama-3.3-70b-versatile", pool=PoolConfig(max_connections=200))
+#   prewarm()          # at startup: open the connections before traffic arrives
+#   await aprewarm()   # same for the async client, inside the serving event loop
+#
+# httpx.AsyncClient connections belong to the event loop that opened them,
+# so use the async side from one long-running loop per process.
+#
+# `python benchmark_http_pool.py` compares per-model clients with the
+# shared, pre-warmed pool against a local OpenAI-compatible stub server.
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Size and lifetime of a shared connection pool."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    timeout: float = 60.0
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+DEFAULT_POOL = PoolConfig()
+
+_lock = threading.Lock()
+_clients: dict = {}
+
+
+def http_clients(pool: PoolConfig = DEFAULT_POOL) -> tuple[httpx.Client, httpx.AsyncClient]:
+    """The shared (sync, async) httpx clients for `pool`."""
+    with _lock:
+        if pool not in _clients:
+            _clients[pool] = (
+                httpx.Client(limits=pool.limits(), timeout=pool.timeout),
+                httpx.AsyncClient(limits=pool.limits(), timeout=pool.timeout),
+            )
+        return _clients[pool]
+
+
+# -----------------------------------------------
+# Model factories
+# -----------------------------------------------
+
+def chat_openai(model: str = "gpt-4o-mini", pool: PoolConfig = DEFAULT_POOL, **kwargs):
+    """ChatOpenAI using the shared connection pool."""
+    from langchain_openai import ChatOpenAI
+
+    client, async_client = http_clients(pool)
+    return ChatOpenAI(model=model, http_client=client, http_async_client=async_client, **kwargs)
+
+
+def chat_groq(model: str = "llama-3.3-70b-versatile", pool: PoolConfig = DEFAULT_POOL, **kwargs):
+    """ChatGroq using the shared connection pool."""
+    from langchain_groq import ChatGroq
+
+    client, async_client = http_clients(pool)
+    return ChatGroq(model=model, http_client=client, http_async_client=async_client, **kwargs)
+
+
+# -----------------------------------------------
+# Pre-warming
+# -----------------------------------------------
+
+def default_base_urls() -> list[str]:
+    return [
+        os.getenv("OPENAI_API_BASE") or os.getenv("OPENAI_BASE_URL") or OPENAI_BASE_URL,
+        os.getenv("GROQ_API_BASE") or GROQ_BASE_URL,
+    ]
+
+
+def prewarm(base_urls: Optional[list] = None, connections: int = 4, pool: PoolConfig = DEFAULT_POOL) -> int:
+    """Open `connections` keep-alive connections to every base URL.
+
+    Any HTTP response (even 401/404) leaves a warm connection in the pool;
+    unreachable hosts are skipped. Returns the number of requests that got
+    a response.
+    """
+    client, _ = http_clients(pool)
+    connections = min(connections, pool.max_keepalive_connections)
+
+    def touch(url: str) -> bool:
+        try:
+            client.get(url)
+            return True
+        except httpx.HTTPError:
+            return False
+
+    # Concurrent requests, otherwise they would all reuse one connection.
+    urls = [url for url in base_urls or default_base_urls() for _ in range(connections)]
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        return sum(executor.map(touch, urls))
+
+
+async def aprewarm(base_urls: Optional[list] = None, connections: int = 4, pool: PoolConfig = DEFAULT_POOL) -> int:
+    """prewarm() for the async client; call it from the serving event loop."""
+    _, async_client = http_clients(pool)
+    connections = min(connections, pool.max_keepalive_connections)
+
+    async def touch(url: str) -> bool:
+        try:
+            await async_client.get(url)
+            return True
+        except httpx.HTTPError:
+            return False
+
+    urls = [url for url in base_urls or default_base_urls() for _ in range(connections)]
+    return sum(await asyncio.gather(*(touch(url) for url in urls)))
+
+
+def close() -> None:
+    """Close every shared client (sync ones only; async ones close with their loop)."""
+    with _lock:
+        for client, _ in _clients.values():
+            client.close()
+        _clients.clear()
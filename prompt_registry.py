@@ -0,0 +1,161 @@
+# ************************************************
+# Local prompt registry: vendored hub prompts loaded from disk
+# ************************************************
+
+# `hub.pull("hwchase17/react")` is a network round trip on every start,
+# and it fails when offline. The registry keeps pulled prompts under
+# prompts/ (one JSON bundle per prompt: serialized prompt, hub commit,
+# sha256), so startup only reads a file:
+#
+#   prompt_template = load_prompt("hwchase17/react")
+#
+# The hub is only contacted when asked to:
+#
+#   python prompt_registry.py pull hwchase17/react          # vendor / refresh
+#   python prompt_registry.py pull hwchase17/react:<commit> # pin a commit
+#   python prompt_registry.py list                          # what is vendored
+#
+# Commit the bundles with the code, so every worker loads the same prompt.
+# A bundle whose content no longer matches its sha256 is refused.
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
+from typing import Optional
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.load import dumpd, load
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+
+def _split(name: str) -> tuple[str, Optional[str]]:
+    """"owner/repo:commit" -> ("owner/repo", "commit")."""
+    repo, _, commit = name.partition(":")
+    return repo, commit or None
+
+
+def content_hash(serialized: dict) -> str:
+    return hashlib.sha256(json.dumps(serialized, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class PromptRegistry:
+    """Prompts vendored to `directory`, cached in memory once loaded."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory or os.getenv("PROMPTS_DIR") or PROMPTS_DIR
+        self.lock = threading.Lock()
+        self.cache: dict = {}
+
+    def path(self, repo: str) -> str:
+        return os.path.join(self.directory, repo.replace("/", "__") + ".json")
+
+    # -----------------------------------------------
+    # Loading (no network)
+    # -----------------------------------------------
+
+    def bundle(self, repo: str) -> dict:
+        path = self.path(repo)
+        if not os.path.exists(path):
+            raise LookupError(
+                f"Prompt {repo!r} is not vendored in {self.directory}; "
+                f"run `python prompt_registry.py pull {repo}` once."
+            )
+        with open(path, encoding="utf-8") as f:
+            bundle = json.load(f)
+        if content_hash(bundle["prompt"]) != bundle["sha256"]:
+            raise ValueError(f"{path} does not match its sha256; pull {repo!r} again.")
+        return bundle
+
+    def get(self, name: str):
+        """The vendored prompt `name` ("owner/repo" or "owner/repo:commit")."""
+        repo, commit = _split(name)
+        with self.lock:
+            if repo not in self.cache:
+                bundle = self.bundle(repo)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", LangChainBetaWarning)
+                    # Bundles only hold prompt templates: refuse anything outside langchain_core.
+                    prompt = load(bundle["prompt"], allowed_objects="core")
+                self.cache[repo] = (bundle.get("commit"), prompt)
+            vendored, prompt = self.cache[repo]
+        if commit is not None and vendored != commit:
+            raise LookupError(f"Prompt {repo!r} is vendored at commit {vendored}, not {commit}; pull {name!r}.")
+        return prompt
+
+    def list(self) -> list[dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        bundles = []
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith(".json"):
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    bundle = json.load(f)
+                bundles.append({key: bundle.get(key) for key in ("name", "commit", "sha256", "pulled_at")})
+        return bundles
+
+    # -----------------------------------------------
+    # Refreshing from the hub (explicit only)
+    # -----------------------------------------------
+
+    def save(self, repo: str, prompt, commit: Optional[str] = None) -> dict:
+        serialized = dumpd(prompt)
+        bundle = {
+            "name": repo,
+            "commit": commit,
+            "sha256": content_hash(serialized),
+            "pulled_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "prompt": serialized,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(repo)
+        # Write then rename, so a worker starting meanwhile never reads half a file.
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(bundle, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(path + ".tmp", path)
+        with self.lock:
+            self.cache[repo] = (commit, prompt)
+        return bundle
+
+    def pull(self, name: str) -> dict:
+        """Pull `name` from the hub and vendor it, replacing any older bundle."""
+        from langchain import hub
+
+        repo, pinned = _split(name)
+        prompt = hub.pull(name)
+        commit = (prompt.metadata or {}).get("lc_hub_commit_hash") or pinned
+        return self.save(repo, prompt, commit)
+
+
+_default = PromptRegistry()
+
+
+def load_prompt(name: str):
+    """The vendored prompt `name` from the default registry (prompts/)."""
+    return _default.get(name)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    pulling = commands.add_parser("pull", help="vendor (or refresh) prompts from the hub")
+    pulling.add_argument("names", nargs="+", help="owner/repo or owner/repo:commit")
+    commands.add_parser("list", help="show vendored prompts")
+    args = parser.parse_args()
+
+    if args.command == "pull":
+        for name in args.names:
+            bundle = _default.pull(name)
+            print(f"{bundle['name']}  commit={bundle['commit']}  sha256={bundle['sha256'][:12]}")
+    else:
+        for bundle in _default.list():
+            print(f"{bundle['name']}  commit={bundle['commit']}  sha256={bundle['sha256'][:12]}  pulled_at={bundle['pulled_at']}")
+
+
+if __name__ == "__main__":
+    main()
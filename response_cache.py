@@ -0,0 +1,124 @@
+# ************************************************
+# Exact-match response cache for chat models
+# ************************************************
+
+# Plugs into the `cache=` field every LangChain chat model has, so it sits
+# right in front of the provider call of a `prompt | model | parser` chain:
+#
+#   model = ChatOpenAI(model="gpt-4o-mini", cache=ResponseCache(ttl=3600))
+#
+# LangChain builds the key from the rendered message list (`prompt`) and
+# the model parameters (`llm_string`). Entries live in an in-memory LRU
+# and, when `path` is given, in a SQLite file shared across restarts.
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+
+class ResponseCache(BaseCache):
+    """Two-tier (LRU memory + optional SQLite disk) cache with a TTL."""
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, created_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _remember(self, key: str, created_at: float, value: RETURN_VAL_TYPE) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    # -----------------------------------------------
+    # BaseCache API
+    # -----------------------------------------------
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            if (entry := self._memory.get(key)) is not None:
+                created_at, value = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[0]):
+                    value = loads(row[1])
+                    self._remember(key, row[0], value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, return_val)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, created_at, value) VALUES (?, ?, ?)",
+                    (key, created_at, dumps(return_val)),
+                )
+                self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    # -----------------------------------------------
+    # Counters
+    # -----------------------------------------------
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+        }
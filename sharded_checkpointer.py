@@ -0,0 +1,277 @@
+# ************************************************
+# Checkpoints sharded across several stores by thread_id
+# ************************************************
+
+# Every thread ("abc123", "xyz123", "123", ...) normally goes into one
+# checkpointer, so all writers queue on its lock (and, for SQLite, on one
+# database file). ShardedCheckpointSaver spreads threads over N backing
+# checkpointers with the consistent-hash ring of hash_ring.py:
+#
+#   memory = ShardedCheckpointSaver({
+#       f"shard-{n}": SqliteCheckpointSaver(f"checkpoints-{n}.sqlite") for n in range(4)
+#   })
+#   graph = graph_builder.compile(checkpointer=memory)
+#
+# Each shard has its own lock, so writers to threads on different shards
+# never wait on each other. `add_shard()` moves only the threads the new
+# shard takes over (about 1/(N+1) of them), copying their checkpoints and
+# pending writes before the ring switches.
+#
+#   python sharded_checkpointer.py --shards 1,2,4 --writers 16
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, CheckpointTuple
+
+from hash_ring import HashRing
+
+
+class ShardedCheckpointSaver(BaseCheckpointSaver):
+    """Routes every thread_id to one of several checkpointers by consistent hash."""
+
+    def __init__(self, shards: dict, replicas: int = 100) -> None:
+        if not shards:
+            raise ValueError("ShardedCheckpointSaver needs at least one shard")
+        first = next(iter(shards.values()))
+        super().__init__(serde=first.serde)
+        self.shards = dict(shards)
+        self.locks = {name: threading.RLock() for name in self.shards}
+        self.ring = HashRing(self.shards, replicas=replicas)
+
+    # -----------------------------------------------
+    # Routing
+    # -----------------------------------------------
+
+    @staticmethod
+    def _thread_id(config) -> str:
+        return str(config["configurable"]["thread_id"])
+
+    @contextmanager
+    def _shard(self, thread_id: str) -> Iterator[BaseCheckpointSaver]:
+        """The shard owning `thread_id`, held under that shard's lock."""
+        while True:
+            name = self.ring.get(thread_id)
+            lock = self.locks[name]
+            with lock:
+                # add_shard() may have moved the thread while we waited.
+                if self.ring.get(thread_id) == name:
+                    yield self.shards[name]
+                    return
+
+    def shard_for(self, thread_id: str) -> str:
+        return self.ring.get(str(thread_id))
+
+    # -----------------------------------------------
+    # Checkpointer API
+    # -----------------------------------------------
+
+    def get_tuple(self, config) -> Optional[CheckpointTuple]:
+        with self._shard(self._thread_id(config)) as shard:
+            return shard.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None) -> Iterator[CheckpointTuple]:
+        if config is not None and "thread_id" in config.get("configurable", {}):
+            with self._shard(self._thread_id(config)) as shard:
+                tuples = list(shard.list(config, filter=filter, before=before, limit=limit))
+            yield from tuples
+            return
+        # No thread: every shard, one at a time.
+        for name, shard in list(self.shards.items()):
+            with self.locks[name]:
+                tuples = list(shard.list(config, filter=filter, before=before, limit=limit))
+            for checkpoint_tuple in tuples:
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield checkpoint_tuple
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._shard(self._thread_id(config)) as shard:
+            return shard.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        with self._shard(self._thread_id(config)) as shard:
+            shard.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._shard(str(thread_id)) as shard:
+            shard.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return next(iter(self.shards.values())).get_next_version(current, channel)
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # -----------------------------------------------
+    # Adding shards
+    # -----------------------------------------------
+
+    @staticmethod
+    def _thread_ids(shard: BaseCheckpointSaver) -> set:
+        """Every thread_id stored in `shard`, without deserializing checkpoints
+        where the store can tell (SqliteCheckpointSaver, MemorySaver)."""
+        if hasattr(shard, "thread_ids"):
+            return set(shard.thread_ids())
+        if isinstance(getattr(shard, "storage", None), dict):
+            # MemorySaver: thread_id -> checkpoint_ns -> checkpoints (reads may leave empty entries).
+            return {thread_id for thread_id, namespaces in shard.storage.items() if any(namespaces.values())}
+        return {t.config["configurable"]["thread_id"] for t in shard.list(None)}
+
+    @staticmethod
+    def _task_paths(shard: BaseCheckpointSaver, config) -> dict:
+        """task_id -> task_path of the pending writes at `config`, where the
+        store keeps them (CheckpointTuple.pending_writes does not)."""
+        if hasattr(shard, "task_paths"):
+            return shard.task_paths(config)
+        writes = getattr(shard, "writes", None)
+        if isinstance(writes, dict):
+            # MemorySaver: (thread_id, ns, checkpoint_id) -> {(task_id, idx): (task_id, channel, value, task_path)}
+            configurable = config["configurable"]
+            key = (configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"])
+            return {write[0]: write[3] for write in writes.get(key, {}).values()}
+        return {}
+
+    @classmethod
+    def _copy_thread(cls, source: BaseCheckpointSaver, target: BaseCheckpointSaver, thread_id: str) -> int:
+        """Copy every checkpoint (oldest first) and pending write of a thread."""
+        tuples = list(source.list({"configurable": {"thread_id": thread_id}}))
+        for checkpoint_tuple in reversed(tuples):
+            config = checkpoint_tuple.config["configurable"]
+            parent = (checkpoint_tuple.parent_config or {}).get("configurable", {})
+            checkpoint = checkpoint_tuple.checkpoint
+            target.put(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": config.get("checkpoint_ns", ""),
+                        "checkpoint_id": parent.get("checkpoint_id"),
+                    }
+                },
+                checkpoint,
+                checkpoint_tuple.metadata,
+                # Every channel version, so stores that keep blobs per version get them all.
+                dict(checkpoint["channel_versions"]),
+            )
+            writes_by_task = defaultdict(list)
+            for task_id, channel, value in checkpoint_tuple.pending_writes or []:
+                writes_by_task[task_id].append((channel, value))
+            task_paths = cls._task_paths(source, checkpoint_tuple.config) if writes_by_task else {}
+            for task_id, writes in writes_by_task.items():
+                target.put_writes(checkpoint_tuple.config, writes, task_id, task_paths.get(task_id, ""))
+        return len(tuples)
+
+    def add_shard(self, name: str, saver: BaseCheckpointSaver) -> int:
+        """Add a shard and move the threads it now owns; returns the number moved.
+
+        Writers wait while threads are copied (every shard's lock is held),
+        then the ring switches and the moved threads are deleted from their
+        old shards where the store supports delete_thread(). Thread ids are
+        enumerated without loading checkpoints where the store allows it,
+        so the pause grows with the moved threads, not with all the data.
+        """
+        if name in self.shards:
+            raise ValueError(f"Shard {name!r} already exists")
+        ring = HashRing(self.ring.nodes, replicas=self.ring.replicas)
+        ring.add(name)
+        lock = threading.RLock()
+        held = [self.locks[old] for old in sorted(self.locks)] + [lock]
+        for shard_lock in held:
+            shard_lock.acquire()
+        try:
+            moved = []
+            for old, shard in self.shards.items():
+                for thread_id in self._thread_ids(shard):
+                    if ring.get(str(thread_id)) == name:
+                        self._copy_thread(shard, saver, thread_id)
+                        moved.append((shard, thread_id))
+            self.shards[name] = saver
+            self.locks[name] = lock
+            self.ring = ring
+            for shard, thread_id in moved:
+                try:
+                    shard.delete_thread(thread_id)
+                except NotImplementedError:
+                    pass
+            return len(moved)
+        finally:
+            for shard_lock in reversed(held):
+                shard_lock.release()
+
+
+# -----------------------------------------------
+# Write throughput by shard count
+# -----------------------------------------------
+
+def benchmark(shard_counts: list, writers: int, writes: int, threads: int, commit_every: int) -> None:
+    from langgraph.checkpoint.base import empty_checkpoint
+
+    from sqlite_checkpointer import SqliteCheckpointSaver
+
+    print(f"{'shards':>6} {'writes':>8} {'seconds':>8} {'writes/s':>10}")
+    for count in shard_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            saver = ShardedCheckpointSaver(
+                {
+                    f"shard-{n}": SqliteCheckpointSaver(
+                        os.path.join(directory, f"{n}.sqlite"), commit_every=commit_every
+                    )
+                    for n in range(count)
+                }
+            )
+
+            def writer(index: int) -> None:
+                config = {"configurable": {"thread_id": f"thread-{index % threads}", "checkpoint_ns": ""}}
+                for _ in range(writes):
+                    checkpoint = empty_checkpoint()
+                    checkpoint["channel_values"] = {"messages": ["x" * 512]}
+                    config = saver.put(config, checkpoint, {"source": "loop", "step": 0}, {})
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=writers) as executor:
+                list(executor.map(writer, range(writers)))
+            seconds = time.perf_counter() - started
+            for shard in saver.shards.values():
+                shard.close()
+        print(f"{count:>6} {writers * writes:>8} {seconds:>8.2f} {writers * writes / seconds:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", default="1,2,4", help="comma-separated shard counts")
+    parser.add_argument("--writers", type=int, default=16, help="concurrent writer threads")
+    parser.add_argument("--writes", type=int, default=200, help="checkpoints per writer")
+    parser.add_argument("--threads", type=int, default=64, help="distinct thread_ids")
+    parser.add_argument("--commit-every", type=int, default=1, help="SQLite commit batching (1: every write durable)")
+    args = parser.parse_args()
+    benchmark([int(n) for n in args.shards.split(",")], args.writers, args.writes, args.threads, args.commit_every)
+
+
+if __name__ == "__main__":
+    main()
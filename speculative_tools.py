@@ -0,0 +1,193 @@
+# ************************************************
+# Speculative tool dispatch for the Support ChatBot
+# ************************************************
+
+# Normally the tools node starts only once the chatbot node holds the
+# whole AIMessage. In speculative mode the chatbot node streams the
+# model's output instead and, as soon as one tool call's arguments are
+# complete JSON, starts that call on a thread pool while the model is
+# still emitting further calls or text. The tools node then picks up the
+# running (or finished) calls by tool_call_id and only runs what was not
+# dispatched yet.
+#
+#   dispatcher = SpeculativeDispatcher([search])
+#   graph_builder.add_node("chatbot", make_speculative_chatbot(llm_with_tools, dispatcher))
+#   graph_builder.add_node("tools", SpeculativeToolNode([search], dispatcher))
+#
+# Only pass read-only tools (like search) to the dispatcher: a call may
+# start before the AIMessage that requests it is checkpointed. Tools that
+# call interrupt() (human_assistance) must run inside the tools node.
+
+import asyncio
+import contextvars
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.messages.utils import message_chunk_to_message
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+
+from tool_node import BasicToolNode
+
+
+class SpeculativeDispatcher:
+    """Starts tool calls early and hands their futures to the tools node."""
+
+    def __init__(self, tools: list, max_workers: int = 8, max_pending: int = 1024) -> None:
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative-tool")
+        self.lock = threading.Lock()
+        # tool_call_id -> (args, future), oldest first
+        self.pending: OrderedDict = OrderedDict()
+        self.dispatched = 0
+        self.reused = 0
+
+    def dispatch(self, tool_call: dict) -> None:
+        tool = self.tools_by_name.get(tool_call["name"])
+        if tool is None:
+            return
+        with self.lock:
+            if tool_call["id"] in self.pending:
+                return
+            future = self.executor.submit(contextvars.copy_context().run, tool.invoke, tool_call["args"])
+            self.pending[tool_call["id"]] = (tool_call["args"], future)
+            self.dispatched += 1
+            # Calls nobody collected (e.g. the run failed) must not pile up.
+            while len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)[1][1].cancel()
+
+    def take(self, tool_call: dict) -> Optional[Future]:
+        """The future started for `tool_call`, if its arguments still match."""
+        with self.lock:
+            args, future = self.pending.pop(tool_call["id"], (None, None))
+        if future is None:
+            return None
+        if args != tool_call["args"]:
+            future.cancel()
+            return None
+        self.reused += 1
+        return future
+
+    def watch(self, gathered: AIMessageChunk, started: set) -> None:
+        """Dispatch every call in `gathered` whose arguments became complete."""
+        for tool_call_chunk in gathered.tool_call_chunks:
+            tool_call_id = tool_call_chunk.get("id")
+            name = tool_call_chunk.get("name")
+            args = tool_call_chunk.get("args") or ""
+            if not tool_call_id or not name or tool_call_id in started:
+                continue
+            if not args.rstrip().endswith("}"):
+                continue
+            try:
+                parsed = json.loads(args)
+            except ValueError:
+                continue
+            if isinstance(parsed, dict):
+                started.add(tool_call_id)
+                self.dispatch({"name": name, "args": parsed, "id": tool_call_id})
+
+
+# -----------------------------------------------
+# The streaming 'chatbot' node
+# -----------------------------------------------
+
+def make_speculative_chatbot(
+    llm,
+    dispatcher: SpeculativeDispatcher,
+    single_tool_call: bool = False,
+    max_inflight: Optional[int] = None,
+):
+    """A 'chatbot' node that streams `llm` and dispatches tool calls early.
+
+    `max_inflight` caps the concurrent model streams of the async path, as
+    in graph_registry.make_chatbot.
+    """
+    # One semaphore per event loop: asyncio primitives bind to one loop.
+    semaphores = weakref.WeakKeyDictionary()
+    semaphores_lock = threading.Lock()
+
+    def loop_semaphore() -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with semaphores_lock:
+            if loop not in semaphores:
+                semaphores[loop] = asyncio.Semaphore(max_inflight)
+            return semaphores[loop]
+
+    def check(gathered):
+        # A second, non-streaming call would be billed twice for one turn.
+        if gathered is None:
+            raise ValueError("The model stream returned no chunks")
+        message = message_chunk_to_message(gathered)
+        # When tools can interrupt, parallel tool calls would be repeated on resume.
+        if single_tool_call:
+            assert len(message.tool_calls) <= 1
+        return {"messages": [message]}
+
+    # `config` carries the graph's callbacks and thread_id into the model call.
+    def chatbot(state: dict, config: RunnableConfig):
+        gathered, started = None, set()
+        for chunk in llm.stream(state["messages"], config):
+            gathered = chunk if gathered is None else gathered + chunk
+            dispatcher.watch(gathered, started)
+        return check(gathered)
+
+    async def achatbot(state: dict, config: RunnableConfig):
+        if not max_inflight:
+            return await astream_reply(state, config)
+        async with loop_semaphore():
+            return await astream_reply(state, config)
+
+    async def astream_reply(state: dict, config: RunnableConfig):
+        gathered, started = None, set()
+        async for chunk in llm.astream(state["messages"], config):
+            gathered = chunk if gathered is None else gathered + chunk
+            dispatcher.watch(gathered, started)
+        return check(gathered)
+
+    return RunnableLambda(chatbot, afunc=achatbot, name="chatbot")
+
+
+# -----------------------------------------------
+# The 'tools' node, reusing speculative calls
+# -----------------------------------------------
+
+class SpeculativeToolNode(BasicToolNode):
+    """BasicToolNode that first collects the calls the chatbot node already started."""
+
+    def __init__(self, tools: list, dispatcher: SpeculativeDispatcher, **kwargs) -> None:
+        super().__init__(tools, **kwargs)
+        self.dispatcher = dispatcher
+
+    def __call__(self, inputs: dict):
+        if messages := inputs.get("messages", []):
+            message = messages[-1]
+        else:
+            raise ValueError("No message found in input")
+        futures = {
+            tool_call["id"]: future
+            for tool_call in message.tool_calls
+            if (future := self.dispatcher.take(tool_call)) is not None
+        }
+        remaining = [tool_call for tool_call in message.tool_calls if tool_call["id"] not in futures]
+        if self._executor is None:
+            outputs = [self._run_tool(tool_call) for tool_call in remaining]
+        else:
+            outputs = self._run_concurrently(remaining)
+        by_id = {output.tool_call_id: output for output in outputs}
+        for tool_call in message.tool_calls:
+            if tool_call["id"] in futures:
+                timeout = self._timeout_for(tool_call["name"])
+                by_id[tool_call["id"]] = self._collect(tool_call, futures[tool_call["id"]], timeout)
+        return {"messages": [by_id[tool_call["id"]] for tool_call in message.tool_calls]}
+
+    def _collect(self, tool_call: dict, future: Future, timeout: Optional[float]):
+        try:
+            return self._tool_message(tool_call, future.result(timeout=timeout))
+        except FutureTimeoutError:
+            future.cancel()
+            return self._timeout_message(tool_call, timeout)
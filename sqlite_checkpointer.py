@@ -0,0 +1,400 @@
+# ************************************************
+# Durable SQLite checkpointer for LangGraph
+# ************************************************
+
+# A drop-in replacement for MemorySaver. Conversations survive restarts
+# and process RAM stays flat however many threads there are.
+#
+#   memory = SqliteCheckpointSaver("checkpoints.sqlite")
+#   graph = graph_builder.compile(checkpointer=memory)
+#
+# The database runs in WAL mode and commits are batched: writes become
+# durable after `commit_every` operations or `commit_interval` seconds,
+# whichever comes first, and always on `flush()` / `close()` / exit. A
+# timer commits a batch that stays open `commit_interval` seconds with no
+# further writes, so an idle saver never keeps its write lock and other
+# connections see its checkpoints.
+
+import asyncio
+import atexit
+import functools
+import random
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+# Channel that holds pending Sends (langgraph.constants.TASKS).
+TASKS = "__pregel_tasks"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoints_thread
+    ON checkpoints (thread_id, checkpoint_ns, checkpoint_id DESC);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+def _flush_if_alive(ref: weakref.ref) -> None:
+    saver = ref()
+    if saver is not None:
+        saver.flush()
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """A checkpointer that stores checkpoints in a SQLite database."""
+
+    def __init__(
+        self,
+        path: str = "checkpoints.sqlite",
+        *,
+        commit_every: int = 32,
+        commit_interval: float = 0.5,
+        timeout: float = 5.0,
+        serde=None,
+    ) -> None:
+        super().__init__(serde=serde)
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.lock = threading.RLock()
+        # `timeout` is how long a write waits for another process's lock.
+        self.conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        self._closed = False
+        self._timer: Optional[threading.Timer] = None
+        # A weak reference, so the exit hook and the timer do not keep the
+        # saver alive.
+        self._atexit = functools.partial(_flush_if_alive, weakref.ref(self))
+        atexit.register(self._atexit)
+
+    # -----------------------------------------------
+    # Batched commits
+    # -----------------------------------------------
+
+    def _maybe_commit(self) -> None:
+        self._uncommitted += 1
+        if (
+            self._uncommitted >= self.commit_every
+            or time.monotonic() - self._last_commit >= self.commit_interval
+        ):
+            self._commit()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.commit_interval, self._atexit)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _commit(self) -> None:
+        self.conn.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def flush(self) -> None:
+        """Commit every buffered write to disk."""
+        with self.lock:
+            self._timer = None
+            if not self._closed and self._uncommitted:
+                self._commit()
+
+    def close(self) -> None:
+        with self.lock:
+            if not self._closed:
+                self._commit()
+                self.conn.close()
+                self._closed = True
+                atexit.unregister(self._atexit)
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    # -----------------------------------------------
+    # Reading checkpoints
+    # -----------------------------------------------
+
+    def _load_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint))
+        if "pending_sends" in checkpoint and parent_checkpoint_id:
+            sends = self.conn.execute(
+                "SELECT type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ? AND channel = ? ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+            ).fetchall()
+            checkpoint["pending_sends"] = [self.serde.loads_typed(send) for send in sends]
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, channel, type_, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self.lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                # Served by idx_checkpoints_thread: a single index seek.
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._load_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY checkpoint_id DESC"
+        if limit is not None and not filter:
+            # Metadata filters run in Python; without one SQLite applies the limit.
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self.lock:
+            tuples = []
+            # Rows are read lazily, so a filtered list stops once `limit` match.
+            for thread_id, checkpoint_ns, *row in self.conn.execute(query, params):
+                if limit is not None and len(tuples) >= limit:
+                    break
+                checkpoint_tuple = self._load_tuple(thread_id, checkpoint_ns, tuple(row))
+                if filter and not all(
+                    checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()
+                ):
+                    continue
+                tuples.append(checkpoint_tuple)
+        yield from tuples
+
+    def thread_ids(self) -> set[str]:
+        """Every stored thread_id, without loading any checkpoint."""
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT DISTINCT thread_id FROM checkpoints")}
+
+    def task_paths(self, config: RunnableConfig) -> dict[str, str]:
+        """task_id -> task_path of the pending writes at `config`'s checkpoint."""
+        configurable = config["configurable"]
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT task_id, task_path FROM writes WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"]),
+            ).fetchall()
+        return dict(rows)
+
+    # -----------------------------------------------
+    # Writing checkpoints
+    # -----------------------------------------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(metadata)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, type, checkpoint, metadata_type, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized_checkpoint,
+                    metadata_type,
+                    serialized_metadata,
+                ),
+            )
+            self._maybe_commit()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized_value = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    task_id,
+                    task_path,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    type_,
+                    serialized_value,
+                )
+            )
+        # Special channels (errors, interrupts) overwrite; regular writes are idempotent.
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        with self.lock:
+            self.conn.executemany(
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, "
+                "task_path, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._maybe_commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of `thread_id`."""
+        with self.lock:
+            self.conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (str(thread_id),))
+            self.conn.execute("DELETE FROM writes WHERE thread_id = ?", (str(thread_id),))
+            self._maybe_commit()
+
+    def get_next_version(self, current: Optional[str], channel) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
+
+    # -----------------------------------------------
+    # Async API, so the saver also works with astream / ainvoke
+    # -----------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
@@ -0,0 +1,215 @@
+# ************************************************
+# Token streaming over HTTP (Server-Sent Events)
+# ************************************************
+
+# Streams the AIMessage chunks of the support chatbot graph to HTTP
+# clients as they are generated, using `stream_mode="messages"` like
+# Simple_Chatbot_ChatHistory_Streaming.py does on the console.
+#
+#   python sse_chat_server.py --port 8080 --tools
+#   curl -N -d '{"message": "Hi there!", "thread_id": "1"}' localhost:8080/chat
+#   curl localhost:8080/metrics
+#
+# Every POST /chat answers with `text/event-stream`: one `data:` event
+# per token chunk, then `event: done`. Per connection:
+#
+# - tokens pass through a bounded queue, so a slow reader holds at most
+#   `--queue-size` chunks, and a client that stops reading for
+#   `--write-timeout` seconds is dropped;
+# - when the client disconnects the graph run is cancelled, which
+#   cancels the upstream LLM call;
+# - the time from request to first token sent is recorded in
+#   `langgraph_stream_ttft_seconds` (GET /metrics, Prometheus text).
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from instrumentation import GraphMetrics
+
+DONE = object()
+
+
+class StreamError:
+    def __init__(self, error: BaseException) -> None:
+        self.message = f"{type(error).__name__}: {error}"
+
+
+# -----------------------------------------------
+# Producer: graph.astream -> bounded queue
+# -----------------------------------------------
+
+async def produce_tokens(graph, user_input: str, thread_id: str, queue: asyncio.Queue):
+    """Put the content of every AI message chunk on `queue`, then DONE."""
+    from langchain_core.messages import AIMessage
+
+    config = {"configurable": {"thread_id": thread_id}}
+    try:
+        async for chunk, metadata in graph.astream(
+            {"messages": [{"role": "user", "content": user_input}]}, config, stream_mode="messages"
+        ):
+            if isinstance(chunk, AIMessage) and isinstance(chunk.content, str) and chunk.content:
+                await queue.put(chunk.content)
+        await queue.put(DONE)
+    except Exception as error:
+        await queue.put(StreamError(error))
+
+
+def sse_event(data: dict, event: str | None = None) -> bytes:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n".encode()
+
+
+# -----------------------------------------------
+# The HTTP server
+# -----------------------------------------------
+
+class TokenStreamServer:
+    """A minimal HTTP/1.1 server streaming graph tokens as Server-Sent Events."""
+
+    def __init__(
+        self,
+        graph,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        queue_size: int = 64,
+        write_timeout: float = 30.0,
+        metrics: GraphMetrics | None = None,
+    ) -> None:
+        self.graph = graph
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.write_timeout = write_timeout
+        self.metrics = metrics or GraphMetrics()
+        self.active_streams = 0
+        self.cancelled_streams = 0
+
+    async def read_request(self, reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise ConnectionError("empty request")
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        return request_line[0].upper(), request_line[1], body
+
+    async def respond(self, writer: asyncio.StreamWriter, status: str, body: str, content_type: str):
+        payload = body.encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, path, body = await self.read_request(reader)
+            if method == "GET" and path == "/metrics":
+                await self.respond(writer, "200 OK", self.metrics.to_prometheus(), "text/plain; version=0.0.4")
+            elif method == "POST" and path == "/chat":
+                try:
+                    request = json.loads(body or b"{}")
+                    user_input = request["message"]
+                except (ValueError, KeyError, TypeError):
+                    await self.respond(writer, "400 Bad Request", '{"error": "expected {\\"message\\": ...}"}', "application/json")
+                else:
+                    await self.stream_chat(reader, writer, user_input, request.get("thread_id") or uuid.uuid4().hex)
+            else:
+                await self.respond(writer, "404 Not Found", '{"error": "not found"}', "application/json")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def stream_chat(self, reader, writer, user_input: str, thread_id: str):
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        producer = asyncio.create_task(produce_tokens(self.graph, user_input, thread_id, queue))
+        # The request body has been read, so EOF on the socket means the client went away.
+        disconnected = asyncio.create_task(reader.read(1))
+        first_token = True
+        self.active_streams += 1
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                + f"X-Thread-Id: {thread_id}\r\nConnection: close\r\n\r\n".encode()
+            )
+            while True:
+                next_item = asyncio.ensure_future(queue.get())
+                await asyncio.wait({next_item, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_item.done():
+                    next_item.cancel()
+                    raise ConnectionError("client disconnected")
+                item = next_item.result()
+                if item is DONE:
+                    writer.write(sse_event({"thread_id": thread_id}, event="done"))
+                    break
+                if isinstance(item, StreamError):
+                    writer.write(sse_event({"error": item.message}, event="error"))
+                    break
+                writer.write(sse_event({"content": item}))
+                await asyncio.wait_for(writer.drain(), self.write_timeout)
+                if first_token:
+                    first_token = False
+                    seconds = time.perf_counter() - started
+                    self.metrics.observe("langgraph_stream_ttft_seconds", {"route": "/chat"}, seconds, thread_id)
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            self.cancelled_streams += 1
+        finally:
+            self.active_streams -= 1
+            producer.cancel()
+            disconnected.cancel()
+            await asyncio.gather(producer, disconnected, return_exceptions=True)
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f"Streaming tokens on http://{self.host}:{self.port}/chat")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-inflight", type=int, default=32)
+    parser.add_argument("--queue-size", type=int, default=64, help="token chunks buffered per connection")
+    parser.add_argument("--write-timeout", type=float, default=30.0, help="drop clients that stop reading")
+    parser.add_argument("--tools", action="store_true", help="enable Tavily search")
+    parser.add_argument("--db", help="SQLite file for durable checkpoints (default: in memory)")
+    parser.add_argument("--trace", help="append every turn to this JSONL file (see trace_replay.py)")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from async_chatbot_server import build_async_graph
+    from model_provider import aprewarm
+
+    # With --tools every session shares the registry's search tool: one
+    # dispatcher, so concurrent searches share a capped set of connections
+    # instead of bursting into 429s.
+    graph = build_async_graph(args.tools, args.db, args.max_inflight)
+    if args.trace:
+        from trace_replay import TraceRecorder, record
+
+        graph = record(graph, TraceRecorder(args.trace, graph_name="tools" if args.tools else "basic"))
+
+    async def run():
+        await aprewarm()
+        server = TokenStreamServer(
+            graph, args.host, args.port, queue_size=args.queue_size, write_timeout=args.write_timeout
+        )
+        await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# ************************************************
+# Fast cold start helpers
+# ************************************************
+
+# Rendering a graph with draw_mermaid_png() goes through a remote service
+# by default and can stall startup on a network timeout, so it is opt-in:
+#
+#   RENDER_GRAPH=png      render the PNG (remote service) and display it
+#   RENDER_GRAPH=mermaid  print the Mermaid source (offline)
+#   RENDER_GRAPH=ascii    print an ASCII drawing (offline, needs grandalf)
+#
+# IPython itself is only imported when a PNG is actually displayed.
+
+import os
+
+
+def maybe_render_graph(graph) -> None:
+    """Draw `graph` only when RENDER_GRAPH asks for it."""
+    mode = os.getenv("RENDER_GRAPH", "").lower()
+    if not mode:
+        return
+    try:
+        if mode == "mermaid":
+            print(graph.get_graph().draw_mermaid())
+        elif mode == "ascii":
+            print(graph.get_graph().draw_ascii())
+        else:
+            from IPython.display import Image, display
+
+            display(Image(graph.get_graph().draw_mermaid_png()))
+    except Exception:
+        pass
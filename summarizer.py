@@ -0,0 +1,172 @@
+# ************************************************
+# Background conversation summarization
+# ************************************************
+
+# trim_messages / IncrementalTrimmer keep prompts small by dropping old
+# turns, which is why the bot forgets the user's name. BackgroundSummarizer
+# instead compacts the checkpointed history: once a thread's messages go
+# over `max_tokens`, a background job asks the model for a rolling summary
+# of the older turns and replaces them in the state with one summary
+# message, keeping the last `keep_last` messages as they are.
+#
+#   summarizer = BackgroundSummarizer(app, model, max_tokens=65, keep_last=4)
+#   output = summarizer.invoke({"messages": [...]}, config)
+#
+# The request path never waits for the summarization call. Turns and the
+# (fast) state update that swaps in the summary share a per-thread lock,
+# so a turn and a compaction never write the same thread at once, while
+# turns of different threads never wait for each other.
+#
+# Until a summary lands (or when summarizing fails) the history keeps
+# growing, so the model call should still trim what it sends, e.g. with
+# IncrementalTrimmer as a hard bound above `max_tokens`. `bounded()` does
+# that without ever trimming the summary itself.
+
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional
+
+from langchain_core.messages import HumanMessage, RemoveMessage, SystemMessage
+
+from incremental_trimmer import IncrementalTrimmer
+
+SUMMARY_NAME = "conversation_summary"
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below in a few sentences. Keep every fact "
+    "about the user (name, preferences, questions asked and answers given) "
+    "that later turns might need. If it starts with an earlier summary, "
+    "fold that summary into the new one."
+)
+
+
+def bounded(messages: list, trimmer) -> list:
+    """The leading system messages (instructions, the rolling summary), then
+    whatever `trimmer` keeps of the rest."""
+    head = 0
+    while head < len(messages) and isinstance(messages[head], SystemMessage):
+        head += 1
+    return [*messages[:head], *trimmer.invoke(messages[head:])]
+
+
+class BackgroundSummarizer:
+    """Replaces the older turns of long threads with a rolling summary, off the hot path."""
+
+    def __init__(
+        self,
+        graph,
+        model,
+        max_tokens: int,
+        keep_last: int = 4,
+        token_counter=None,
+        as_node: Optional[str] = None,
+        max_workers: int = 2,
+    ) -> None:
+        self.graph = graph
+        self.model = model
+        self.keep_last = keep_last
+        self.as_node = as_node
+        self.counter = IncrementalTrimmer(max_tokens, token_counter or model)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarizer")
+        self.lock = threading.Lock()
+        # Guards the counter's token cache, used by every caller of invoke().
+        self.counter_lock = threading.Lock()
+        # thread_id -> Lock, dropped once nobody holds or waits on it.
+        self.thread_locks = weakref.WeakValueDictionary()
+        self.in_flight: dict = {}
+        self.compactions = 0
+        self.failures = 0
+
+    def _thread_lock(self, thread_id: str) -> threading.Lock:
+        with self.lock:
+            lock = self.thread_locks.get(thread_id)
+            if lock is None:
+                lock = self.thread_locks[thread_id] = threading.Lock()
+            return lock
+
+    @staticmethod
+    def _thread_config(config: dict) -> dict:
+        return {"configurable": {"thread_id": config["configurable"]["thread_id"]}}
+
+    # -----------------------------------------------
+    # Hot path
+    # -----------------------------------------------
+
+    def invoke(self, inputs, config: dict):
+        """Run one turn of the graph, then schedule compaction if needed."""
+        with self._thread_lock(config["configurable"]["thread_id"]):
+            output = self.graph.invoke(inputs, config)
+        self.maybe_compact(config, output["messages"])
+        return output
+
+    def history_tokens(self, messages: list) -> int:
+        with self.counter_lock:
+            return self.counter.list_overhead + sum(self.counter.message_tokens(m) for m in messages)
+
+    def maybe_compact(self, config: dict, messages: Optional[list] = None) -> bool:
+        """Start a background compaction of the thread if it is over budget."""
+        thread_id = config["configurable"]["thread_id"]
+        if messages is None:
+            messages = self.graph.get_state(self._thread_config(config)).values.get("messages", [])
+        if self.history_tokens(messages) <= self.counter.max_tokens:
+            return False
+        with self.lock:
+            if thread_id in self.in_flight:
+                return False
+            self.in_flight[thread_id] = self.executor.submit(self._compact, self._thread_config(config))
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for the compactions in flight (e.g. before exiting)."""
+        with self.lock:
+            futures = list(self.in_flight.values())
+        wait(futures, timeout=timeout)
+
+    # -----------------------------------------------
+    # Background job
+    # -----------------------------------------------
+
+    def _split(self, messages: list) -> list:
+        """The messages to summarize: everything but leading system
+        messages and a tail of at least `keep_last` messages that starts
+        on a human message."""
+        start = 0
+        while start < len(messages) and isinstance(messages[start], SystemMessage) and messages[start].name != SUMMARY_NAME:
+            start += 1
+        cut = max(start, len(messages) - max(1, self.keep_last))
+        while cut > start and not isinstance(messages[cut], HumanMessage):
+            cut -= 1
+        return messages[start:cut]
+
+    def _compact(self, config: dict) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        try:
+            old = self._split(self.graph.get_state(config).values.get("messages", []))
+            if len(old) < 2:
+                return
+            summary = self.model.invoke(
+                [SystemMessage(content=SUMMARY_PROMPT), *old, HumanMessage(content="Write the summary now.")]
+            )
+            # The summary takes the id of the oldest message, so add_messages
+            # puts it in that message's place; the others are removed.
+            update = [
+                SystemMessage(
+                    content=f"Summary of the earlier conversation: {summary.content}",
+                    name=SUMMARY_NAME,
+                    id=old[0].id,
+                ),
+                *[RemoveMessage(id=message.id) for message in old[1:]],
+            ]
+            with self._thread_lock(thread_id):
+                current_ids = {m.id for m in self.graph.get_state(config).values.get("messages", [])}
+                if not all(message.id in current_ids for message in old):
+                    return
+                self.graph.update_state(config, {"messages": update}, as_node=self.as_node)
+            self.compactions += 1
+        except Exception:
+            # The next turn over budget schedules another attempt.
+            self.failures += 1
+        finally:
+            with self.lock:
+                self.in_flight.pop(thread_id, None)
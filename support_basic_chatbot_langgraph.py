@@ -49,12 +49,12 @@ graph = graph_builder.compile()
 # Let's Visualize the graph
 # -----------------------------------------------
 
-from IPython.display import Image, display
+# Rendering is opt-in (RENDER_GRAPH=png|mermaid|ascii) so startup never
+# waits on the remote Mermaid renderer.
 
-try:
-    display(Image (graph.get_graph().draw_mermaid_png()))
-except Exception:
-    pass
+from startup import maybe_render_graph
+
+maybe_render_graph(graph)
 
 
 # -----------------------------------------------
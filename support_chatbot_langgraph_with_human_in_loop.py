@@ -9,109 +9,48 @@ load_dotenv()
 
 
 # -----------------------------------------------
-# Build a Basic Chatbot
+# Build the Chatbot with Tools
 # -----------------------------------------------
 
-from typing import Annotated
-from typing_extensions import TypedDict
+# The chatbot / tools / route_tools wiring is shared with the other support
+# bots and lives in graph_registry.py (build_support_graph). get_graph()
+# builds and compiles it once per configuration, with one shared
+# ChatOpenAI(model="gpt-4o-mini"), Tavily search tool and bound llm_with_tools.
 
-from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
+# human_assistance=True adds the `human_assistance` tool, which calls
+# interrupt({"query": query}) and returns the human's "data". Because we
+# will be interrupting during tool execution, the chatbot node asserts
+# there is at most one tool call, to avoid repeating any tool invocations
+# when we resume.
 
-class State(TypedDict):
-    messages: Annotated[list, add_messages]
+from langgraph.types import Command
 
-graph_builder = StateGraph(state_schema=State)
 
-
-# -----------------------------------------------
-# Let's add a 'Chatbot' node
 # -----------------------------------------------
-
-from langchain_openai import ChatOpenAI
-
-llm = ChatOpenAI(model="gpt-4o-mini")
-
-
-# -----------------------------------------------
-# Enhancing the ChatBot with Tools
-# -----------------------------------------------
-
-from langchain_core.tools import tool
-from langgraph.types import Command, interrupt
-
-@tool
-def human_assistance(query:str) -> str:
-    """
-    Request assistance from a Human.
-    """
-    human_response = interrupt({"query" : query})
-    return human_response["data"]
-
-
-from langchain_community.tools.tavily_search import TavilySearchResults
-
-search = TavilySearchResults(max_results=2)
-tools = [search, human_assistance]
-
-llm_with_tools = llm.bind_tools(tools)
-
-def chatbot(state:State):
-    message =  llm_with_tools.invoke(state["messages"])
-
-    # Because we will be interrupting during tool execution,
-    # we disable parallel tool calling to avoid repeating any
-    # tool invocations when we resume.
-    assert len(message.tool_calls) <= 1
-    return {"messages" : [message]}
-
-graph_builder.add_node("chatbot", chatbot)
-
-
-# -----------------------------------------------
-# Let's use LangGraph's prebuilt ToolNode and tools_condition
+# Let's compile graph using checkpointer
 # -----------------------------------------------
 
-from langgraph.prebuilt import ToolNode, tools_condition
-
-tool_node = ToolNode(tools=tools)
-
-
-# -----------------------------------------------
-# Let's add graph nodes and edges
-# -----------------------------------------------
+# "sqlite:<path>" is SqliteCheckpointSaver, a drop-in MemorySaver that keeps
+# threads on disk
 
-graph_builder.add_node("tools", tool_node)
+from graph_registry import GraphOptions, get_graph
 
-graph_builder.add_conditional_edges(
-    "chatbot",
-    tools_condition,
+graph = get_graph(
+    GraphOptions(human_assistance=True, checkpointer="sqlite:support_chatbot_human_in_loop.sqlite")
 )
 
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_edge("tools", "chatbot")
-
-
-# -----------------------------------------------
-# Let's compile graph using checkpointer
-# -----------------------------------------------
-
-from langgraph.checkpoint.memory import MemorySaver
-
-memory = MemorySaver()
-graph = graph_builder.compile(checkpointer=memory)
+# The inputs below are fixed, so every run starts its demo threads afresh
+# instead of appending them to the threads stored by the previous run.
+graph.checkpointer.delete_thread("123")
 
 
 # -----------------------------------------------
 # Let's Visualize the graph
 # -----------------------------------------------
 
-from IPython.display import Image, display
+from startup import maybe_render_graph
 
-try:
-    display(Image (graph.get_graph().draw_mermaid_png()))
-except Exception:
-    pass
+maybe_render_graph(graph)
 
 
 # -----------------------------------------------
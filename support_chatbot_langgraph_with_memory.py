@@ -9,95 +9,41 @@ load_dotenv()
 
 
 # -----------------------------------------------
-# Build a Basic Chatbot
+# Build the Chatbot with Tools
 # -----------------------------------------------
 
-from typing import Annotated
-from typing_extensions import TypedDict
-
-from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
-
-class State(TypedDict):
-    messages: Annotated[list, add_messages]
-
-graph_builder = StateGraph(state_schema=State)
-
-
-# -----------------------------------------------
-# Let's add a 'Chatbot' node
-# -----------------------------------------------
-
-from langchain_openai import ChatOpenAI
-
-llm = ChatOpenAI(model="gpt-4o-mini")
-
-
-# -----------------------------------------------
-# Enhancing the ChatBot with Tools
-# -----------------------------------------------
+# The chatbot / tools / route_tools wiring is shared with the other support
+# bots and lives in graph_registry.py (build_support_graph). get_graph()
+# builds and compiles it once per configuration, with one shared
+# ChatOpenAI(model="gpt-4o-mini"), Tavily search tool and bound llm_with_tools.
+# tool_node="prebuilt" uses LangGraph's ToolNode.
 
 # TAVILY_API_KEY:  ········
 
-from langchain_community.tools.tavily_search import TavilySearchResults
-
-search = TavilySearchResults(max_results=2)
-tools = [search]
-
-# search.invoke("What's a 'node' in LangGraph?")
-
-llm_with_tools = llm.bind_tools(tools)
-
-def chatbot(state:State):
-    return {"messages":  [llm_with_tools.invoke(state["messages"])]}
-
-graph_builder.add_node("chatbot", chatbot)
-
-
-# -----------------------------------------------
-# Let's use LangGraph's prebuilt ToolNode and tools_condition
-# -----------------------------------------------
-
-from langgraph.prebuilt import ToolNode, tools_condition
-
-tool_node = ToolNode(tools=[search])
-
-
 # -----------------------------------------------
-# Let's add graph nodes and edges
+# Let's compile graph using checkpointer
 # -----------------------------------------------
 
-graph_builder.add_node("tools", tool_node)
-
-graph_builder.add_conditional_edges(
-    "chatbot",
-    tools_condition,
-)
-
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_edge("tools", "chatbot")
+# "sqlite:<path>" is SqliteCheckpointSaver, a drop-in MemorySaver that keeps
+# threads on disk
 
+from graph_registry import GraphOptions, get_graph
 
-# -----------------------------------------------
-# Let's compile graph using checkpointer
-# -----------------------------------------------
-
-from langgraph.checkpoint.memory import MemorySaver
+graph = get_graph(GraphOptions(checkpointer="sqlite:support_chatbot_memory.sqlite"))
 
-memory = MemorySaver()
-graph = graph_builder.compile(checkpointer=memory)
+# The inputs below are fixed, so every run starts its demo threads afresh
+# instead of appending them to the threads stored by the previous run.
+for thread_id in ["123", "234"]:
+    graph.checkpointer.delete_thread(thread_id)
 
 
 # -----------------------------------------------
 # Let's Visualize the graph
 # -----------------------------------------------
 
-from IPython.display import Image, display
+from startup import maybe_render_graph
 
-try:
-    display(Image (graph.get_graph().draw_mermaid_png()))
-except Exception:
-    pass
+maybe_render_graph(graph)
 
 
 # -----------------------------------------------
@@ -9,142 +9,39 @@ load_dotenv()
 
 
 # -----------------------------------------------
-# Build a Basic Chatbot
+# Build the Chatbot with Tools
 # -----------------------------------------------
 
-from typing import Annotated
-from typing_extensions import TypedDict
-
-from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
-
-class State(TypedDict):
-    messages: Annotated[list, add_messages]
-
-graph_builder = StateGraph(state_schema=State)
-
-
-# -----------------------------------------------
-# Let's add a 'Chatbot' node
-# -----------------------------------------------
-
-from langchain_openai import ChatOpenAI
-
-llm = ChatOpenAI(model="gpt-4o-mini")
-
-
-# -----------------------------------------------
-# Enhancing the ChatBot with Tools
-# -----------------------------------------------
+# The chatbot / tools / route_tools wiring is shared with the other support
+# bots and lives in graph_registry.py (build_support_graph). get_graph()
+# builds and compiles it once per configuration, with one shared
+# ChatOpenAI(model="gpt-4o-mini"), Tavily search tool and bound llm_with_tools.
 
 # TAVILY_API_KEY:  ········
 
-from langchain_community.tools.tavily_search import TavilySearchResults
-
-search = TavilySearchResults(max_results=2)
-tools = [search]
-
-# search.invoke("What's a 'node' in LangGraph?")
-
-llm_with_tools = llm.bind_tools(tools)
+# tool_node="speculative": the chatbot node streams the model's reply and
+# starts each search as soon as its arguments are complete JSON, while the
+# model is still generating (speculative_tools.py). The tools node, a
+# BasicToolNode, then collects the running calls, runs any others
+# concurrently (each with its own timeout) and returns the ToolMessages in
+# the original call order.
 
-def chatbot(state:State):
-    return {"messages":  [llm_with_tools.invoke(state["messages"])]}
+# Its condenser strips markup and duplicate snippets from the search results
+# and caps them at 400 tokens, so later turns re-send fewer prompt tokens.
 
-graph_builder.add_node("chatbot", chatbot)
-
-
-# -----------------------------------------------
-# Let's create a function to run the tools 
-# We will do this by adding the tools to a new node.
-# -----------------------------------------------
-
-import json
-
-from langchain_core.messages import ToolMessage
-
-
-class BasicToolNode:
-    """A node that runs the tools requested in the last AIMessage."""
-
-    def __init__(self, tools: list) -> None:
-        self.tools_by_name = {tool.name: tool for tool in tools}
-
-    def __call__(self, inputs: dict):
-        if messages := inputs.get("messages", []):
-            message = messages[-1]
-        else:
-            raise ValueError("No message found in input")
-        outputs = []
-        for tool_call in message.tool_calls:
-            tool_result = self.tools_by_name[tool_call["name"]].invoke(
-                tool_call["args"]
-            )
-            outputs.append(
-                ToolMessage(
-                    content=json.dumps(tool_result),
-                    name=tool_call["name"],
-                    tool_call_id=tool_call["id"],
-                )
-            )
-        return {"messages": outputs}
-
-
-tool_node = BasicToolNode(tools=[search])
-graph_builder.add_node("tools", tool_node)
-
-
-# -----------------------------------------------
-# Let's define a conditional_edges
-# -----------------------------------------------
+from graph_registry import GraphOptions, get_graph, shared_condenser
 
-def route_tools(
-    state: State,
-):
-    """
-    Use in the conditional_edge to route to the ToolNode if the last message
-    has tool calls. Otherwise, route to the end.
-    """
-    if isinstance(state, list):
-        ai_message = state[-1]
-    elif messages := state.get("messages", []):
-        ai_message = messages[-1]
-    else:
-        raise ValueError(f"No messages found in input state to tool_edge: {state}")
-    if hasattr(ai_message, "tool_calls") and len(ai_message.tool_calls) > 0:
-        return "tools"
-    return END
-
-# The `tools_condition` function returns "tools" if the chatbot asks to use a tool, and "END" if
-# it is fine directly responding. This conditional routing defines the main agent loop.
-
-graph_builder.add_conditional_edges(
-    "chatbot",
-    route_tools,
-    # The following dictionary lets you tell the graph to interpret the condition's outputs as a specific node
-    # It defaults to the identity function, but if you want to use a node named something else apart from "tools",
-    # You can update the value of the dictionary to something else e.g., "tools": "my_tools"
-    {"tools": "tools", END: END},
-)
-
-# Any time a tool is called, we return to the chatbot to decide the next step
-
-graph_builder.add_edge("tools", "chatbot")
-graph_builder.add_edge(START, "chatbot")
-
-graph = graph_builder.compile()
+graph = get_graph(GraphOptions(tool_node="speculative", checkpointer=None))
+condenser = shared_condenser()
 
 
 # -----------------------------------------------
 # Let's Visualize the graph
 # -----------------------------------------------
 
-from IPython.display import Image, display
+from startup import maybe_render_graph
 
-try:
-    display(Image (graph.get_graph().draw_mermaid_png()))
-except Exception:
-    pass
+maybe_render_graph(graph)
 
 
 # -----------------------------------------------
@@ -160,6 +57,7 @@ while True:
     try:
         user_input = input("User: ")
         if user_input.lower() in ["quit", "exit", "q"]:
+            print("Tokens saved by condensing tool results:", condenser.report())
             print("Goodbye!")
             break
 
@@ -172,4 +70,4 @@ while True:
         break
 
 
-# -----------------------------------------------
\ No newline at end of file
+# -----------------------------------------------
\ No newline at end of file
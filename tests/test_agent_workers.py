@@ -0,0 +1,76 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from agent_workers import AgentDispatcher
+
+
+class EchoAgent:
+    """Answers with its inputs; "crash" kills the worker process."""
+
+    async def ainvoke(self, inputs, config):
+        if inputs == "crash":
+            os._exit(3)
+        if inputs == "slow":
+            await asyncio.sleep(0.5)
+        return (inputs, config["configurable"]["thread_id"], os.getpid())
+
+
+def echo_agent():
+    return EchoAgent()
+
+
+def broken_agent():
+    raise RuntimeError("no API key")
+
+
+def wait_for(condition, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = AgentDispatcher(echo_agent, workers=2, poll_interval=0.05)
+    yield dispatcher
+    dispatcher.close()
+
+
+def test_requests_are_routed_by_thread_id(dispatcher):
+    first = dispatcher.invoke("hi", "thread-1")
+    assert first[:2] == ("hi", "thread-1")
+    assert dispatcher.invoke("again", "thread-1")[2] == first[2]
+
+
+def test_dead_worker_fails_its_requests_and_is_replaced(dispatcher):
+    victim = dispatcher.ring.get("thread-0")
+    neighbour = next(f"thread-{n}" for n in range(1, 100) if dispatcher.ring.get(f"thread-{n}") == victim)
+    slow = dispatcher.submit("slow", neighbour)
+    crash = dispatcher.submit("crash", "thread-0")
+    queued = dispatcher.submit("after", "thread-0")
+    for future in (crash, slow):
+        with pytest.raises(RuntimeError, match="exited with code 3"):
+            future.result(timeout=10)
+    # The turn held back behind the crash was never sent; the new owner runs it.
+    assert queued.result(timeout=10)[:2] == ("after", "thread-0")
+    assert victim not in dispatcher.ring
+    wait_for(lambda: len(dispatcher.ring) == 2)
+    assert dispatcher.invoke("hi", neighbour)[:2] == ("hi", neighbour)
+
+
+def test_worker_that_cannot_start_is_not_respawned_forever():
+    dispatcher = AgentDispatcher(broken_agent, workers=1, poll_interval=0.02, max_startup_failures=3)
+    with pytest.raises(RuntimeError, match="exited with code 1"):
+        dispatcher.invoke("hi", "thread-0")
+    # Sent to a respawned worker, or held until one is up: it fails either way.
+    with pytest.raises(RuntimeError):
+        dispatcher.invoke("hi", "thread-1")
+    wait_for(lambda: dispatcher.failed is not None)
+    with pytest.raises(RuntimeError, match="gave up after 3 workers failed to start"):
+        dispatcher.submit("hi", "thread-0")
+    time.sleep(0.3)
+    assert next(dispatcher.worker_ids) == 3
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+
+from batch_translate import RateLimiter, build_chain, completed_ids, translate_file
+from fakes import FakeChatModel
+
+
+class FlakyModel(FakeChatModel):
+    """Fails on every text containing "fail"."""
+
+    def _reply(self, messages, tools):
+        if "fail" in messages[-1].content:
+            raise RuntimeError("upstream error")
+        return super()._reply(messages, tools)
+
+
+def write_jsonl(path, records: list) -> None:
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+
+def read_jsonl(path) -> list:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+def translate(model, input_path, output_path, **kwargs) -> dict:
+    return asyncio.run(translate_file(build_chain(model), str(input_path), str(output_path), concurrency=4, **kwargs))
+
+
+def test_translates_every_record_and_skips_them_on_restart(tmp_path):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(source, [{"id": n, "language": "Italian", "text": f"text {n}"} for n in range(10)])
+
+    stats = translate(FakeChatModel(), source, output)
+    assert (stats["translated"], stats["skipped"], stats["failed"]) == (10, 0, 0)
+    results = {record["id"]: record for record in read_jsonl(output)}
+    assert sorted(results) == [str(n) for n in range(10)]
+    assert results["3"]["translation"] == "You said: text 3"
+
+    stats = translate(FakeChatModel(), source, output)
+    assert (stats["translated"], stats["skipped"]) == (0, 10)
+    assert len(read_jsonl(output)) == 10
+
+
+def test_a_line_cut_short_by_a_crash_is_redone(tmp_path):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(source, [{"id": n, "language": "Italian", "text": f"text {n}"} for n in range(3)])
+    output.write_text('{"id": "0", "translation": "done"}\n{"id": "1", "transl', encoding="utf-8")
+    assert completed_ids(str(output)) == {"0"}
+    assert output.read_text(encoding="utf-8").endswith("\n")
+
+    stats = translate(FakeChatModel(), source, output)
+    assert (stats["translated"], stats["skipped"]) == (2, 1)
+    assert completed_ids(str(output)) == {"0", "1", "2"}
+
+
+def test_failed_records_go_to_the_error_file_and_are_retried(tmp_path):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(source, [{"id": n, "language": "Italian", "text": "fail" if n % 3 == 0 else "ok"} for n in range(6)])
+
+    stats = translate(FlakyModel(), source, output)
+    assert (stats["translated"], stats["failed"]) == (4, 2)
+    errors = read_jsonl(tmp_path / "out.jsonl.errors.jsonl")
+    assert sorted(error["id"] for error in errors) == ["0", "3"]
+    assert "upstream error" in errors[0]["error"]
+
+    stats = translate(FakeChatModel(), source, output)
+    assert (stats["translated"], stats["skipped"], stats["failed"]) == (2, 4, 0)
+    assert len(completed_ids(str(output))) == 6
+
+
+def test_csv_records_get_the_default_language(tmp_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.jsonl"
+    source.write_text("id,language,text\na,,hello\nb,German,bye\n", encoding="utf-8")
+    translate(FakeChatModel(), source, output, default_language="French")
+    languages = {record["id"]: record["language"] for record in read_jsonl(output)}
+    assert languages == {"a": "French", "b": "German"}
+
+
+def test_rate_limiter_allows_a_burst_then_the_rate():
+    async def acquire(limiter, count: int) -> float:
+        started = time.monotonic()
+        for _ in range(count):
+            await limiter.acquire()
+        return time.monotonic() - started
+
+    # 20 requests per second: the burst of 2 is free, the next 4 take 0.05s each.
+    assert asyncio.run(acquire(RateLimiter(rpm=1200, burst=2), 2)) < 0.05
+    assert 0.15 < asyncio.run(acquire(RateLimiter(rpm=1200, burst=2), 6)) < 1.0
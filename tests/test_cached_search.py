@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+import pytest
+from langchain_core.tools import BaseTool
+
+import cached_search as cached_search_module
+from cached_search import cached_search, normalize_query
+from fakes import FakeSearchTool, SearchInput
+
+
+class CountingSearch(BaseTool):
+    """Counts upstream calls; answers with an error string while `failing`."""
+
+    name: str = "tavily_search_results_json"
+    description: str = "Search the web."
+    args_schema: type = SearchInput
+    calls: int = 0
+    failing: bool = False
+    gate: Optional[threading.Event] = None
+
+    def _run(self, query: str, run_manager=None):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.failing:
+            return "ConnectError('connection refused')"
+        return [{"url": "https://example.com", "content": f"Results for {query}"}]
+
+    async def _arun(self, query: str, run_manager=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return [{"url": "https://example.com", "content": f"Results for {query}"}]
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cached_search_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_normalize_query():
+    assert normalize_query("  What is the  Weather in SF?? ") == "what is the weather in sf"
+
+
+def test_wrapper_looks_like_the_wrapped_tool():
+    tool = FakeSearchTool()
+    search = cached_search(tool)
+    assert (search.name, search.description, search.args_schema) == (tool.name, tool.description, tool.args_schema)
+
+
+def test_equivalent_queries_share_one_entry():
+    upstream = CountingSearch()
+    search = cached_search(upstream)
+    first = search.invoke({"query": "LangGraph?"})
+    assert search.invoke({"query": "  langgraph "}) == first
+    assert upstream.calls == 1
+    assert search.stats["hits"] == 1
+
+
+def test_ttl_rules_pick_shorter_ttls(clock):
+    upstream = CountingSearch()
+    search = cached_search(upstream)
+    assert search.ttl_for("weather in sf") == 10 * 60
+    assert search.ttl_for("what is langgraph") == search.default_ttl
+    search.invoke({"query": "weather in sf"})
+    clock.now += 10 * 60 - 1
+    search.invoke({"query": "weather in sf"})
+    assert upstream.calls == 1
+    clock.now += 2
+    search.invoke({"query": "weather in sf"})
+    assert upstream.calls == 2
+
+
+def test_error_strings_are_not_cached():
+    upstream = CountingSearch(failing=True)
+    search = cached_search(upstream)
+    assert search.invoke({"query": "langgraph"}).startswith("ConnectError")
+    upstream.failing = False
+    assert isinstance(search.invoke({"query": "langgraph"}), list)
+    assert upstream.calls == 2
+    assert search.stats["errors"] == 1
+    search.invoke({"query": "langgraph"})
+    assert upstream.calls == 2
+
+
+def test_concurrent_identical_queries_are_coalesced():
+    upstream = CountingSearch(gate=threading.Event())
+    search = cached_search(upstream)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(search.invoke({"query": "langgraph"}))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while search.stats["coalesced"] + search.stats["misses"] < 8:
+        time.sleep(0.001)
+    upstream.gate.set()
+    for thread in threads:
+        thread.join()
+    assert upstream.calls == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+    assert search.stats["coalesced"] == 7
+
+
+def test_concurrent_async_queries_are_coalesced():
+    upstream = CountingSearch()
+    search = cached_search(upstream)
+
+    async def main():
+        return await asyncio.gather(*(search.ainvoke({"query": "langgraph"}) for _ in range(8)))
+
+    results = asyncio.run(main())
+    assert upstream.calls == 1
+    assert all(result == results[0] for result in results)
+    assert search.stats["coalesced"] == 7
+
+
+def test_cancelled_leader_hands_the_search_to_its_waiters():
+    upstream = CountingSearch()
+    search = cached_search(upstream)
+
+    async def main():
+        leader = asyncio.create_task(search.ainvoke({"query": "langgraph"}))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(search.ainvoke({"query": "langgraph"})) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, list) for result in results)
+    assert upstream.calls == 2
+
+
+def test_async_flights_are_shared_across_event_loops():
+    upstream = CountingSearch()
+    search = cached_search(upstream)
+    results = []
+
+    def run():
+        results.append(asyncio.run(search.ainvoke({"query": "langgraph"})))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4 and all(result == results[0] for result in results)
+    assert search.stats["misses"] + search.stats["coalesced"] == 4
+    assert upstream.calls == search.stats["misses"]
@@ -0,0 +1,86 @@
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from compiled_prompt import CompiledChatPrompt
+
+STATE = {"messages": [HumanMessage("Hi! I'm Bob."), AIMessage("Hello Bob!"), HumanMessage("What's my name?")]}
+
+
+def language_template():
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", "You are a helpful assistant. Answer all questions in {language}."),
+            ("human", "Context first."),
+            MessagesPlaceholder(variable_name="messages"),
+        ]
+    )
+
+
+def test_matches_template_invoke():
+    template = language_template()
+    prompt = CompiledChatPrompt(template)
+    for language in ("Spanish", "Hindi", "Spanish"):
+        state = {**STATE, "language": language}
+        assert prompt.invoke(state).to_messages() == template.invoke(state).to_messages()
+
+
+def test_callable_partial_is_resolved_like_template_invoke():
+    template = ChatPromptTemplate.from_messages(
+        [("system", "Today is {date}. Answer in {language}."), MessagesPlaceholder("messages")]
+    ).partial(date=lambda: "2026-10-18")
+    prompt = CompiledChatPrompt(template)
+    state = {**STATE, "language": "French"}
+
+    compiled = prompt.invoke(state).to_messages()
+    assert compiled[0].content == "Today is 2026-10-18. Answer in French."
+    assert compiled == template.invoke(state).to_messages()
+
+
+def test_callable_partial_is_called_on_every_render():
+    calls = []
+
+    def today():
+        calls.append(1)
+        return f"day {len(calls)}"
+
+    prompt = CompiledChatPrompt(
+        ChatPromptTemplate.from_messages([("system", "Today is {date}."), MessagesPlaceholder("messages")]).partial(
+            date=today
+        )
+    )
+    assert prompt.invoke(STATE).to_messages()[0].content == "Today is day 1."
+    assert prompt.prefix(STATE)[0].content == "Today is day 2."
+
+
+def test_prefix_is_reused_object_for_object():
+    prompt = CompiledChatPrompt(language_template())
+    first = prompt.prefix({"language": "Spanish"})
+    second = prompt.prefix({"language": "Spanish"})
+    assert all(a is b for a, b in zip(first, second))
+    assert prompt.prefix_hash({"language": "Spanish"}) != prompt.prefix_hash({"language": "Hindi"})
+
+
+def test_placeholder_messages_are_spliced_without_copying():
+    prompt = CompiledChatPrompt(language_template())
+    messages = prompt.invoke({**STATE, "language": "Spanish"}).to_messages()
+    assert all(a is b for a, b in zip(messages[2:], STATE["messages"]))
+
+
+def test_concurrent_renders_share_one_cached_message():
+    prompt = CompiledChatPrompt(language_template(), cache_size=4)
+    results = []
+
+    def render(n):
+        results.append(prompt.prefix({"language": f"lang-{n % 8}"})[0])
+
+    threads = [threading.Thread(target=render, args=(n,)) for n in range(64)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(prompt.cache) <= 4
+    assert {message.content for message in results} == {
+        f"You are a helpful assistant. Answer all questions in lang-{n}." for n in range(8)
+    }
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
+
+from delta_checkpointer import DELTA_KEY, DeltaCheckpointSaver
+from fakes import FakeChatModel
+from graph_registry import build_support_graph
+from sqlite_checkpointer import SqliteCheckpointSaver
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def inner(request, tmp_path):
+    if request.param == "memory":
+        return MemorySaver()
+    return SqliteCheckpointSaver(str(tmp_path / "c.sqlite"))
+
+
+def chat(graph, thread_id: str, turns: int) -> dict:
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in range(turns):
+        graph.invoke({"messages": [{"role": "user", "content": f"turn {turn}"}]}, config)
+    return config
+
+
+def test_state_and_history_match_the_plain_saver(inner):
+    plain = build_support_graph(FakeChatModel(), checkpointer=MemorySaver())
+    delta = build_support_graph(FakeChatModel(), checkpointer=DeltaCheckpointSaver(inner, snapshot_every=3))
+    config = chat(plain, "t", 7)
+    chat(delta, "t", 7)
+
+    def contents(graph):
+        return [[m.content for m in s.values.get("messages", [])] for s in graph.get_state_history(config)]
+
+    assert contents(delta) == contents(plain)
+    stored = [t.checkpoint["channel_values"].get("messages") for t in inner.list(config)]
+    assert any(isinstance(value, dict) and DELTA_KEY in value for value in stored)
+
+
+def test_delete_thread_reaches_the_inner_saver_and_the_cache(inner):
+    saver = DeltaCheckpointSaver(inner)
+    graph = build_support_graph(FakeChatModel(), checkpointer=saver)
+    config = chat(graph, "gone", 3)
+    kept = chat(graph, "kept", 2)
+
+    saver.delete_thread("gone")
+    assert inner.get_tuple(config) is None
+    assert graph.get_state(config).values == {}
+    assert all(key[0] != "gone" for key in saver.cache)
+    assert len(graph.get_state(kept).values["messages"]) == 4
+
+    asyncio.run(saver.adelete_thread("kept"))
+    assert inner.get_tuple(kept) is None
+    assert not saver.cache
+
+
+def put(saver, config: dict, messages: list, version: int) -> dict:
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": messages}
+    checkpoint["channel_versions"] = {"messages": version}
+    return saver.put(config, checkpoint, {}, {"messages": version})
+
+
+def test_missing_parent_starts_a_snapshot_and_a_missing_base_is_reported():
+    inner = MemorySaver()
+    saver = DeltaCheckpointSaver(inner)
+    first, second = HumanMessage("first", id="1"), HumanMessage("second", id="2")
+    pruned = {"configurable": {"thread_id": "t", "checkpoint_ns": "", "checkpoint_id": "pruned"}}
+    config = put(saver, pruned, [first], 1)
+    assert inner.get_tuple(config).checkpoint["channel_values"]["messages"] == [first]
+
+    latest = put(saver, config, [first, second], 2)
+    assert DELTA_KEY in inner.get_tuple(latest).checkpoint["channel_values"]["messages"]
+    del inner.storage["t"][""][config["configurable"]["checkpoint_id"]]
+    saver.cache.clear()
+    with pytest.raises(LookupError, match="is missing"):
+        saver.get_tuple(latest)
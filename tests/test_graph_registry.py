@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from fakes import FakeChatModel, FakeSearchTool
+from graph_registry import build_support_graph
+
+
+class CountingModel(FakeChatModel):
+    """Records the highest number of concurrent async calls."""
+
+    active: int = 0
+    peak: int = 0
+
+    async def _agenerate(self, *args, **kwargs):
+        return await self._counted(super()._agenerate(*args, **kwargs))
+
+    async def _astream(self, *args, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+        finally:
+            self.active -= 1
+
+    async def _counted(self, call):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await call
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.parametrize("tool_node", ["prebuilt", "basic", "speculative"])
+def test_max_inflight_caps_concurrent_model_calls(tool_node):
+    model = CountingModel(latency=0.05)
+    graph = build_support_graph(model, [FakeSearchTool()], tool_node=tool_node, max_inflight=2)
+
+    async def main():
+        await asyncio.gather(
+            *(graph.ainvoke({"messages": [{"role": "user", "content": f"Hi {n}"}]}) for n in range(8))
+        )
+
+    asyncio.run(main())
+    assert model.peak == 2
@@ -0,0 +1,49 @@
+from hash_ring import HashRing, stable_hash
+
+KEYS = [f"thread-{n}" for n in range(2000)]
+
+
+def test_stable_hash_is_deterministic_and_64_bit():
+    assert stable_hash("thread-1") == stable_hash("thread-1")
+    assert stable_hash("thread-1") != stable_hash("thread-2")
+    assert 0 <= stable_hash("thread-1") < 2**64
+
+
+def test_keys_spread_over_every_node():
+    ring = HashRing(range(4))
+    counts = {node: 0 for node in range(4)}
+    for key in KEYS:
+        counts[ring.get(key)] += 1
+    assert all(count > len(KEYS) / 4 * 0.5 for count in counts.values())
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(range(4))
+    before = {key: ring.get(key) for key in KEYS}
+    ring.add(4)
+    moved = [key for key in KEYS if ring.get(key) != before[key]]
+    assert all(ring.get(key) == 4 for key in moved)
+    assert 0 < len(moved) < len(KEYS) / 3
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(range(4))
+    before = {key: ring.get(key) for key in KEYS}
+    ring.remove(2)
+    assert 2 not in ring and len(ring) == 3
+    for key in KEYS:
+        if before[key] != 2:
+            assert ring.get(key) == before[key]
+    ring.remove(2)
+    assert len(ring.points) == 3 * ring.replicas
+
+
+def test_empty_ring_raises():
+    ring = HashRing(["a"])
+    ring.remove("a")
+    try:
+        ring.get("thread-1")
+    except LookupError:
+        pass
+    else:
+        raise AssertionError("expected LookupError")
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from fakes import FakeChatModel
+from hedged_router import HedgedChatModel
+
+
+class Broken(FakeChatModel):
+    def _generate(self, *args, **kwargs):
+        raise RuntimeError("provider down")
+
+    async def _agenerate(self, *args, **kwargs):
+        raise RuntimeError("provider down")
+
+
+class Recording(FakeChatModel):
+    calls: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append((stop, kwargs))
+        return super()._generate(messages, stop, run_manager)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append((stop, kwargs))
+        return super()._generate(messages, stop, run_manager)
+
+
+@pytest.mark.parametrize("budget", [0.0, 0.1])
+def test_failed_primary_fails_over_whatever_the_budget(budget):
+    model = HedgedChatModel(models=[Broken(), FakeChatModel()], hedge_budget=budget)
+    assert model.invoke("hi").content == "You said: hi"
+    assert asyncio.run(model.ainvoke("hi")).content == "You said: hi"
+    stats = model.stats()
+    assert stats["failovers"] == 2
+    assert stats["hedges"] == stats["hedge_wins"] == 0
+
+
+def test_both_failing_raises_the_primary_error():
+    model = HedgedChatModel(models=[Broken(), Broken()])
+    with pytest.raises(RuntimeError, match="provider down"):
+        model.invoke("hi")
+
+
+def test_slow_primary_is_hedged():
+    model = HedgedChatModel(models=[FakeChatModel(latency=1.0), FakeChatModel()], default_hedge_after=0.05)
+    message = asyncio.run(model.ainvoke("hi"))
+    assert message.response_metadata["hedge"] == {"provider": 1, "hedged": True}
+    assert model.stats()["hedge_wins"] == 1
+
+
+def test_slow_primary_is_not_hedged_without_budget():
+    model = HedgedChatModel(
+        models=[FakeChatModel(latency=0.2), FakeChatModel()], default_hedge_after=0.01, hedge_budget=0
+    )
+    message = asyncio.run(model.ainvoke("hi"))
+    assert message.response_metadata["hedge"] == {"provider": 0, "hedged": False}
+
+
+def test_call_kwargs_reach_the_providers():
+    recording = Recording(calls=[])
+    model = HedgedChatModel(models=[recording])
+    model.invoke("hi", stop=["x"], temperature=0.1)
+    asyncio.run(model.ainvoke("hi", stop=["y"], temperature=0.2))
+    assert recording.calls == [(["x"], {"temperature": 0.1}), (["y"], {"temperature": 0.2})]
@@ -0,0 +1,74 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage, trim_messages
+
+from fakes import FakeChatModel
+from incremental_trimmer import IncrementalTrimmer
+
+
+def count_tokens(messages: list) -> int:
+    """Additive per message plus a per-list overhead, like ChatOpenAI."""
+    return 3 + sum(4 + len(str(message.content).split()) for message in messages)
+
+
+def history(turns: int) -> list:
+    messages = [SystemMessage("You are a helpful support bot.", id="system")]
+    for turn in range(turns):
+        messages.append(HumanMessage(f"question {turn} " + "word " * turn, id=f"human-{turn}"))
+        if turn % 2:
+            tool_call = {"name": "search", "args": {"query": str(turn)}, "id": f"call-{turn}"}
+            messages.append(AIMessage("", id=f"call-{turn}", tool_calls=[tool_call]))
+            messages.append(ToolMessage("result " * 5, tool_call_id=f"call-{turn}", id=f"tool-{turn}"))
+        messages.append(AIMessage(f"answer {turn}", id=f"ai-{turn}"))
+    return messages
+
+
+def expected(messages: list, max_tokens: int, **kwargs) -> list:
+    return trim_messages(
+        messages, max_tokens=max_tokens, strategy="last", token_counter=count_tokens, allow_partial=False, **kwargs
+    )
+
+
+@pytest.mark.parametrize("with_system", [True, False])
+@pytest.mark.parametrize("include_system", [True, False])
+@pytest.mark.parametrize("start_on", ["human", None])
+def test_matches_trim_messages(with_system, include_system, start_on):
+    messages = history(6) if with_system else history(6)[1:]
+    for max_tokens in range(0, 160):
+        trimmer = IncrementalTrimmer(max_tokens, count_tokens, include_system=include_system, start_on=start_on)
+        assert trimmer(messages) == expected(messages, max_tokens, include_system=include_system, start_on=start_on)
+
+
+def test_cache_is_reused_across_turns():
+    trimmer = IncrementalTrimmer(60, count_tokens)
+    messages = history(4)
+    assert trimmer(messages) == expected(messages, 60, include_system=True, start_on="human")
+    misses = trimmer.misses
+
+    messages += [HumanMessage("one more question", id="human-new"), AIMessage("one more answer", id="ai-new")]
+    assert trimmer(messages) == expected(messages, 60, include_system=True, start_on="human")
+    assert trimmer.misses == misses + 2
+    assert trimmer.hits > 0
+
+
+def test_edited_messages_are_recounted():
+    trimmer = IncrementalTrimmer(40, count_tokens)
+    messages = history(4)
+    trimmer(messages)
+    messages[-1] = AIMessage("a much longer answer " * 4, id=messages[-1].id)
+    assert trimmer(messages) == expected(messages, 40, include_system=True, start_on="human")
+
+
+def test_accepts_a_chat_model_as_token_counter():
+    model = FakeChatModel()
+    messages = history(6)
+    for max_tokens in (20, 50, 100):
+        trimmer = IncrementalTrimmer(max_tokens, model)
+        assert trimmer(messages) == trim_messages(
+            messages,
+            max_tokens=max_tokens,
+            strategy="last",
+            token_counter=model,
+            include_system=True,
+            allow_partial=False,
+            start_on="human",
+        )
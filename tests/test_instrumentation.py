@@ -0,0 +1,81 @@
+import json
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.memory import MemorySaver
+
+from fakes import FakeChatModel, FakeSearchTool
+from graph_registry import build_support_graph
+from instrumentation import GraphMetrics, Histogram, attach
+
+
+class UsageOnlyModel(FakeChatModel):
+    """Reports tokens only in usage_metadata, like some providers do."""
+
+    def _reply(self, messages, tools):
+        message = super()._reply(messages, tools)
+        message.response_metadata = {"model_name": self.model_name}
+        return message
+
+
+def histograms(metrics: GraphMetrics) -> dict:
+    return {
+        (entry["name"], *entry["labels"].values()): entry for entry in json.loads(metrics.to_json())["histograms"]
+    }
+
+
+def run_turns(graph, turns: list, thread_id: str = "a") -> None:
+    config = {"configurable": {"thread_id": thread_id}}
+    for text in turns:
+        graph.invoke({"messages": [{"role": "user", "content": text}]}, config)
+
+
+def test_nodes_tools_llm_and_checkpoints_are_recorded():
+    metrics = GraphMetrics()
+    graph = attach(build_support_graph(FakeChatModel(), [FakeSearchTool()], checkpointer=MemorySaver()), metrics)
+    run_turns(graph, ["Hi", "What is the weather in Pune?"])
+
+    found = histograms(metrics)
+    # Turn 1: chatbot. Turn 2: chatbot -> tools -> chatbot.
+    assert found[("langgraph_node_seconds", "chatbot")]["count"] == 3
+    assert found[("langgraph_node_seconds", "tools")]["count"] == 1
+    assert found[("langgraph_llm_seconds", "fake-chat-model")]["count"] == 3
+    assert found[("langgraph_tool_seconds", "tavily_search_results_json")]["count"] == 1
+    assert found[("langgraph_checkpoint_seconds", "put")]["count"] > 0
+    assert found[("langgraph_checkpoint_seconds", "get")]["count"] == 2
+    assert all(entry["sum"] > 0 for entry in found.values())
+
+    stats = metrics.thread_stats("a")
+    assert stats["prompt_tokens"] > 0 and stats["completion_tokens"] > 0
+    assert stats["langgraph_node_seconds:chatbot"] > 0
+
+
+def test_nodes_are_recorded_when_the_graph_has_a_parent_run():
+    metrics = GraphMetrics()
+    graph = attach(build_support_graph(FakeChatModel(), [FakeSearchTool()], checkpointer=MemorySaver()), metrics)
+    parent = RunnableLambda(lambda inputs, config: graph.invoke(inputs, config))
+    parent.invoke({"messages": [{"role": "user", "content": "Hi"}]}, {"configurable": {"thread_id": "a"}})
+    assert histograms(metrics)[("langgraph_node_seconds", "chatbot")]["count"] == 1
+
+
+def test_tokens_fall_back_to_usage_metadata():
+    metrics = GraphMetrics()
+    graph = attach(build_support_graph(UsageOnlyModel(), checkpointer=MemorySaver()), metrics)
+    run_turns(graph, ["Hi there"])
+    stats = metrics.thread_stats("a")
+    assert stats["prompt_tokens"] > 0
+    assert stats["completion_tokens"] == 4  # "You said: Hi there"
+
+
+def test_histogram_quantiles_and_prometheus_export():
+    histogram = Histogram(buckets=(0.1, 0.2, 0.5))
+    for value in [0.05] * 50 + [0.15] * 45 + [0.4] * 5:
+        histogram.observe(value)
+    assert histogram.quantile(0.5) <= 0.1
+    assert 0.1 < histogram.quantile(0.95) <= 0.2
+    assert 0.2 < histogram.quantile(0.99) <= 0.5
+
+    metrics = GraphMetrics(buckets=(0.1, 1.0))
+    metrics.observe("langgraph_node_seconds", {"node": "chatbot"}, 0.05)
+    text = metrics.to_prometheus()
+    assert 'langgraph_node_seconds_bucket{node="chatbot",le="0.1"} 1' in text
+    assert 'langgraph_node_seconds_count{node="chatbot"} 1' in text
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+
+from fakes import FakeChatModel, FakeSearchTool
+from graph_registry import build_support_graph, human_assistance
+from interrupt_index import InterruptIndexingSaver, PendingInterruptIndex, ResumeWorkerPool
+
+ASK = {"messages": [{"role": "user", "content": "Could you request assistance for me?"}]}
+
+
+def support_graph(index, latency: float = 0.0):
+    return build_support_graph(
+        FakeChatModel(latency=latency),
+        [FakeSearchTool(), human_assistance],
+        checkpointer=InterruptIndexingSaver(MemorySaver(), index),
+        single_tool_call=True,
+    )
+
+
+def config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def test_interrupted_threads_are_indexed_oldest_first():
+    index = PendingInterruptIndex()
+    graph = support_graph(index)
+    for thread_id in ["a", "b", "c"]:
+        graph.invoke(ASK, config(thread_id))
+    graph.invoke({"messages": [{"role": "user", "content": "Hi"}]}, config("d"))
+    assert [entry.thread_id for entry in index.list()] == ["a", "b", "c"]
+    assert "query" in index.get("a").payload
+
+
+def test_claim_and_release_keep_queue_order():
+    index = PendingInterruptIndex()
+    for thread_id in ["a", "b", "c"]:
+        index.add(thread_id, {"query": thread_id})
+    assert index.claim("agent-1").thread_id == "a"
+    assert index.claim("agent-2", "c").claimed_by == "agent-2"
+    assert index.claim("agent-3", "c") is None
+    assert [entry.thread_id for entry in index.list(unclaimed_only=True)] == ["b"]
+    index.release("a")
+    assert [entry.thread_id for entry in index.list(unclaimed_only=True)] == ["a", "b"]
+    assert len(index) == 3
+
+
+def test_resume_removes_the_thread_from_the_index():
+    index = PendingInterruptIndex()
+    graph = support_graph(index)
+    for thread_id in ["a", "b"]:
+        graph.invoke(ASK, config(thread_id))
+    pool = ResumeWorkerPool(graph, index, concurrency=2)
+    index.claim("agent-1", "a")
+    results = asyncio.run(pool.resume_many({"a": {"data": "Use LangGraph."}, "b": {"data": "Sure."}}))
+    assert all(not isinstance(result, Exception) for result in results.values())
+    assert len(index) == 0
+    assert not graph.get_state(config("a")).next
+    with pytest.raises(KeyError):
+        asyncio.run(pool.resume("a", {"data": "again"}))
+
+
+def test_release_reinserts_by_created_at():
+    index = PendingInterruptIndex()
+    for thread_id in ["a", "b", "c", "d"]:
+        index.add(thread_id, {"query": thread_id})
+    for thread_id in ["c", "a", "b"]:
+        index.claim("agent-1", thread_id)
+    index.release("b")
+    index.release("c")
+    index.release("a")
+    assert [entry.thread_id for entry in index.list(unclaimed_only=True)] == ["a", "b", "c", "d"]
+    index.discard("b")
+    assert index.claim("agent-2").thread_id == "a"
+    assert [entry.thread_id for entry in index.list(unclaimed_only=True)] == ["c", "d"]
+
+
+def test_concurrent_resumes_of_one_thread_are_rejected():
+    index = PendingInterruptIndex()
+    graph = support_graph(index, latency=0.05)
+    graph.invoke(ASK, config("a"))
+    pool = ResumeWorkerPool(graph, index, concurrency=4)
+
+    async def resume_twice():
+        return await asyncio.gather(
+            pool.resume("a", {"data": "first"}), pool.resume("a", {"data": "second"}), return_exceptions=True
+        )
+
+    first, second = asyncio.run(resume_twice())
+    assert not isinstance(first, Exception)
+    assert isinstance(second, RuntimeError)
+    assert len(index) == 0 and not index.resuming
+    answers = [message.content for message in graph.get_state(config("a")).values["messages"]]
+    assert any("first" in answer for answer in answers)
+    assert not any("second" in answer for answer in answers)
+
+
+def test_index_is_reloaded_from_sqlite(tmp_path):
+    path = str(tmp_path / "pending.sqlite")
+    index = PendingInterruptIndex(path)
+    graph = support_graph(index)
+    graph.invoke(ASK, config("a"))
+    graph.invoke(ASK, config("b"))
+    index.claim("agent-1", "b")
+
+    reloaded = PendingInterruptIndex(path)
+    assert [entry.thread_id for entry in reloaded.list()] == ["a", "b"]
+    assert reloaded.get("b").claimed_by == "agent-1"
+    assert reloaded.get("a").payload == index.get("a").payload
+    index.discard("a")
+    assert [entry.thread_id for entry in PendingInterruptIndex(path).list()] == ["b"]
+
+
+def test_pool_works_across_event_loops():
+    index = PendingInterruptIndex()
+    graph = support_graph(index)
+    pool = ResumeWorkerPool(graph, index, concurrency=1)
+    for batch in (["a", "b"], ["c", "d"]):
+        for thread_id in batch:
+            graph.invoke(ASK, config(thread_id))
+        results = asyncio.run(pool.resume_many({thread_id: {"data": "ok"} for thread_id in batch}))
+        assert all(not isinstance(result, Exception) for result in results.values())
+    assert len(index) == 0
+
+
+def test_deleting_a_thread_drops_it_from_the_index():
+    index = PendingInterruptIndex()
+    graph = support_graph(index)
+    graph.invoke(ASK, config("a"))
+    graph.checkpointer.delete_thread("a")
+    assert index.get("a") is None
+    assert graph.get_state(config("a")).values == {}
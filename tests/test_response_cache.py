@@ -0,0 +1,87 @@
+import pytest
+
+import response_cache
+from fakes import FakeChatModel
+from response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock.time)
+    return clock
+
+
+def test_chat_model_calls_are_served_from_the_cache():
+    cache = ResponseCache()
+    model = FakeChatModel(cache=cache)
+    first = model.invoke("Hi, I am Sushant")
+    second = model.invoke("Hi, I am Sushant")
+    assert second.content == first.content
+    model.invoke("Something else")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl=60)
+    cache.update("prompt", "llm", ["value"])
+    clock.now += 59
+    assert cache.lookup("prompt", "llm") == ["value"]
+    clock.now += 2
+    assert cache.lookup("prompt", "llm") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_tier_is_an_lru():
+    cache = ResponseCache(maxsize=2)
+    cache.update("a", "llm", ["a"])
+    cache.update("b", "llm", ["b"])
+    cache.lookup("a", "llm")
+    cache.update("c", "llm", ["c"])
+    assert cache.lookup("b", "llm") is None
+    assert cache.lookup("a", "llm") == ["a"]
+    assert cache.lookup("c", "llm") == ["c"]
+
+
+def test_llm_string_is_part_of_the_key():
+    cache = ResponseCache()
+    cache.update("prompt", "model-a", ["a"])
+    assert cache.lookup("prompt", "model-b") is None
+
+
+def test_disk_tier_survives_a_restart(tmp_path, clock):
+    path = str(tmp_path / "responses.sqlite")
+    model = FakeChatModel(cache=ResponseCache(path=path))
+    answer = model.invoke("Hi, I am Sushant")
+
+    cache = ResponseCache(path=path, ttl=60)
+    assert FakeChatModel(cache=cache).invoke("Hi, I am Sushant").content == answer.content
+    assert cache.stats()["disk_hits"] == 1
+
+    clock.now += 61
+    expired = ResponseCache(path=path, ttl=60)
+    FakeChatModel(cache=expired).invoke("Hi, I am Sushant")
+    assert expired.stats()["hits"] == 0
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    cache = ResponseCache(path=path)
+    cache.update("prompt", "llm", ["value"])
+    cache.clear()
+    assert cache.lookup("prompt", "llm") is None
+    assert ResponseCache(path=path).lookup("prompt", "llm") is None
+
+
+def test_maxsize_must_be_positive():
+    with pytest.raises(ValueError):
+        ResponseCache(maxsize=0)
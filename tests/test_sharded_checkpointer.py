@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+
+from fakes import FakeChatModel, FakeSearchTool
+from graph_registry import build_support_graph, human_assistance
+from sharded_checkpointer import ShardedCheckpointSaver
+from sqlite_checkpointer import SqliteCheckpointSaver
+
+THREADS = [f"thread-{n}" for n in range(30)]
+
+
+def support_graph(checkpointer):
+    return build_support_graph(
+        FakeChatModel(), [FakeSearchTool(), human_assistance], checkpointer=checkpointer, single_tool_call=True
+    )
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def make_shard(request, tmp_path):
+    if request.param == "memory":
+        return lambda name: MemorySaver()
+    return lambda name: SqliteCheckpointSaver(str(tmp_path / f"{name}.sqlite"))
+
+
+def snapshot(graph, thread_id: str):
+    config = {"configurable": {"thread_id": thread_id}}
+    state = graph.get_state(config)
+    history = [s.config["configurable"]["checkpoint_id"] for s in graph.get_state_history(config)]
+    return [m.content for m in state.values["messages"]], state.next, history
+
+
+def test_add_shard_moves_threads_with_history_and_interrupts(make_shard):
+    saver = ShardedCheckpointSaver({f"shard-{n}": make_shard(f"shard-{n}") for n in range(3)})
+    graph = support_graph(saver)
+    for thread_id in THREADS:
+        config = {"configurable": {"thread_id": thread_id}}
+        graph.invoke({"messages": [{"role": "user", "content": "What is the weather?"}]}, config)
+        graph.invoke({"messages": [{"role": "user", "content": "I need assistance"}]}, config)
+    before = {thread_id: snapshot(graph, thread_id) for thread_id in THREADS}
+    assert all(next_ == ("tools",) for _, next_, _ in before.values())
+
+    owners = {thread_id: saver.shard_for(thread_id) for thread_id in THREADS}
+    moved = saver.add_shard("shard-3", make_shard("shard-3"))
+    assert moved == sum(saver.shard_for(t) == "shard-3" for t in THREADS) > 0
+    assert all(saver.shard_for(t) in (owners[t], "shard-3") for t in THREADS)
+    assert {thread_id: snapshot(graph, thread_id) for thread_id in THREADS} == before
+
+    for thread_id in THREADS:
+        config = {"configurable": {"thread_id": thread_id}}
+        result = graph.invoke(Command(resume={"data": f"answer for {thread_id}"}), config)
+        assert f"answer for {thread_id}" in result["messages"][-1].content
+        assert graph.get_state(config).next == ()
+
+
+def test_moved_threads_leave_their_old_shard(tmp_path):
+    shards = {f"shard-{n}": SqliteCheckpointSaver(str(tmp_path / f"{n}.sqlite")) for n in range(2)}
+    saver = ShardedCheckpointSaver(shards)
+    graph = support_graph(saver)
+    for thread_id in THREADS:
+        graph.invoke({"messages": [{"role": "user", "content": "hi"}]}, {"configurable": {"thread_id": thread_id}})
+    saver.add_shard("shard-2", SqliteCheckpointSaver(str(tmp_path / "2.sqlite")))
+    for name, shard in saver.shards.items():
+        assert set(shard.thread_ids()) == {t for t in THREADS if saver.shard_for(t) == name}
+
+
+def test_task_paths_survive_the_move(tmp_path):
+    source = SqliteCheckpointSaver(str(tmp_path / "a.sqlite"))
+    saver = ShardedCheckpointSaver({"a": source})
+    graph = support_graph(saver)
+    for thread_id in THREADS:
+        config = {"configurable": {"thread_id": thread_id}}
+        graph.invoke({"messages": [{"role": "user", "content": "I need assistance"}]}, config)
+    paths = {t: source.task_paths(source.get_tuple({"configurable": {"thread_id": t}}).config) for t in THREADS}
+    target = SqliteCheckpointSaver(str(tmp_path / "b.sqlite"))
+    saver.add_shard("b", target)
+    moved = [t for t in THREADS if saver.shard_for(t) == "b"]
+    assert moved
+    for thread_id in moved:
+        assert paths[thread_id] and all(paths[thread_id].values())
+        assert target.task_paths(target.get_tuple({"configurable": {"thread_id": thread_id}}).config) == paths[thread_id]
+
+
+def test_concurrent_writers_during_add_shard(tmp_path):
+    saver = ShardedCheckpointSaver({"a": SqliteCheckpointSaver(str(tmp_path / "a.sqlite"))})
+    graph = support_graph(saver)
+    errors = []
+
+    def writer(thread_id: str) -> None:
+        try:
+            for turn in range(5):
+                graph.invoke({"messages": [{"role": "user", "content": f"hi {turn}"}]}, {"configurable": {"thread_id": thread_id}})
+        except Exception as error:
+            errors.append(error)
+
+    workers = [threading.Thread(target=writer, args=(thread_id,)) for thread_id in THREADS[:8]]
+    for worker in workers:
+        worker.start()
+    saver.add_shard("b", SqliteCheckpointSaver(str(tmp_path / "b.sqlite")))
+    for worker in workers:
+        worker.join()
+    assert errors == []
+    for thread_id in THREADS[:8]:
+        messages = graph.get_state({"configurable": {"thread_id": thread_id}}).values["messages"]
+        assert [m.content for m in messages if m.type == "human"] == [f"hi {turn}" for turn in range(5)]
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import Runnable
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+
+from fakes import FakeChatModel, FakeSearchTool
+from graph_registry import build_support_graph, human_assistance
+from speculative_tools import SpeculativeDispatcher, SpeculativeToolNode, make_speculative_chatbot
+
+
+class RecordingSearch(FakeSearchTool):
+    """Records every query it runs and when it started."""
+
+    runs: list = []
+
+    def _run(self, query: str, run_manager=None) -> list:
+        self.runs.append((query, time.monotonic()))
+        return super()._run(query, run_manager)
+
+
+class EmptyStream(Runnable):
+    def invoke(self, input, config=None, **kwargs):
+        raise AssertionError("must not fall back to a second model call")
+
+    def stream(self, input, config=None, **kwargs):
+        return iter(())
+
+
+def ask(text: str) -> dict:
+    return {"messages": [HumanMessage(text)]}
+
+
+def test_tool_calls_start_while_the_model_still_streams():
+    search = RecordingSearch(runs=[])
+    dispatcher = SpeculativeDispatcher([search])
+    model = FakeChatModel(token_latency=0.02).bind_tools([search])
+    chatbot = make_speculative_chatbot(model, dispatcher)
+
+    message = chatbot.invoke(ask("What is the weather in Pune and news about Mumbai?"))["messages"][0]
+    finished = time.monotonic()
+    assert len(message.tool_calls) == 2
+    assert dispatcher.dispatched == 2
+    # The first search started before the second call's arguments streamed in.
+    assert search.runs[0][1] < finished - 0.05
+
+    outputs = SpeculativeToolNode([search], dispatcher)({"messages": [message]})["messages"]
+    assert [output.tool_call_id for output in outputs] == [call["id"] for call in message.tool_calls]
+    assert dispatcher.reused == 2
+    assert len(search.runs) == 2
+
+
+def test_call_with_changed_args_is_run_again():
+    search = RecordingSearch(runs=[])
+    dispatcher = SpeculativeDispatcher([search])
+    dispatcher.dispatch({"name": search.name, "args": {"query": "weather in Pun"}, "id": "call_1"})
+    final = AIMessage(
+        content="", tool_calls=[{"name": search.name, "args": {"query": "weather in Pune"}, "id": "call_1"}]
+    )
+    outputs = SpeculativeToolNode([search], dispatcher)({"messages": [final]})["messages"]
+    assert dispatcher.reused == 0
+    assert "weather in Pune" in outputs[0].content
+    assert "weather in Pune" in [query for query, _ in search.runs]
+
+
+def test_speculative_call_times_out_in_the_tools_node():
+    search = FakeSearchTool(latency=1.0)
+    dispatcher = SpeculativeDispatcher([search])
+    tool_call = {"name": search.name, "args": {"query": "weather in Pune"}, "id": "call_1"}
+    dispatcher.dispatch(tool_call)
+    node = SpeculativeToolNode([search], dispatcher, timeout=0.1)
+    outputs = node({"messages": [AIMessage(content="", tool_calls=[tool_call])]})["messages"]
+    assert outputs[0].status == "error" and "timed out" in outputs[0].content
+
+
+def test_empty_stream_raises_instead_of_calling_again():
+    chatbot = make_speculative_chatbot(EmptyStream(), SpeculativeDispatcher([]))
+    with pytest.raises(ValueError, match="no chunks"):
+        chatbot.invoke(ask("Hi"))
+
+
+def test_human_assistance_runs_in_the_tools_node_and_resumes():
+    graph = build_support_graph(
+        FakeChatModel(),
+        [FakeSearchTool(), human_assistance],
+        checkpointer=MemorySaver(),
+        tool_node="speculative",
+        single_tool_call=True,
+    )
+    config = {"configurable": {"thread_id": "a"}}
+    graph.invoke(ask("Could you request assistance for me?"), config)
+    state = graph.get_state(config)
+    assert state.next == ("tools",)
+    assert state.tasks[0].interrupts[0].value["query"] == "Could you request assistance for me?"
+
+    output = graph.invoke(Command(resume={"data": "Use LangGraph."}), config)
+    tool_message = output["messages"][-2]
+    assert tool_message.name == "human_assistance"
+    assert "Use LangGraph." in tool_message.content
@@ -0,0 +1,87 @@
+import gc
+import sqlite3
+import time
+import weakref
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from fakes import FakeChatModel
+from graph_registry import build_support_graph
+from sqlite_checkpointer import SqliteCheckpointSaver
+
+
+def put_chain(saver, thread_id: str, count: int) -> list:
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    ids = []
+    for step in range(count):
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"step": step}
+        config = saver.put(config, checkpoint, {"source": "loop", "step": step}, {})
+        ids.append(config["configurable"]["checkpoint_id"])
+    return ids
+
+
+def test_put_get_list_round_trip(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "c.sqlite"))
+    ids = put_chain(saver, "a", 5)
+    put_chain(saver, "b", 2)
+
+    latest = saver.get_tuple({"configurable": {"thread_id": "a"}})
+    assert latest.checkpoint["channel_values"] == {"step": 4}
+    assert latest.parent_config["configurable"]["checkpoint_id"] == ids[3]
+    assert [t.config["configurable"]["checkpoint_id"] for t in saver.list({"configurable": {"thread_id": "a"}})] == ids[::-1]
+    assert len(list(saver.list(None))) == 7
+    saver.close()
+
+
+def test_list_limit_and_filter(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "c.sqlite"))
+    put_chain(saver, "a", 6)
+    config = {"configurable": {"thread_id": "a"}}
+    assert [t.metadata["step"] for t in saver.list(config, limit=2)] == [5, 4]
+    assert [t.metadata["step"] for t in saver.list(config, filter={"step": 1}, limit=1)] == [1]
+    before = list(saver.list(config, limit=3))[-1].config
+    assert [t.metadata["step"] for t in saver.list(config, before=before, limit=2)] == [2, 1]
+    saver.close()
+
+
+def test_threads_survive_reopen_and_delete(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    graph = build_support_graph(FakeChatModel(), checkpointer=SqliteCheckpointSaver(path, commit_every=1000))
+    config = {"configurable": {"thread_id": "t"}}
+    graph.invoke({"messages": [{"role": "user", "content": "hi"}]}, config)
+    graph.checkpointer.close()
+
+    saver = SqliteCheckpointSaver(path)
+    reopened = build_support_graph(FakeChatModel(), checkpointer=saver)
+    assert [m.content for m in reopened.get_state(config).values["messages"]] == ["hi", "You said: hi"]
+    saver.delete_thread("t")
+    assert reopened.get_state(config).values == {}
+    saver.close()
+
+
+def test_unreferenced_saver_is_collected_and_flushed(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    saver = SqliteCheckpointSaver(path, commit_every=1000, commit_interval=1000)
+    put_chain(saver, "a", 3)
+    ref = weakref.ref(saver)
+    del saver
+    gc.collect()
+    assert ref() is None
+    reopened = SqliteCheckpointSaver(path)
+    assert len(list(reopened.list({"configurable": {"thread_id": "a"}}))) == 3
+    reopened.close()
+
+
+def test_idle_batch_is_committed_after_commit_interval(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    saver = SqliteCheckpointSaver(path, commit_every=100, commit_interval=0.1)
+    put_chain(saver, "a", 2)
+    time.sleep(0.5)
+    other = sqlite3.connect(path, timeout=0.1)
+    assert other.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0] == 2
+    # The write lock was released, so another connection can write.
+    other.execute("DELETE FROM writes")
+    other.commit()
+    other.close()
+    saver.close()
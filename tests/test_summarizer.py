@@ -0,0 +1,122 @@
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, MessagesState, StateGraph
+
+from fakes import FakeChatModel
+from incremental_trimmer import IncrementalTrimmer
+from summarizer import SUMMARY_NAME, BackgroundSummarizer, bounded
+
+SUMMARY_GATE = threading.Event()
+
+
+class GatedSummaryModel(FakeChatModel):
+    """Writes a fixed summary once SUMMARY_GATE is set."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        SUMMARY_GATE.wait(5)
+        return super()._generate([HumanMessage("the user is Sushant")], stop, run_manager)
+
+
+def chat_graph():
+    model = FakeChatModel()
+
+    def call_model(state: MessagesState):
+        return {"messages": [model.invoke(state["messages"])]}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("model", call_model)
+    graph.add_edge(START, "model")
+    return graph.compile(checkpointer=MemorySaver())
+
+
+def config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def turn(text: str) -> dict:
+    return {"messages": [HumanMessage(text)]}
+
+
+def messages_of(app, thread_id: str) -> list:
+    return app.get_state(config(thread_id)).values["messages"]
+
+
+def test_long_threads_are_compacted_into_one_summary():
+    SUMMARY_GATE.set()
+    app = chat_graph()
+    summarizer = BackgroundSummarizer(app, GatedSummaryModel(), max_tokens=60, keep_last=2, as_node="model")
+    for n in range(6):
+        summarizer.invoke(turn(f"Hi, I am Sushant, message number {n}"), config("a"))
+        summarizer.wait()
+    messages = messages_of(app, "a")
+    assert summarizer.compactions >= 1 and summarizer.failures == 0
+    assert isinstance(messages[0], SystemMessage) and messages[0].name == SUMMARY_NAME
+    assert "Sushant" in messages[0].content
+    # The latest turn is kept as it is.
+    assert messages[-2].content == "Hi, I am Sushant, message number 5"
+    assert len(messages) < 12
+
+
+def test_short_threads_are_left_alone():
+    app = chat_graph()
+    summarizer = BackgroundSummarizer(app, GatedSummaryModel(), max_tokens=1000)
+    summarizer.invoke(turn("Hi"), config("a"))
+    assert not summarizer.maybe_compact(config("a"))
+    assert summarizer.compactions == 0
+
+
+def test_turn_during_compaction_is_kept():
+    SUMMARY_GATE.clear()
+    app = chat_graph()
+    summarizer = BackgroundSummarizer(app, GatedSummaryModel(), max_tokens=40, keep_last=2, as_node="model")
+    for n in range(3):
+        app.invoke(turn(f"Hi, I am Sushant, message number {n}"), config("a"))
+    assert summarizer.maybe_compact(config("a"))
+    # The summary call is blocked; the turn goes through without waiting.
+    summarizer.invoke(turn("What is my name?"), config("a"))
+    SUMMARY_GATE.set()
+    summarizer.wait()
+    contents = [message.content for message in messages_of(app, "a")]
+    assert summarizer.compactions >= 1
+    assert contents[-2:] == ["What is my name?", "You said: What is my name?"]
+
+
+def test_compaction_is_skipped_when_the_history_changed():
+    SUMMARY_GATE.clear()
+    app = chat_graph()
+    summarizer = BackgroundSummarizer(app, GatedSummaryModel(), max_tokens=40, keep_last=2, as_node="model")
+    for n in range(3):
+        app.invoke(turn(f"Hi, I am Sushant, message number {n}"), config("a"))
+    summarizer.maybe_compact(config("a"))
+    app.checkpointer.delete_thread("a")
+    app.invoke(turn("Hello again"), config("a"))
+    SUMMARY_GATE.set()
+    summarizer.wait()
+    assert summarizer.compactions == 0
+    assert [m.content for m in messages_of(app, "a")] == ["Hello again", "You said: Hello again"]
+
+
+def test_threads_have_their_own_locks():
+    summarizer = BackgroundSummarizer(chat_graph(), FakeChatModel(), max_tokens=100)
+    lock = summarizer._thread_lock("a")
+    assert summarizer._thread_lock("a") is lock
+    assert summarizer._thread_lock("b") is not lock
+    with lock:
+        assert summarizer._thread_lock("b").acquire(blocking=False)
+
+
+def test_bounded_never_trims_leading_system_messages():
+    trimmer = IncrementalTrimmer(max_tokens=20, token_counter=FakeChatModel(), include_system=False)
+    history = [
+        SystemMessage("You talk like a pirate."),
+        SystemMessage("Summary of the earlier conversation: the user is Sushant.", name=SUMMARY_NAME),
+    ]
+    for n in range(5):
+        history += [HumanMessage(f"question number {n}"), AIMessage(f"answer number {n}")]
+    kept = bounded(history, trimmer)
+    assert kept[:2] == history[:2]
+    assert kept[2:] == trimmer.invoke(history[2:])
+    assert 0 < len(kept[2:]) < 10
+    assert isinstance(kept[2], HumanMessage)
@@ -0,0 +1,97 @@
+import json
+import sys
+import threading
+import types
+
+from tool_condenser import BackgroundTokenCounter, ToolOutputCondenser, strip_markup
+
+
+def condenser(**budgets) -> ToolOutputCondenser:
+    return ToolOutputCondenser(budgets=budgets, token_counter=lambda text: (len(text) + 3) // 4)
+
+
+def test_strip_markup_keeps_identifiers():
+    assert strip_markup("call __init__ on my_var or a**b**c") == "call __init__ on my_var or a**b**c"
+
+
+def test_strip_markup_removes_markdown_around_text():
+    text = "## Title\n<p>**Bold** and __two words__, [a link](https://x.y) ![img](i.png)</p>\n---"
+    assert strip_markup(text) == "Title\nBold and two words, a link"
+
+
+def test_results_envelope_stays_valid_json_under_budget():
+    results = [{"url": f"https://example.com/{n}", "content": " ".join(f"Fact {n}.{i} here." for i in range(40))} for n in range(5)]
+    tool = condenser(search=120)
+    out = tool.condense("search", {"query": "q", "results": results, "images": ["a.png"]})
+    payload = json.loads(out)
+    assert "images" not in payload
+    assert payload["results"] and payload["results"][-1]["content"].endswith(" ...")
+    assert tool.count_tokens(out) <= 120
+
+
+def test_object_without_results_has_its_strings_cut():
+    tool = condenser(search=40)
+    out = tool.condense("search", {"answer": "word " * 200, "query": "weather"})
+    payload = json.loads(out)
+    assert payload["query"] == "weather"
+    assert payload["answer"].endswith(" ...")
+    assert tool.count_tokens(out) <= 40
+
+
+def test_duplicate_urls_and_sentences_are_dropped():
+    results = [
+        {"url": "https://a", "content": "LangGraph builds agents. It is by LangChain."},
+        {"url": "https://a", "content": "Same page again."},
+        {"url": "https://b", "content": "It is by LangChain. Graphs have nodes."},
+    ]
+    out = json.loads(condenser(search=1000).condense("search", results))
+    assert [result["url"] for result in out] == ["https://a", "https://b"]
+    assert out[1]["content"] == "Graphs have nodes."
+
+
+def test_tools_without_budget_pass_through():
+    tool = condenser(search=100)
+    answer = "Use __init__ and **not** `new`."
+    assert tool.condense("human_assistance", answer) == json.dumps(answer)
+    assert "human_assistance" not in tool.report()
+
+
+def test_report_counts_saved_tokens():
+    tool = condenser(search=1000)
+    tool.condense("search", [{"url": "https://a", "content": "<b>x</b>", "score": 0.9, "raw_content": "y" * 400}])
+    report = tool.report()["search"]
+    assert report["calls"] == 1
+    assert report["tokens_saved"] == report["tokens_before"] - report["tokens_after"] > 0
+
+
+def fake_tiktoken(monkeypatch, get_encoding):
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=get_encoding))
+
+
+def test_token_counter_does_not_wait_for_the_encoding(monkeypatch):
+    release = threading.Event()
+
+    class Encoding:
+        def encode(self, text, disallowed_special=()):
+            return text.split()
+
+    def get_encoding(name):
+        release.wait(5)  # a download on a cold cache
+        return Encoding()
+
+    fake_tiktoken(monkeypatch, get_encoding)
+    counter = BackgroundTokenCounter()
+    assert counter("one two three four") == 5  # about 4 characters per token
+    release.set()
+    assert counter.loaded.wait(5)
+    assert counter("one two three four") == 4
+
+
+def test_token_counter_falls_back_when_loading_fails(monkeypatch):
+    def get_encoding(name):
+        raise ConnectionError("offline")
+
+    fake_tiktoken(monkeypatch, get_encoding)
+    counter = BackgroundTokenCounter()
+    assert counter.loaded.wait(5)
+    assert counter("x" * 40) == 10
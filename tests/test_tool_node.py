@@ -0,0 +1,50 @@
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from tool_node import BasicToolNode
+
+
+@tool
+def sleepy(seconds: float) -> str:
+    """Sleep for `seconds`."""
+    time.sleep(seconds)
+    return "ok"
+
+
+def turn(*seconds: float) -> dict:
+    tool_calls = [{"name": "sleepy", "args": {"seconds": s}, "id": str(n)} for n, s in enumerate(seconds)]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+def test_queued_calls_do_not_lose_their_queue_time():
+    node = BasicToolNode([sleepy], max_workers=2, timeout=0.5)
+    # The last two calls wait ~0.3s for a thread, then run in time.
+    outputs = node(turn(0.3, 0.3, 0.3, 0.3))["messages"]
+    assert [message.content for message in outputs] == ['"ok"'] * 4
+    node.close()
+
+
+def test_slow_calls_time_out_in_call_order():
+    node = BasicToolNode([sleepy], max_workers=2, timeout=0.2)
+    outputs = node(turn(0.05, 1.0))["messages"]
+    assert [message.tool_call_id for message in outputs] == ["0", "1"]
+    assert outputs[0].content == '"ok"'
+    assert outputs[1].status == "error" and "timed out" in outputs[1].content
+    node.close()
+
+
+def test_close_shuts_the_pool_down():
+    node = BasicToolNode([sleepy], max_workers=2)
+    node.close()
+    assert node._executor._shutdown
+    BasicToolNode([sleepy]).close()
+
+
+def test_timeout_is_enforced_in_sequential_mode():
+    node = BasicToolNode([sleepy], timeouts={"sleepy": 0.2})
+    outputs = node(turn(0.05, 1.0))["messages"]
+    assert outputs[0].content == '"ok"'
+    assert outputs[1].status == "error"
+    node.close()
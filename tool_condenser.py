@@ -0,0 +1,298 @@
+# ************************************************
+# Condensing tool results before they reach the LLM
+# ************************************************
+
+# BasicToolNode used to append `json.dumps(tool_result)` of the raw Tavily
+# payload to the history, and every later turn re-sends those bytes as
+# prompt tokens. ToolOutputCondenser post-processes each result first:
+#
+#   - strips HTML tags, markdown images/links and entity noise from text,
+#   - drops fields the model does not need (scores, raw_content, images),
+#   - removes results with a repeated URL and sentences already seen in
+#     an earlier result,
+#   - enforces a per-tool token budget (whole results first, then the
+#     last snippet is cut; other JSON objects have their strings cut),
+#   - serializes compactly (orjson when installed, else compact json).
+#
+# Only tools with a budget are condensed; the results of other tools (e.g.
+# human_assistance answers) pass through as json.dumps, like BasicToolNode
+# without a condenser. Markdown is only stripped where it surrounds text,
+# so identifiers such as `__init__` or `snake_case` stay intact.
+#
+#   condenser = ToolOutputCondenser(budgets={"tavily_search_results_json": 300})
+#   tools_node = BasicToolNode(tools, condenser=condenser)
+#   ...
+#   print(condenser.report())   # tokens before / after / saved, per tool
+#
+# `python tool_condenser.py result.json --tool tavily_search_results_json`
+# shows the effect on a saved tool result.
+
+import argparse
+import functools
+import html
+import json
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DROP_KEYS = ("score", "raw_content", "images", "favicon", "response_time", "follow_up_questions")
+
+_SCRIPT = re.compile(r"<(script|style)\b.*?</\1\s*>", re.DOTALL | re.IGNORECASE)
+_BLOCK_TAG = re.compile(r"</?(p|div|br|li|ul|ol|tr|table|h[1-6]|section|article)\b[^>]*>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+_MD_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+# Headings, horizontal rules and code fences (whole lines only).
+_MD_NOISE = re.compile(r"^[ \t]*(#{1,6}[ \t]*|[*_=-]{3,}[ \t]*$|```[\w+-]*[ \t]*$)", re.MULTILINE)
+# **strong** around text (not a**b), and __strong__ only around several
+# words, since __init__-style identifiers look the same.
+_MD_STRONG = re.compile(
+    r"(?<![\w*])\*\*(?=\S)(.+?)(?<=\S)\*\*(?![\w*])|(?<![\w_])__(?=\S)([^_\n]*?\s[^_\n]*?)(?<=\S)__(?![\w_])"
+)
+_BLANKS = re.compile(r"[ \t\r\f\v]+")
+_LINES = re.compile(r"\s*\n\s*")
+_BEFORE_PUNCTUATION = re.compile(r" ([,.;:!?])")
+# Sentences, and lines (headings, list items, table cells) as their own units.
+_SEGMENT = re.compile(r"(?<=[.!?])\s+|\n")
+
+
+def strip_markup(text: str) -> str:
+    """Plain text from HTML / markdown snippets; block boundaries stay as newlines."""
+    text = _SCRIPT.sub(" ", text)
+    text = _BLOCK_TAG.sub("\n", text)
+    text = _TAG.sub(" ", text)
+    text = _MD_IMAGE.sub(" ", text)
+    text = _MD_LINK.sub(r"\1", text)
+    text = _MD_NOISE.sub(" ", text)
+    text = _MD_STRONG.sub(lambda match: match.group(1) or match.group(2), text)
+    text = _BLANKS.sub(" ", html.unescape(text))
+    return _BEFORE_PUNCTUATION.sub(r"\1", _LINES.sub("\n", text)).strip()
+
+
+def compact_dumps(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value, default=str).decode()
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class BackgroundTokenCounter:
+    """tiktoken's o200k_base (gpt-4o) counts, loaded on a background thread.
+
+    On a cold cache tiktoken downloads the BPE file, which must not happen
+    inside a tool node (slow, or failing offline). Until the encoding is
+    loaded, and for good if loading fails, texts count about 4 characters
+    per token.
+    """
+
+    def __init__(self, encoding_name: str = "o200k_base") -> None:
+        self.encoding = None
+        self.loaded = threading.Event()
+        threading.Thread(target=self._load, args=(encoding_name,), name="tiktoken-load", daemon=True).start()
+
+    def _load(self, encoding_name: str) -> None:
+        try:
+            import tiktoken
+
+            self.encoding = tiktoken.get_encoding(encoding_name)
+        except Exception:
+            pass
+        finally:
+            self.loaded.set()
+
+    def __call__(self, text: str) -> int:
+        if self.encoding is None:
+            return (len(text) + 3) // 4
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+@functools.lru_cache(maxsize=None)
+def default_token_counter() -> Callable[[str], int]:
+    """One BackgroundTokenCounter shared by every condenser."""
+    return BackgroundTokenCounter()
+
+
+class ToolOutputCondenser:
+    """Cleans, deduplicates and budgets tool results; counts the tokens it saves.
+
+    `budgets` maps tool names to token budgets. `default_budget` applies to
+    the other tools; with None (the default) they are not condensed at all.
+    Results that are not JSON-like are passed through as text with their
+    markup stripped.
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[dict] = None,
+        default_budget: Optional[int] = None,
+        drop_keys: tuple = DROP_KEYS,
+        token_counter: Optional[Callable[[str], int]] = None,
+    ) -> None:
+        self.budgets = budgets or {}
+        self.default_budget = default_budget
+        self.drop_keys = set(drop_keys)
+        self.count_tokens = token_counter or default_token_counter()
+        self.lock = threading.Lock()
+        self.stats: dict = defaultdict(lambda: {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+
+    # -----------------------------------------------
+    # Cleaning and deduplication
+    # -----------------------------------------------
+
+    def _clean(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return strip_markup(value)
+        if isinstance(value, dict):
+            cleaned = {key: self._clean(item) for key, item in value.items() if key not in self.drop_keys}
+            return {key: item for key, item in cleaned.items() if item not in ("", None, [], {})}
+        if isinstance(value, (list, tuple)):
+            return [self._clean(item) for item in value]
+        return value
+
+    @staticmethod
+    def _dedupe(results: list) -> list:
+        """Drop repeated URLs and sentences already seen in an earlier result.
+
+        Snippets come back on one line, with their sentences joined by spaces.
+        """
+        seen_urls, seen_sentences, kept = set(), set(), []
+        for result in results:
+            if not isinstance(result, dict):
+                kept.append(result)
+                continue
+            url = result.get("url")
+            if url is not None:
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+            content = result.get("content")
+            if isinstance(content, str):
+                sentences = []
+                for sentence in _SEGMENT.split(content):
+                    key = sentence.lower().strip(" .!?")
+                    if key and key not in seen_sentences:
+                        seen_sentences.add(key)
+                        sentences.append(sentence)
+                if not sentences:
+                    continue
+                result = {**result, "content": " ".join(sentences)}
+            kept.append(result)
+        return kept
+
+    # -----------------------------------------------
+    # Token budget
+    # -----------------------------------------------
+
+    def _fit(self, value: Any, budget: Optional[int]) -> str:
+        text = compact_dumps(value)
+        if budget is None or self.count_tokens(text) <= budget:
+            return text
+        if isinstance(value, list):
+            return self._fit_results(value, budget, lambda results: results)
+        if isinstance(value, dict) and isinstance(value.get("results"), list):
+            return self._fit_results(value["results"], budget, lambda results: {**value, "results": results})
+        if isinstance(value, dict):
+            return self._fit_fields(value, budget)
+        if isinstance(value, str):
+            return self._cut(value, budget, compact_dumps) or compact_dumps("")
+        return self._cut(text, budget, lambda cut: cut) or ""
+
+    def _fit_results(self, results: list, budget: int, wrap: Callable[[list], Any]) -> str:
+        """Keep whole results while they fit, then cut the next one's content."""
+        kept: list = []
+        for result in results:
+            if self.count_tokens(compact_dumps(wrap([*kept, result]))) <= budget:
+                kept.append(result)
+                continue
+            if isinstance(result, dict) and isinstance(result.get("content"), str):
+                partial = self._cut(
+                    result["content"], budget, lambda cut: compact_dumps(wrap([*kept, {**result, "content": cut}]))
+                )
+                if partial is not None:
+                    return partial
+            break
+        return compact_dumps(wrap(kept))
+
+    def _fit_fields(self, value: dict, budget: int) -> str:
+        """Cut the object's string fields, longest first, so it stays valid JSON."""
+        for key in sorted((k for k, v in value.items() if isinstance(v, str)), key=lambda k: -len(value[k])):
+            partial = self._cut(value[key], budget, lambda cut: compact_dumps({**value, key: cut}))
+            if partial is not None:
+                return partial
+            value = {**value, key: "..."}
+        return compact_dumps(value)
+
+    def _cut(self, text: str, budget: int, render: Callable[[str], str]) -> Optional[str]:
+        """The longest word-boundary prefix of `text` whose rendering fits `budget`."""
+        low, high, best = 0, len(text), None
+        while low <= high:
+            middle = (low + high) // 2
+            cut = text[:middle].rsplit(" ", 1)[0] + " ..." if middle < len(text) else text
+            rendered = render(cut)
+            if self.count_tokens(rendered) <= budget:
+                best, low = rendered, middle + 1
+            else:
+                high = middle - 1
+        return best
+
+    # -----------------------------------------------
+    # Entry points
+    # -----------------------------------------------
+
+    def condense(self, tool_name: str, tool_result: Any) -> str:
+        """The ToolMessage content for `tool_result`."""
+        budget = self.budgets.get(tool_name, self.default_budget)
+        before = json.dumps(tool_result, default=str)
+        if budget is None:
+            return before
+        value = tool_result
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        value = self._clean(value)
+        if isinstance(value, list):
+            value = self._dedupe(value)
+        elif isinstance(value, dict) and isinstance(value.get("results"), list):
+            value = {**value, "results": self._dedupe(value["results"])}
+        after = self._fit(value, budget)
+
+        tokens_before, tokens_after = self.count_tokens(before), self.count_tokens(after)
+        with self.lock:
+            stats = self.stats[tool_name]
+            stats["calls"] += 1
+            stats["tokens_before"] += tokens_before
+            stats["tokens_after"] += tokens_after
+        return after
+
+    def report(self) -> dict:
+        """Per tool: calls, tokens before and after condensing, tokens saved."""
+        with self.lock:
+            return {
+                name: {**stats, "tokens_saved": stats["tokens_before"] - stats["tokens_after"]}
+                for name, stats in self.stats.items()
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("result", help="JSON file holding one tool result")
+    parser.add_argument("--tool", default="tavily_search_results_json")
+    parser.add_argument("--budget", type=int, default=800)
+    args = parser.parse_args()
+
+    with open(args.result, encoding="utf-8") as f:
+        tool_result = json.load(f)
+    condenser = ToolOutputCondenser(default_budget=args.budget)
+    print(condenser.condense(args.tool, tool_result))
+    print(json.dumps(condenser.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
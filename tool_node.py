@@ -0,0 +1,145 @@
+# ************************************************
+# Tool Node for the Support ChatBot
+# ************************************************
+
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from langchain_core.messages import ToolMessage
+
+
+# -----------------------------------------------
+# Runs the tools requested in the last AIMessage.
+# With max_workers > 1 the calls of one turn run concurrently on a
+# bounded thread pool, so a turn takes as long as its slowest tool.
+# -----------------------------------------------
+
+class BasicToolNode:
+    """A node that runs the tools requested in the last AIMessage.
+
+    `max_workers` > 1 runs the tool calls concurrently. `timeout` is the
+    default per-call timeout in seconds and `timeouts` overrides it per tool
+    name; a call that times out is answered with an error ToolMessage. With
+    `max_workers=1` and a timeout the calls run one at a time on a single
+    pool thread, so the timeout is enforced there too.
+
+    The clock starts when a call starts running, so time spent queued
+    behind `max_workers` busy threads is not counted (the wait for a free
+    thread is bounded by the same timeout). A call that timed out cannot
+    be stopped: it keeps running, and holds its pool thread, until the
+    tool returns.
+
+    ToolMessages always come back in the original call order. With a
+    `condenser` (tool_condenser.ToolOutputCondenser) each result is cleaned
+    and budgeted before it becomes a ToolMessage. `close()` shuts the
+    thread pool down.
+    """
+
+    def __init__(
+        self,
+        tools: list,
+        max_workers: int = 1,
+        timeout: float | None = None,
+        timeouts: dict | None = None,
+        condenser=None,
+    ) -> None:
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.condenser = condenser
+        self._executor = None
+        if max_workers > 1 or timeout is not None or self.timeouts:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="tool-node"
+            )
+
+    def close(self) -> None:
+        """Shut down the thread pool; calls still queued are cancelled."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __call__(self, inputs: dict):
+        if messages := inputs.get("messages", []):
+            message = messages[-1]
+        else:
+            raise ValueError("No message found in input")
+        if self._executor is None:
+            outputs = [self._run_tool(tool_call) for tool_call in message.tool_calls]
+        else:
+            outputs = self._run_concurrently(message.tool_calls)
+        return {"messages": outputs}
+
+    def _timeout_for(self, name: str) -> float | None:
+        return self.timeouts.get(name, self.timeout)
+
+    def _tool_message(self, tool_call: dict, tool_result) -> ToolMessage:
+        if self.condenser is not None:
+            content = self.condenser.condense(tool_call["name"], tool_result)
+        else:
+            content = json.dumps(tool_result)
+        return ToolMessage(
+            content=content,
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+        )
+
+    def _timeout_message(self, tool_call: dict, timeout: float | None) -> ToolMessage:
+        return ToolMessage(
+            content=f"Error: tool '{tool_call['name']}' timed out after {timeout}s",
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            status="error",
+        )
+
+    def _run_tool(self, tool_call: dict) -> ToolMessage:
+        tool_result = self.tools_by_name[tool_call["name"]].invoke(tool_call["args"])
+        return self._tool_message(tool_call, tool_result)
+
+    def _run_concurrently(self, tool_calls: list) -> list:
+        # index -> time.monotonic() when the call started running
+        starts: dict = {}
+        running = [threading.Event() for _ in tool_calls]
+
+        def run(index: int, tool, args):
+            starts[index] = time.monotonic()
+            running[index].set()
+            return tool.invoke(args)
+
+        # Each call runs in a copy of the caller's context so the graph config
+        # (callbacks, interrupt() support) reaches the pool threads.
+        futures = [
+            self._executor.submit(
+                contextvars.copy_context().run,
+                run,
+                index,
+                self.tools_by_name[tool_call["name"]],
+                tool_call["args"],
+            )
+            for index, tool_call in enumerate(tool_calls)
+        ]
+        outputs = []
+        for index, (tool_call, future) in enumerate(zip(tool_calls, futures)):
+            timeout = self._timeout_for(tool_call["name"])
+            try:
+                if timeout is None:
+                    tool_result = future.result()
+                else:
+                    if not running[index].wait(timeout):
+                        raise FutureTimeoutError
+                    remaining = max(0.0, starts[index] + timeout - time.monotonic())
+                    tool_result = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                outputs.append(self._timeout_message(tool_call, timeout))
+                continue
+            outputs.append(self._tool_message(tool_call, tool_result))
+        return outputs
@@ -0,0 +1,505 @@
+# ************************************************
+# Recording graph turns to JSONL and replaying them as load
+# ************************************************
+
+# Record real turns from any compiled graph:
+#
+#   recorder = TraceRecorder("traces.jsonl", graph_name="tools")
+#   graph = record(graph, recorder)
+#
+# Every turn (one graph invocation) becomes one JSON line with the thread
+# id, the input (messages or a `Command(resume=...)`), and its steps in
+# completion order. The steps are:
+#   - graph nodes, with their timing;
+#   - model calls, with the output message (content, tool_calls, usage),
+#     latency and time to first token;
+#   - tool calls, with their args, output and latency.
+#
+# The load generator replays those conversations against a graph at a
+# target rate. The model is replaced by ReplayChatModel, which returns
+# the recorded outputs with the recorded latencies. Search-like tools are
+# replaced by ReplayTool, which does the same for recorded tool results.
+# Orchestration, checkpointing and tool routing then see realistic
+# conversation shapes, offline and reproducibly:
+#
+#   python trace_replay.py record --graph tools --out traces.jsonl --model-latency 0.3
+#   python trace_replay.py replay traces.jsonl --graph tools --qps 50 --duration 30
+#
+# `--speed 0` replays the outputs without their latencies (orchestration
+# overhead only); `--speed 2` doubles them.
+
+import argparse
+import asyncio
+import contextvars
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    ToolMessage,
+    convert_to_messages,
+    messages_from_dict,
+    messages_to_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.types import Command
+
+
+# -----------------------------------------------
+# Recording
+# -----------------------------------------------
+
+def _input(inputs) -> dict:
+    if isinstance(inputs, Command):
+        return {"resume": inputs.resume}
+    if isinstance(inputs, dict):
+        recorded = dict(inputs)
+        if "messages" in recorded:
+            recorded["messages"] = messages_to_dict(convert_to_messages(recorded["messages"]))
+        return recorded
+    return {"value": inputs}
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """Writes one JSON line per graph turn to `path`."""
+
+    run_inline = True
+
+    def __init__(self, path: str, graph_name: str = "graph") -> None:
+        self.path = path
+        self.graph_name = graph_name
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8")
+        self.turns: dict = {}
+        self.roots: dict = {}
+        self.runs: dict = {}
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+    def _start(self, run_id, parent_run_id, kind: str, step: dict) -> None:
+        with self.lock:
+            root = self.roots.get(parent_run_id)
+            if root is None:
+                return
+            self.roots[run_id] = root
+            if root in self.turns:
+                self.turns[root]["_children"].append(run_id)
+            if kind == "node" and parent_run_id != root:
+                # A runnable inside the node that carries the node's name.
+                return
+            if kind:
+                self.runs[run_id] = (root, kind, step, time.perf_counter())
+
+    def _end(self, run_id, **fields) -> None:
+        with self.lock:
+            run = self.runs.pop(run_id, None)
+            if run is None:
+                return
+            root, kind, step, started = run
+            turn = self.turns.get(root)
+            if turn is None:
+                return
+            now = time.perf_counter()
+            step.update(fields, type=kind, at=round(started - turn["_started"], 6), seconds=round(now - started, 6))
+            turn["steps"].append(step)
+
+    def _finish(self, run_id, error: Optional[BaseException] = None) -> None:
+        with self.lock:
+            turn = self.turns.pop(run_id, None)
+            if turn is None:
+                return
+            for child in turn.pop("_children"):
+                self.roots.pop(child, None)
+                self.runs.pop(child, None)
+            turn["seconds"] = round(time.perf_counter() - turn.pop("_started"), 6)
+            if error is not None:
+                turn["error"] = repr(error)
+            self.file.write(json.dumps(turn, default=str) + "\n")
+            self.file.flush()
+
+    # Runs are linked to the graph invocation (the root run) they belong to.
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs: Any) -> None:
+        if parent_run_id is None:
+            with self.lock:
+                self.roots[run_id] = run_id
+                self.turns[run_id] = {
+                    "graph": self.graph_name,
+                    "thread_id": (metadata or {}).get("thread_id"),
+                    "started_at": time.time(),
+                    "input": _input(inputs),
+                    "steps": [],
+                    "_started": time.perf_counter(),
+                    "_children": [run_id],
+                }
+            return
+        node = (metadata or {}).get("langgraph_node")
+        is_node = node is not None and kwargs.get("name") == node and not node.startswith("__")
+        self._start(run_id, parent_run_id, "node" if is_node else "", {"name": node})
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs: Any) -> None:
+        if parent_run_id is None:
+            self._finish(run_id)
+        else:
+            self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs: Any) -> None:
+        if parent_run_id is None:
+            self._finish(run_id, error)
+        else:
+            # Interrupts surface as node errors.
+            self._end(run_id, error=type(error).__name__)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs: Any) -> None:
+        self._start(run_id, parent_run_id, "llm", {"node": (metadata or {}).get("langgraph_node")})
+
+    def on_llm_new_token(self, token: str, *, run_id, **kwargs: Any) -> None:
+        with self.lock:
+            run = self.runs.get(run_id)
+            if run is not None and "ttft" not in run[2]:
+                run[2]["ttft"] = round(time.perf_counter() - run[3], 6)
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+        message = response.generations[0][0].message
+        self._end(
+            run_id,
+            output={
+                "content": message.content,
+                "tool_calls": [
+                    {"name": call["name"], "args": call["args"], "id": call["id"]}
+                    for call in getattr(message, "tool_calls", [])
+                ],
+                "usage_metadata": getattr(message, "usage_metadata", None),
+            },
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error=repr(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, inputs=None, **kwargs: Any) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(run_id, parent_run_id, "tool", {"name": name, "args": inputs if inputs is not None else input_str})
+
+    def on_tool_end(self, output, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, output=output.content if isinstance(output, ToolMessage) else output)
+
+    def on_tool_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error=repr(error))
+
+
+def record(graph, recorder: TraceRecorder):
+    """Return `graph` with every turn written to `recorder`."""
+    return graph.with_config(callbacks=[recorder])
+
+
+def load_conversations(path: str) -> list[list[dict]]:
+    """The recorded turns grouped by thread, each thread's turns in recorded order."""
+    threads: dict = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                turn = json.loads(line)
+                threads[turn.get("thread_id")].append(turn)
+    return [sorted(turns, key=lambda turn: turn["started_at"]) for turns in threads.values()]
+
+
+# -----------------------------------------------
+# Replaying model and tools
+# -----------------------------------------------
+
+# The recorded model outputs left in the conversation being replayed. A
+# context variable reaches every node of the graph run, sync or async,
+# and streaming calls, which get no run manager to read a thread_id from.
+_script: contextvars.ContextVar = contextvars.ContextVar("replay_script", default=None)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Returns the recorded model outputs of a conversation, with their latencies.
+
+    Call `load(conversation)` in the task (or thread) that replays the
+    conversation; every model call made from it returns the next recorded
+    output.
+    """
+
+    speed: float = 1.0
+    model_name: str = "replay"
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat-model"
+
+    def bind_tools(self, tools: list, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    # Same estimate as FakeChatModel, for trimmers that count with the model.
+    def get_num_tokens_from_messages(self, messages: list, tools=None) -> int:
+        return 3 + sum(4 + len(str(message.content).split()) for message in messages)
+
+    @staticmethod
+    def load(conversation: list[dict]) -> None:
+        steps = [step for turn in conversation for step in turn["steps"] if step["type"] == "llm" and "output" in step]
+        _script.set(deque(steps))
+
+    def _next(self) -> tuple[AIMessage, float, float]:
+        script = _script.get()
+        if not script:
+            raise LookupError(
+                "No recorded model output left in this conversation; "
+                "was the trace recorded from a different graph?"
+            )
+        step = script.popleft()
+        output = step["output"]
+        usage = output.get("usage_metadata") or {}
+        message = AIMessage(
+            content=output["content"],
+            tool_calls=output["tool_calls"],
+            response_metadata={
+                "model_name": self.model_name,
+                "token_usage": {
+                    "prompt_tokens": usage.get("input_tokens", 0),
+                    "completion_tokens": usage.get("output_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0),
+                },
+            },
+            usage_metadata=usage or None,
+        )
+        seconds = step["seconds"] * self.speed
+        return message, min(seconds, step.get("ttft", seconds) * self.speed), seconds
+
+    def _chunks(self, message: AIMessage):
+        words = message.content.split(" ") if isinstance(message.content, str) and message.content else []
+        for i, word in enumerate(words):
+            yield AIMessageChunk(content=word if i == 0 else " " + word)
+        for i, call in enumerate(message.tool_calls):
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[{"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}],
+            )
+        yield AIMessageChunk(content="", response_metadata=message.response_metadata, usage_metadata=message.usage_metadata)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message, _, seconds = self._next()
+        time.sleep(seconds)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message, _, seconds = self._next()
+        await asyncio.sleep(seconds)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # Streaming: the first chunk after the recorded TTFT, the rest spread
+    # over the remaining recorded time.
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message, ttft, seconds = self._next()
+        chunks = list(self._chunks(message))
+        time.sleep(ttft)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep((seconds - ttft) / len(chunks))
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        message, ttft, seconds = self._next()
+        chunks = list(self._chunks(message))
+        await asyncio.sleep(ttft)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep((seconds - ttft) / len(chunks))
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+
+class ReplayTool(BaseTool):
+    """Returns the recorded result of a tool call with the same args, after its recorded latency."""
+
+    description: str = "Replays recorded tool results."
+    args_schema: dict = {"type": "object", "properties": {}, "additionalProperties": True}
+    results: dict = {}
+    speed: float = 1.0
+
+    def _lookup(self, kwargs: dict) -> tuple[Any, float]:
+        key = json.dumps(kwargs, sort_keys=True, default=str)
+        if key not in self.results:
+            raise LookupError(f"No recorded result for {self.name}({key})")
+        output, seconds = self.results[key]
+        return output, seconds * self.speed
+
+    def _run(self, run_manager=None, **kwargs) -> Any:
+        output, seconds = self._lookup(kwargs)
+        time.sleep(seconds)
+        return output
+
+    async def _arun(self, run_manager=None, **kwargs) -> Any:
+        output, seconds = self._lookup(kwargs)
+        await asyncio.sleep(seconds)
+        return output
+
+
+def replay_tools(conversations: list[list[dict]], speed: float = 1.0, exclude=("human_assistance",)) -> dict:
+    """A ReplayTool per recorded tool name, except tools that must run for real (interrupts)."""
+    results: dict = defaultdict(dict)
+    for conversation in conversations:
+        for turn in conversation:
+            for step in turn["steps"]:
+                if step["type"] == "tool" and "output" in step and step["name"] not in exclude:
+                    args = step["args"] if isinstance(step["args"], dict) else {"query": step["args"]}
+                    key = json.dumps(args, sort_keys=True, default=str)
+                    results[step["name"]].setdefault(key, (step["output"], step["seconds"]))
+    return {name: ReplayTool(name=name, results=by_args, speed=speed) for name, by_args in results.items()}
+
+
+# -----------------------------------------------
+# Load generator
+# -----------------------------------------------
+
+def turn_input(turn: dict):
+    recorded = turn["input"]
+    if "resume" in recorded:
+        return Command(resume=recorded["resume"])
+    inputs = dict(recorded)
+    if "messages" in inputs:
+        inputs["messages"] = messages_from_dict(inputs["messages"])
+    return inputs
+
+
+async def replay(
+    graph,
+    model: ReplayChatModel,
+    conversations: list[list[dict]],
+    qps: float,
+    duration: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> dict:
+    """Start recorded conversations so that turns arrive at `qps` per second (open loop).
+
+    Conversations are started round-robin, each on a fresh thread_id, until
+    `duration` seconds have passed or `limit` conversations were started.
+    Turns of one conversation run back to back.
+    """
+    if duration is None and limit is None:
+        limit = len(conversations)
+    interval = statistics.fmean(len(conversation) for conversation in conversations) / qps
+    latencies: list = []
+    errors: list = []
+    lags: list = []
+
+    # Each conversation runs in its own task, so in its own copy of the context.
+    async def run(conversation: list[dict], thread_id: str) -> None:
+        model.load(conversation)
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            for turn in conversation:
+                started = time.perf_counter()
+                await graph.ainvoke(turn_input(turn), config)
+                latencies.append(time.perf_counter() - started)
+        except Exception as error:
+            errors.append(repr(error))
+
+    loop = asyncio.get_running_loop()
+    tasks = []
+    started = loop.time()
+    while (limit is None or len(tasks) < limit) and (duration is None or loop.time() - started < duration):
+        due = started + len(tasks) * interval
+        if (delay := due - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        lags.append(max(0.0, loop.time() - due))
+        conversation = conversations[len(tasks) % len(conversations)]
+        tasks.append(asyncio.create_task(run(conversation, f"replay-{len(tasks)}")))
+    await asyncio.gather(*tasks)
+    wall = loop.time() - started
+
+    ordered = sorted(latencies) or [0.0]
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+    return {
+        "conversations": len(tasks),
+        "turns": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "target_qps": qps,
+        "achieved_qps": len(latencies) / wall,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_start_lag_ms": max(lags, default=0.0) * 1000,
+    }
+
+
+# -----------------------------------------------
+# Command line
+# -----------------------------------------------
+
+def record_main(args) -> None:
+    """Record synthetic conversations from the benchmark graphs (no API keys needed)."""
+    from benchmark_graphs import GRAPHS, run_conversations
+    from fakes import FakeChatModel, FakeSearchTool
+
+    model = FakeChatModel(latency=args.model_latency, token_latency=args.token_latency)
+    search = FakeSearchTool(latency=args.tool_latency)
+    recorder = TraceRecorder(args.out, graph_name=args.graph)
+    graph = record(GRAPHS[args.graph](model, search), recorder)
+    asyncio.run(run_conversations(args.graph, graph, args.conversations, args.turns))
+    recorder.close()
+    print(f"recorded {args.conversations} conversations x {args.turns} turns to {args.out}")
+
+
+def replay_main(args) -> None:
+    from benchmark_graphs import GRAPHS
+    from fakes import FakeSearchTool
+
+    conversations = load_conversations(args.traces)
+    model = ReplayChatModel(speed=args.speed)
+    tools = replay_tools(conversations, speed=args.speed)
+    search = tools.get("tavily_search_results_json") or FakeSearchTool()
+    graph = GRAPHS[args.graph](model, search)
+    report = asyncio.run(replay(graph, model, conversations, args.qps, args.duration, args.conversations))
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recording = commands.add_parser("record", help="record fake-model conversations from a benchmark graph")
+    recording.add_argument("--graph", default="tools")
+    recording.add_argument("--out", default="traces.jsonl")
+    recording.add_argument("--conversations", type=int, default=20)
+    recording.add_argument("--turns", type=int, default=4)
+    recording.add_argument("--model-latency", type=float, default=0.3)
+    recording.add_argument("--token-latency", type=float, default=0.0)
+    recording.add_argument("--tool-latency", type=float, default=0.5)
+
+    replaying = commands.add_parser("replay", help="replay a JSONL trace against a benchmark graph")
+    replaying.add_argument("traces")
+    replaying.add_argument("--graph", default="tools")
+    replaying.add_argument("--qps", type=float, default=10.0, help="target turns per second")
+    replaying.add_argument("--duration", type=float, help="seconds to keep starting conversations")
+    replaying.add_argument("--conversations", type=int, help="conversations to start (default: all recorded)")
+    replaying.add_argument("--speed", type=float, default=1.0, help="latency multiplier, 0 for none")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record_main(args)
+    else:
+        replay_main(args)
+
+
+if __name__ == "__main__":
+    main()